@@ -0,0 +1,84 @@
+# benchmarks/import_time.py
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, Any, List, Sequence, Tuple
+
+HEAVY_MODULES = ('torch', 'sklearn', 'pandas', 'scipy', 'matplotlib', 'plotly', 'numba')
+
+# module -> (budget in seconds on top of the numpy import, heavy modules it may load)
+BUDGETS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    'dust_dynamics.core.physics': (0.15, ()),
+    'dust_dynamics.core.equations': (0.20, ()),
+    'dust_dynamics.core.simulation': (0.30, ()),
+    'dust_dynamics.models.dust_model': (0.35, ()),
+    'dust_dynamics.utils.metrics': (0.15, ()),
+    'dust_dynamics.utils.visualization': (0.25, ()),
+    'dust_dynamics.data.loader': (1.50, ('pandas',)),
+}
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import numpy
+numpy_time = time.perf_counter() - started
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'numpy': numpy_time, 'seconds': elapsed,
+                  'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 3) -> Dict[str, Any]:
+    """Best import time of `module` in fresh interpreters, after numpy
+
+    numpy is imported first and timed separately, so the budget measures
+    what this package adds. Also lists the heavy modules the import loaded.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    env.pop('DUST_PROFILE', None)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module,
+                                                                    heavy=HEAVY_MODULES)],
+                                capture_output=True, text=True, env=env, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run['seconds'])
+    return {'module': module, 'seconds': best['seconds'], 'numpy': best['numpy'],
+            'loaded': best['loaded']}
+
+
+def check_import_budgets(budgets: Dict[str, Tuple[float, Sequence[str]]] = BUDGETS,
+                         repeat: int = 3, scale: float = 1.0) -> List[Dict[str, Any]]:
+    """Measure every module in `budgets`; each row says whether it passed
+
+    A module fails when its import takes longer than its budget (times
+    `scale`, for slow machines) or loads a heavy module it is not allowed.
+    """
+    rows = []
+    for module, (budget, allowed) in budgets.items():
+        row = measure_import(module, repeat)
+        row['budget'] = budget * scale
+        row['unexpected'] = [name for name in row['loaded']
+                             if not any(name == a or name.startswith(a + '.') for a in allowed)]
+        row['passed'] = row['seconds'] <= row['budget'] and not row['unexpected']
+        rows.append(row)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import-time budget check')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply every budget, e.g. 2 on a slow CI machine')
+    args = parser.parse_args()
+    rows = check_import_budgets(repeat=args.repeat, scale=args.scale)
+    print(f"{'module':<36} {'import [s]':>10} {'budget':>8}  heavy modules loaded")
+    for row in rows:
+        status = '' if row['passed'] else '  FAIL'
+        print(f"{row['module']:<36} {row['seconds']:>10.3f} {row['budget']:>8.2f}  "
+              f"{', '.join(row['loaded']) or '-'}{status}")
+    sys.exit(0 if all(row['passed'] for row in rows) else 1)
@@ -0,0 +1,41 @@
+# benchmarks/strong_scaling.py
+import argparse
+import os
+import numpy as np
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.core.simulation import Simulation
+
+def run_strong_scaling(grid_size: int = 96, steps: int = 20, max_workers: int = None):
+    """Fixed problem size, 1..N worker processes; returns one row per worker count"""
+    config = EarthConfig()
+    config.grid_shape = (grid_size, grid_size, grid_size)
+    dt = 0.01
+    rng = np.random.default_rng(0)
+    initial_conditions = {
+        'velocity': 0.01 * rng.standard_normal((3,) + config.grid_shape),
+        'pressure': 101325,
+        'concentration': 1e-3 * (1 + 0.1 * rng.random(config.grid_shape)),
+        'temperature': 288,
+        'humidity': 0.5
+    }
+    max_workers = max_workers or os.cpu_count()
+    rows = []
+    for workers in range(1, max_workers + 1):
+        results = Simulation(config).run(steps * dt, dt, initial_conditions, workers=workers)
+        rows.append({'workers': workers, 'steps_per_second': results['steps_per_second']})
+    baseline = rows[0]['steps_per_second']
+    for row in rows:
+        row['speedup'] = row['steps_per_second'] / baseline
+        row['efficiency'] = row['speedup'] / row['workers']
+    return rows
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Strong scaling of decomposed DustEquations steps')
+    parser.add_argument('--grid', type=int, default=96)
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--max-workers', type=int, default=None)
+    args = parser.parse_args()
+    print(f"{'workers':>8} {'steps/s':>10} {'speedup':>8} {'efficiency':>10}")
+    for row in run_strong_scaling(args.grid, args.steps, args.max_workers):
+        print(f"{row['workers']:>8} {row['steps_per_second']:>10.2f} "
+              f"{row['speedup']:>8.2f} {row['efficiency']:>10.2f}")
@@ -0,0 +1,341 @@
+# benchmarks/suite.py
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Sequence
+import numpy as np
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.config.mars_config import MarsConfig
+from dust_dynamics.config.venus_config import VenusConfig
+from dust_dynamics.core.equations import State, Grid, DustEquations
+from dust_dynamics.core.physics import PhysicsEngine
+from dust_dynamics.core.simulation import Simulation
+
+DEFAULT_HISTORY = Path(__file__).with_name('history.jsonl')
+LAYERS = ('imports', 'equations', 'physics', 'simulate', 'data', 'inference')
+PLANETS = {'earth': EarthConfig, 'mars': MarsConfig, 'venus': VenusConfig}
+
+Results = Dict[str, Dict[str, Any]]
+
+
+def measure(function: Callable[[], Any], repeat: int = 5, warmup: int = 1,
+            min_sample: float = 0.02) -> Dict[str, Any]:
+    """Best and median wall time per call of `function` over `repeat` samples
+
+    Like timeit's autorange, fast calls are looped until one sample takes
+    at least `min_sample` seconds so timer noise does not dominate.
+    """
+    for _ in range(warmup):
+        function()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_sample:
+            break
+        number *= 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - started) / number)
+    return {'seconds': min(times), 'median': float(np.median(times)), 'loops': number}
+
+
+def _entry(timing: Dict[str, Any], items: float, unit: str) -> Dict[str, Any]:
+    timing['rate'] = items / timing['seconds']
+    timing['unit'] = unit
+    return timing
+
+
+def _random_state(config, shape, seed: int = 0) -> State:
+    rng = np.random.default_rng(seed)
+    config = config.with_overrides({'grid_shape': shape})
+    grid = Grid.from_config(config)
+    state = State.zeros(grid.padded_shape)
+    for name, array in state.items():
+        array[...] = rng.standard_normal(array.shape)
+    state.concentration[...] = 1e-3 * (1 + 0.1 * rng.random(state.concentration.shape))
+    state.apply_boundary(grid.boundary)
+    return state
+
+
+def bench_equations(sizes: Sequence[int] = (16, 32, 64), backend: str = 'numpy',
+                    repeat: int = 5) -> Results:
+    """DustEquations kernels and the full right-hand side per grid size"""
+    config = EarthConfig()
+    equations = DustEquations(backend)
+    results = {}
+    for n in sizes:
+        state = _random_state(config, (n, n, n))
+        out = State.zeros((n, n, n))
+        cells = n ** 3
+        kernels = {
+            'navier_stokes': lambda: equations.navier_stokes(state, config, out.velocity),
+            'dust_transport': lambda: equations.dust_transport(state, config, out.concentration),
+            'rhs': lambda: equations.rhs(state, config, out),
+        }
+        for name, kernel in kernels.items():
+            results[f'equations/{backend}/{name}/{n}'] = _entry(
+                measure(kernel, repeat), cells, 'cells/s')
+    return results
+
+
+def bench_physics(n_particles: int = 1_000_000, repeat: int = 5) -> Results:
+    """PhysicsEngine closed-form array paths over a million particles"""
+    engine = PhysicsEngine(EarthConfig())
+    rng = np.random.default_rng(0)
+    diameter = np.exp(rng.uniform(np.log(1e-6), np.log(5e-4), n_particles))
+    density = rng.uniform(1500.0, 4000.0, n_particles)
+    cases = {
+        'settling_closed_form': lambda: engine.calculate_particle_settling_velocity(diameter,
+                                                                                    density),
+        'threshold_closed_form': lambda: engine.calculate_threshold_friction_velocity(diameter,
+                                                                                      density),
+    }
+    return {f'physics/{name}': _entry(measure(case, repeat), n_particles, 'particles/s')
+            for name, case in cases.items()}
+
+def bench_simulate(grid_size: int = 32, steps: int = 10,
+                   planets: Sequence[str] = tuple(PLANETS), repeat: int = 3) -> Results:
+    """Fixed-step simulate() throughput for each planet configuration"""
+    results = {}
+    for planet in planets:
+        config = PLANETS[planet]().with_overrides({'grid_shape': (grid_size,) * 3})
+        dt = 0.2 * config.dx ** 2 / max(config.D, config.nu)  # explicit diffusion limit
+        rng = np.random.default_rng(0)
+        initial_conditions = {
+            'velocity': 0.01 * rng.standard_normal((3,) + config.grid_shape),
+            'pressure': config.pressure_base,
+            'concentration': 1e-3 * (1 + 0.1 * rng.random(config.grid_shape)),
+            'temperature': config.temperature_base,
+            'humidity': config.humidity_base,
+        }
+        simulation = Simulation(config)
+        timing = measure(lambda: simulation.run(steps * dt, dt, initial_conditions), repeat)
+        results[f'simulate/{planet}/{grid_size}'] = _entry(timing, steps, 'steps/s')
+    return results
+
+
+def write_measurements(path: Path, target_mb: float, chunk_rows: int = 200_000,
+                       seed: int = 0) -> int:
+    """Synthetic station CSV of about `target_mb` megabytes; returns its row count"""
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    rows, start = 0, np.datetime64('2020-01-01T00:00:00')
+    with open(path, 'w') as f:
+        while f.tell() < target_mb * 1e6:
+            n = chunk_rows
+            chunk = pd.DataFrame({
+                'timestamp': start + np.arange(rows, rows + n).astype('timedelta64[s]'),
+                'wind_u': rng.normal(0.0, 5.0, n),
+                'wind_v': rng.normal(0.0, 5.0, n),
+                'temperature': rng.normal(288.0, 10.0, n),
+                'humidity': rng.uniform(0.0, 1.0, n),
+                'pressure': rng.normal(101325.0, 500.0, n),
+                'concentration': rng.lognormal(-7.0, 1.0, n),
+            })
+            chunk.loc[rng.random(n) < 0.01, 'temperature'] = np.nan
+            chunk.to_csv(f, header=rows == 0, index=False, float_format='%.6g')
+            rows += n
+    return rows
+
+
+def bench_data(target_mb: float = 64.0, directory: Optional[str] = None,
+               repeat: int = 3) -> Results:
+    """DataLoader cache build and cached loads, DataPreprocessor streaming
+
+    Set `target_mb` in the thousands to reproduce multi-GB station files;
+    the file is generated once per `directory` and reused.
+    """
+    from dust_dynamics.data.loader import DataLoader
+    from dust_dynamics.data.preprocessor import DataPreprocessor
+    with tempfile.TemporaryDirectory() as scratch:
+        root = Path(directory or scratch)
+        root.mkdir(parents=True, exist_ok=True)
+        source = root / f'synthetic_{int(target_mb)}mb.csv'
+        if not source.exists():
+            write_measurements(source, target_mb)
+        megabytes = source.stat().st_size / 1e6
+        cache = root / '.bench-cache'
+
+        def cold_build():
+            loader = DataLoader(str(root), cache_dir=str(cache))
+            loader.columnar(source.name)
+            return loader
+
+        results = {}
+        results['data/columnar_build'] = _entry(
+            measure(lambda: (_clear(cache), cold_build()), repeat, warmup=0), megabytes, 'MB/s')
+        loader = cold_build()
+        rows = loader.columnar(source.name).rows
+        results['data/load_cached'] = _entry(
+            measure(lambda: loader.load_measurement_data(source.name), repeat), rows, 'rows/s')
+        preprocessor = DataPreprocessor()
+        results['data/preprocess_stream'] = _entry(
+            measure(lambda: preprocessor.preprocess_loader(loader, source.name), repeat),
+            rows, 'rows/s')
+    return results
+
+
+def _clear(path: Path):
+    import shutil
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def bench_inference(rows: int = 1_000_000, hidden_sizes: Sequence[int] = (64, 64, 32),
+                    repeat: int = 5) -> Results:
+    """DustFeedbackNetwork evaluation: eager PyTorch vs InferenceEngine"""
+    import torch
+    from dust_dynamics.models.neural_net import DustFeedbackNetwork
+    from dust_dynamics.models.inference import InferenceEngine
+    torch.manual_seed(0)
+    network = DustFeedbackNetwork(6, list(hidden_sizes), 3).eval()
+    inputs = np.random.default_rng(0).standard_normal((rows, 6)).astype(np.float32)
+    tensor = torch.from_numpy(inputs)
+    engine = InferenceEngine(network)
+    out = np.empty((rows, 3), dtype=np.float32)
+
+    def eager():
+        with torch.no_grad():
+            network(tensor)
+
+    return {
+        'inference/eager': _entry(measure(eager, repeat), rows, 'rows/s'),
+        'inference/engine': _entry(measure(lambda: engine.predict(inputs, out), repeat),
+                                   rows, 'rows/s'),
+    }
+
+
+def bench_imports(repeat: int = 3) -> Results:
+    """Fresh-interpreter import time of the modules with import budgets"""
+    from dust_dynamics.benchmarks.import_time import BUDGETS, measure_import
+    results = {}
+    for module in BUDGETS:
+        row = measure_import(module, repeat)
+        results[f"imports/{module.split('.', 1)[1]}"] = {'seconds': row['seconds'],
+                                                         'loaded': row['loaded']}
+    return results
+
+
+def machine_fingerprint() -> Dict[str, Any]:
+    """Identifies comparable history entries"""
+    return {'node': platform.node(), 'machine': platform.machine(),
+            'processor': platform.processor(), 'cpus': os.cpu_count(),
+            'python': platform.python_version(), 'numpy': np.__version__}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    """All runs recorded in the JSON-lines history file"""
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(path: Path, results: Results) -> Dict[str, Any]:
+    record = {'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'commit': git_commit(), 'machine': machine_fingerprint(),
+              'results': results}
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    return record
+
+
+def compare(results: Results, history: Sequence[Dict[str, Any]], threshold: float = 0.15,
+            window: int = 5, machine: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Compare `results` with the median of the last `window` comparable runs
+
+    Only runs recorded on the same machine fingerprint count. Each row has
+    the baseline and current best times and their ratio; `regression` is
+    set when the current time exceeds the baseline by more than `threshold`.
+    """
+    machine = machine or machine_fingerprint()
+    runs = [run for run in history if run.get('machine') == machine]
+    rows = []
+    for name, current in results.items():
+        previous = [run['results'][name]['seconds'] for run in runs if name in run['results']]
+        previous = previous[-window:]
+        if not previous:
+            rows.append({'name': name, 'baseline': None, 'current': current['seconds'],
+                         'ratio': None, 'regression': False})
+            continue
+        baseline = float(np.median(previous))
+        ratio = current['seconds'] / baseline
+        rows.append({'name': name, 'baseline': baseline, 'current': current['seconds'],
+                     'ratio': ratio, 'regression': ratio > 1.0 + threshold})
+    return rows
+
+
+def run_suite(layers: Sequence[str] = LAYERS, sizes: Sequence[int] = (16, 32, 64),
+              backend: str = 'numpy', grid_size: int = 32, steps: int = 10,
+              data_mb: float = 64.0, data_dir: Optional[str] = None,
+              inference_rows: int = 1_000_000) -> Results:
+    results: Results = {}
+    for layer in layers:
+        if layer == 'imports':
+            results.update(bench_imports())
+        elif layer == 'equations':
+            results.update(bench_equations(sizes, backend))
+        elif layer == 'physics':
+            results.update(bench_physics())
+        elif layer == 'simulate':
+            results.update(bench_simulate(grid_size, steps))
+        elif layer == 'data':
+            results.update(bench_data(data_mb, data_dir))
+        elif layer == 'inference':
+            results.update(bench_inference(inference_rows))
+        else:
+            raise ValueError(f"Unknown benchmark layer: {layer}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dust dynamics benchmark suite')
+    parser.add_argument('--layers', nargs='+', choices=LAYERS, default=list(LAYERS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[16, 32, 64])
+    parser.add_argument('--backend', default='numpy')
+    parser.add_argument('--grid', type=int, default=32)
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--data-mb', type=float, default=64.0)
+    parser.add_argument('--data-dir', default=None,
+                        help='keep the synthetic data file here between runs')
+    parser.add_argument('--inference-rows', type=int, default=1_000_000)
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='allowed slowdown against the baseline (0.15 = 15%%)')
+    parser.add_argument('--window', type=int, default=5)
+    parser.add_argument('--no-record', action='store_true',
+                        help='compare only; do not append this run to the history')
+    args = parser.parse_args()
+
+    results = run_suite(args.layers, args.sizes, args.backend, args.grid, args.steps,
+                        args.data_mb, args.data_dir, args.inference_rows)
+    rows = compare(results, load_history(args.history), args.threshold, args.window)
+    print(f"{'benchmark':<44} {'best [ms]':>10} {'baseline':>10} {'ratio':>7}")
+    for row in rows:
+        baseline = f"{row['baseline'] * 1e3:10.3f}" if row['baseline'] else f"{'-':>10}"
+        ratio = f"{row['ratio']:7.2f}" if row['ratio'] else f"{'-':>7}"
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['name']:<44} {row['current'] * 1e3:10.3f} {baseline} {ratio}{flag}")
+    if not args.no_record:
+        append_history(args.history, results)
+    sys.exit(1 if any(row['regression'] for row in rows) else 0)
@@ -1,5 +1,6 @@
-from dataclasses import dataclass
-from typing import Dict, Any
+import copy
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, Any, Tuple
 
 @dataclass
 class BaseConfig:
@@ -12,7 +13,32 @@ class BaseConfig:
     z0: float  # roughness length
     dt: float  # time step
     dx: float  # spatial step
+    grid_shape: Tuple[int, int, int] = (32, 32, 32)  # interior cells
+    boundary: str = 'periodic'  # 'periodic' or 'wall'
+    coupling_coefficient: float = 0.0  # dust-air drag coupling κ
+    thermal_coefficient: float = 0.0   # α in Fd
+    humidity_coefficient: float = 0.0  # β in Fd
     
     @classmethod
     def from_dict(cls, config_dict: Dict[str, Any]) -> 'BaseConfig':
         return cls(**config_dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+    
+    def with_overrides(self, overrides: Dict[str, Any]) -> 'BaseConfig':
+        """Copy of this config, of the same class, with `overrides` applied
+
+        Overrides may name dataclass fields or the planet-specific
+        attributes this config already has (pressure_base, ...); any other
+        key raises ValueError, so a misspelt sweep parameter cannot silently
+        run the baseline.
+        """
+        known = {f.name for f in fields(self)} | set(vars(self))
+        unknown = sorted(set(overrides) - known)
+        if unknown:
+            raise ValueError(f"Unknown config parameters: {unknown}")
+        config = copy.copy(self)
+        for name, value in overrides.items():
+            setattr(config, name, value)
+        return config
@@ -0,0 +1,650 @@
+# core/amr.py
+import numpy as np
+from dataclasses import dataclass
+from itertools import product
+from typing import Dict, Any, List, Optional, Tuple
+from . import stencils
+from .equations import State, Grid, DustEquations
+from .integrators import RK4Integrator, stable_time_step
+from .decomposition import WALL_SIGNS
+from .instrumentation import PROFILER
+from .stencils import INTERIOR
+
+# Each level halves dx and the time step of the level below it
+RATIO = 2
+# RK4Integrator refreshes ghosts after its stages at these fractions of the
+# step and combines the stage tendencies with these weights; the coarse-fine
+# ghost interpolation and the flux registers follow that fixed order
+RK4_GHOST_TIMES = (0.5, 0.5, 1.0, 1.0)
+RK4_WEIGHTS = (1.0 / 6.0, 1.0 / 3.0, 1.0 / 3.0, 1.0 / 6.0)
+# Interior of every block in a packed (blocks, x, y, z) view
+BLOCK = (slice(1, -1),) * 3
+
+
+@dataclass
+class Refinement:
+    """Block-structured refinement settings for Simulation.run_amr
+
+    Up to `max_level` levels are added above the base grid, each halving
+    dx and the time step. Blocks are `block_size` cells per edge on every
+    level. A cell is tagged when |∇c| exceeds `concentration_gradient`
+    [kg/m^4] or the Frobenius norm of ∇v exceeds `velocity_gradient` [1/s];
+    tags are grown by `buffer` cells before being covered by finer blocks,
+    and the hierarchy is rebuilt every `regrid_interval` base steps.
+    """
+    max_level: int = 2
+    block_size: int = 8
+    concentration_gradient: Optional[float] = None
+    velocity_gradient: Optional[float] = None
+    buffer: int = 2
+    regrid_interval: int = 4
+
+    def validate(self, grid: Grid):
+        if self.concentration_gradient is None and self.velocity_gradient is None:
+            raise ValueError("Set concentration_gradient or velocity_gradient to refine on")
+        if self.block_size < 2 or self.block_size % 2:
+            raise ValueError("block_size must be an even number of cells")
+        if any(n % self.block_size for n in grid.shape):
+            raise ValueError(f"grid_shape {tuple(grid.shape)} is not divisible "
+                             f"into blocks of {self.block_size}")
+        if not 0 <= 2 * self.buffer <= self.block_size:
+            raise ValueError("buffer must be between 0 and block_size / 2")
+        if self.max_level < 0 or self.regrid_interval < 1:
+            raise ValueError("max_level must be >= 0 and regrid_interval >= 1")
+
+
+def _views(state: State) -> List[np.ndarray]:
+    """(blocks, x, y, z) views of a packed state, in WALL_SIGNS order"""
+    return [state.velocity[:, c] for c in range(3)] + [getattr(state, n) for n in State.SCALARS]
+
+
+def _plane(axis: int, position: int) -> Tuple:
+    """One padded-coordinate block plane normal to `axis`, interior in the other two"""
+    index = list(BLOCK)
+    index[axis] = position
+    return tuple(index)
+
+
+def _minmod(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.where(a * b > 0.0, np.sign(a) * np.minimum(np.abs(a), np.abs(b)), 0.0)
+
+
+def _face_flux(v_in: np.ndarray, c_in: np.ndarray, v_out: np.ndarray, c_out: np.ndarray,
+               side: int, diffusivity: float, dx: float) -> np.ndarray:
+    """Outward dust flux through a cell face, as seen by the centred stencils
+
+    flux_divergence telescopes into face fluxes (vc_in + vc_out) / 2 and the
+    Laplacian into D (c_out - c_in) / dx, so these are exactly the fluxes
+    the explicit update used.
+    """
+    return side * 0.5 * (v_in * c_in + v_out * c_out) - diffusivity * (c_out - c_in) / dx
+
+
+def _prolong(region: np.ndarray) -> np.ndarray:
+    """Limited linear children of the interior of a (blocks, h+2, h+2, h+2) region
+
+    Each coarse cell's eight children get its value plus minmod-limited
+    slopes at ±1/4 cell; the offsets cancel, so the children average back
+    to the parent exactly.
+    """
+    centre = region[(slice(None),) + BLOCK]
+    fine = centre
+    for axis in range(1, 4):
+        fine = np.repeat(fine, RATIO, axis=axis)
+    h = centre.shape[1]
+    for axis in range(3):
+        upper = region[(slice(None),) + _plane(axis, slice(2, None))]
+        lower = region[(slice(None),) + _plane(axis, slice(None, -2))]
+        slope = _minmod(upper - centre, centre - lower)
+        for repeat_axis in range(1, 4):
+            slope = np.repeat(slope, RATIO, axis=repeat_axis)
+        shape = [1, 1, 1, 1]
+        shape[axis + 1] = 2 * h
+        fine = fine + slope * np.tile([-0.25, 0.25], h).reshape(shape)
+    return fine
+
+
+def _restrict(fine: np.ndarray) -> np.ndarray:
+    """Average of the eight children of every coarse cell, (blocks, 2h, 2h, 2h) -> h"""
+    n, size = fine.shape[0], fine.shape[1] // RATIO
+    return fine.reshape(n, size, RATIO, size, RATIO, size, RATIO).mean(axis=(2, 4, 6))
+
+
+class _Face:
+    """Ghost-fill and flux-register plan for one block face direction of a level
+
+    Blocks whose neighbour exists on the same level copy its edge plane,
+    blocks on a walled domain edge mirror their own, and the rest
+    interpolate from the coarser level, where the face is a coarse-fine
+    interface with flux registers.
+    """
+
+    def __init__(self, axis: int, side: int, block_size: int):
+        self.axis = axis
+        self.side = side
+        self.ghost = _plane(axis, 0 if side < 0 else block_size + 1)
+        self.edge = _plane(axis, 1 if side < 0 else block_size)
+        self.source = _plane(axis, block_size if side < 0 else 1)  # in the neighbour
+        self.copy_dst = self.copy_src = self.wall = self.coarse = np.zeros(0, dtype=np.int64)
+        # coarse-fine interpolation: parent slot and flat in-block index of
+        # every ghost cell, the in-block strides and the children's offsets
+        self.parent_slot = self.parent_cell = np.zeros(0, dtype=np.int64)
+        self.strides: Tuple[int, ...] = ()
+        self.offsets: List[np.ndarray] = []
+        # refluxing: covered coarse cell, its uncovered neighbour across the
+        # interface (through the covered cell's ghost layer and at home)
+        self.inner: Tuple[np.ndarray, ...] = ()
+        self.outer: Tuple[np.ndarray, ...] = ()
+        self.target: Tuple[np.ndarray, ...] = ()
+        self.fine_flux = self.coarse_flux = np.zeros(0)
+
+
+class Level:
+    """One refinement level, its blocks packed along a leading axis of a State
+
+    `blocks` holds the lattice index of every block; `slots` maps the
+    lattice back to positions in the packed arrays (-1 where the level has
+    no block). Packed fields broadcast through DustEquations like ensemble
+    members, so a whole level is advanced by one RK4Integrator.
+    """
+
+    def __init__(self, index: int, grid: Grid, block_size: int, blocks: np.ndarray,
+                 config, dtype=np.float64):
+        self.index = index
+        self.grid = grid
+        self.block_size = block_size
+        self.blocks = np.asarray(blocks, dtype=np.int64).reshape(-1, 3)
+        self.lattice = tuple(n // block_size for n in grid.shape)
+        self.slots = np.full(self.lattice, -1, dtype=np.int64)
+        self.slots[tuple(self.blocks.T)] = np.arange(len(self.blocks))
+        self.config = config
+        padded = (len(self.blocks),) + (block_size + 2,) * 3
+        self.state = State.zeros(padded, dtype)
+        self.old = State.zeros(padded, dtype)  # start of the current step, for finer ghosts
+        self.stepping = False
+        self.faces: List[_Face] = []
+        self.parents: List[Tuple[Tuple[int, ...], np.ndarray, np.ndarray]] = []
+        self.integrator: Optional[RK4Integrator] = None
+        self.steps = 0
+        self.dt = 0.0
+        self.stage = self.calls = 0
+        self.theta0, self.span = 0.0, 1.0  # current step inside the coarser level's step
+
+    @property
+    def n_blocks(self) -> int:
+        return len(self.blocks)
+
+    @property
+    def n_cells(self) -> int:
+        return self.n_blocks * self.block_size ** 3
+
+    def centres(self) -> List[np.ndarray]:
+        """Cell-centre coordinates, each shaped (blocks, B, B, B)"""
+        size = self.block_size
+        coordinates = []
+        for axis in range(3):
+            shape = [1, 1, 1, 1]
+            shape[axis + 1] = size
+            cells = (self.blocks[:, axis, None, None, None] * size
+                     + np.arange(size).reshape(shape))
+            coordinates.append(np.broadcast_to((cells + 0.5) * self.grid.dx,
+                                               (self.n_blocks,) + (size,) * 3))
+        return coordinates
+
+
+class AMRHierarchy:
+    """Berger-Oliger block-structured refinement on top of DustEquations
+
+    Level 0 covers the base grid; each finer level covers the tagged
+    regions of the one below with blocks at half the spacing and is
+    subcycled with two half steps per coarser step. Finer ghost cells are
+    interpolated conservatively (limited linear in space, linear in time)
+    from the coarser level; after the substeps the coarse cells under
+    finer blocks are replaced by the average of their children, and the
+    uncovered coarse cells along each interface are corrected by the
+    difference between the fine and coarse dust fluxes through it
+    (refluxing), so the dust mass is conserved to round-off. Momentum,
+    temperature and humidity are in advective form and are not refluxed.
+    """
+
+    def __init__(self, config, refinement: Refinement, grid: Optional[Grid] = None,
+                 backend: str = 'numpy', dtype=np.float64):
+        self.config = config
+        self.grid = grid if grid is not None else Grid.from_config(config)
+        refinement.validate(self.grid)
+        self.refinement = refinement
+        self.backend = backend
+        self.dtype = dtype
+        self.periodic = self.grid.boundary == 'periodic'
+        self.levels: List[Level] = []
+        self.equations: Dict[int, DustEquations] = {}
+        self.regrids = 0
+
+    # ----------------------------------------------------------- construction
+
+    def initialize(self, initial_conditions: Dict[str, Any]):
+        """Fill level 0, then refine level by level
+
+        Values may be scalars, base-grid arrays, or callables f(x, y, z) of
+        the cell-centre coordinates, which are sampled afresh on every new
+        level so fronts start at the finest resolution.
+        """
+        size = self.refinement.block_size
+        lattice = tuple(n // size for n in self.grid.shape)
+        level = self._make_level(0, np.argwhere(np.ones(lattice, dtype=bool)))
+        axes = [(np.arange(n) + 0.5) * self.grid.dx for n in self.grid.shape]
+        coordinates = np.meshgrid(*axes, indexing='ij')
+        dense = State.from_initial_conditions(
+            {name: value(*coordinates) if callable(value) else value
+             for name, value in initial_conditions.items()}, self.grid, self.dtype)
+        for slot, block in enumerate(level.blocks):
+            region = tuple(slice(k * size, (k + 1) * size) for k in block)
+            for name, array in level.state.items():
+                array[(slot, Ellipsis) + BLOCK] = getattr(dense, name)[INTERIOR][
+                    (Ellipsis,) + region]
+        self._plan(level, None)
+        self.levels = [level]
+        self.regrid(initial_conditions)
+
+    def _make_level(self, index: int, blocks: np.ndarray) -> Level:
+        dx = self.grid.dx / RATIO ** index
+        grid = Grid(tuple(n * RATIO ** index for n in self.grid.shape), dx, self.grid.boundary)
+        config = self.config.with_overrides({'dx': dx, 'grid_shape': grid.shape})
+        level = Level(index, grid, self.refinement.block_size, blocks, config, self.dtype)
+        if index not in self.equations:
+            self.equations[index] = DustEquations(self.backend)
+        return level
+
+    def regrid(self, initial_conditions: Optional[Dict[str, Any]] = None):
+        """Rebuild every level above the base from the current gradients
+
+        Levels are rebuilt coarse to fine. Blocks kept from the previous
+        hierarchy keep their data, new ones are prolonged from the coarser
+        level, and dropped ones have already been restricted into it.
+        """
+        with PROFILER.phase('regrid'):
+            for index in range(self.refinement.max_level):
+                coarse = self.levels[index]
+                self._fill(index, coarse.state)
+                mask = self._tag(coarse)
+                if not mask.any():
+                    del self.levels[index + 1:]
+                    break
+                level = self._make_level(index + 1, np.argwhere(mask))
+                self._plan(level, coarse)
+                fresh = np.arange(level.n_blocks)
+                if index + 1 < len(self.levels):
+                    previous = self.levels[index + 1]
+                    level.steps = previous.steps
+                    source = previous.slots[tuple(level.blocks.T)]
+                    kept = source >= 0
+                    for (_, array), (_, old) in zip(level.state.items(), previous.state.items()):
+                        array[kept] = old[source[kept]]
+                    fresh = fresh[~kept]
+                self._prolong(level, coarse, fresh)
+                if initial_conditions is not None:
+                    self._sample_initial(level, initial_conditions)
+                self.levels[index + 1:index + 2] = [level]
+            if initial_conditions is not None:
+                for index in range(len(self.levels) - 1, 0, -1):
+                    self._restrict(self.levels[index], self.levels[index - 1])
+            for index, level in enumerate(self.levels):
+                level.integrator = self._make_integrator(index)
+                self._fill(index, level.state)
+            self.regrids += 1
+
+    def _tag(self, level: Level) -> np.ndarray:
+        """Lattice mask of the next level's blocks covering the tagged cells"""
+        refinement = self.refinement
+        size, dx = level.block_size, level.grid.dx
+        shape = (level.n_blocks,) + (size,) * 3
+        gradient = np.empty((level.n_blocks, 3) + (size,) * 3, dtype=self.dtype)
+        tmp = np.empty(shape, dtype=self.dtype)
+        tags = np.zeros(shape, dtype=bool)
+        if refinement.concentration_gradient is not None:
+            stencils.gradient(level.state.concentration, dx, gradient, tmp)
+            tags |= np.sum(gradient * gradient, axis=1) > refinement.concentration_gradient ** 2
+        if refinement.velocity_gradient is not None:
+            total = np.zeros(shape, dtype=self.dtype)
+            for component in range(3):
+                stencils.gradient(level.state.velocity[:, component], dx, gradient, tmp)
+                total += np.sum(gradient * gradient, axis=1)
+            tags |= total > refinement.velocity_gradient ** 2
+
+        slot, *local = np.nonzero(tags)
+        cells = level.blocks[slot] * size + np.stack(local, axis=1)
+        extent = np.array(level.grid.shape)
+        mask = np.zeros(tuple(RATIO * n for n in level.lattice), dtype=bool)
+        buffer = refinement.buffer
+        # corners and centre of the buffer box reach every block it touches,
+        # since a block spans at least 2 * buffer coarse cells
+        for offset in product((-buffer, 0, buffer), repeat=3):
+            shifted = cells + np.array(offset)
+            shifted = shifted % extent if self.periodic else np.clip(shifted, 0, extent - 1)
+            mask[tuple((RATIO * shifted // size).T)] = True
+        return mask & self._nested(level)
+
+    def _nested(self, level: Level) -> np.ndarray:
+        """Next-level lattice positions whose parent block and its face neighbours exist
+
+        This proper nesting keeps the parents of every finer ghost cell and
+        of every interface cell on `level`.
+        """
+        present = level.slots >= 0
+        nested = present.copy()
+        for axis, shift in product(range(3), (-1, 1)):
+            neighbour = np.roll(present, shift, axis=axis)
+            if not self.periodic:
+                wrapped = [slice(None)] * 3
+                wrapped[axis] = 0 if shift > 0 else -1
+                neighbour[tuple(wrapped)] = True
+            nested &= neighbour
+        for axis in range(3):
+            nested = np.repeat(nested, RATIO, axis=axis)
+        return nested
+
+    def _plan(self, level: Level, coarse: Optional[Level]):
+        """Precompute ghost-fill sources, interface indices and parent groups"""
+        size, h = level.block_size, level.block_size // RATIO
+        level.faces = []
+        for axis, side in product(range(3), (-1, 1)):
+            face = _Face(axis, side, size)
+            neighbour = level.blocks.copy()
+            neighbour[:, axis] += side
+            outside = (neighbour[:, axis] < 0) | (neighbour[:, axis] >= level.lattice[axis])
+            if self.periodic:
+                neighbour[:, axis] %= level.lattice[axis]
+                outside[:] = False
+            source = np.full(level.n_blocks, -1, dtype=np.int64)
+            source[~outside] = level.slots[tuple(neighbour[~outside].T)]
+            face.copy_dst = np.nonzero(source >= 0)[0]
+            face.copy_src = source[face.copy_dst]
+            face.wall = np.nonzero(outside)[0]
+            face.coarse = np.nonzero((source < 0) & ~outside)[0]
+            if face.coarse.size:
+                self._plan_interface(face, level, coarse)
+            level.faces.append(face)
+
+        level.parents = []
+        if coarse is not None:
+            for parity in product((0, 1), repeat=3):
+                selected = np.nonzero(np.all(level.blocks % RATIO == parity, axis=1))[0]
+                if selected.size:
+                    slots = coarse.slots[tuple((level.blocks[selected] // RATIO).T)]
+                    level.parents.append((tuple(p * h for p in parity), selected, slots))
+
+    def _plan_interface(self, face: _Face, level: Level, coarse: Level):
+        size, h = level.block_size, level.block_size // RATIO
+        blocks = level.blocks[face.coarse]
+        m, axis, side = len(blocks), face.axis, face.side
+        transverse = [b for b in range(3) if b != axis]
+
+        def cells(count: int, normal: np.ndarray, scale: int) -> List[np.ndarray]:
+            """(m, count, count) global indices: `normal` along axis, a run across it"""
+            index = [None] * 3
+            index[axis] = np.broadcast_to(normal[:, None, None], (m, count, count))
+            for position, b in enumerate(transverse):
+                shape = [1, 1, 1]
+                shape[position + 1] = count
+                run = blocks[:, b, None, None] * size // scale + np.arange(count).reshape(shape)
+                index[b] = np.broadcast_to(run, (m, count, count))
+            return index
+
+        def home(index: List[np.ndarray]) -> Tuple[np.ndarray, ...]:
+            slot = coarse.slots[tuple(i // size for i in index)]
+            return (slot,) + tuple(i % size + 1 for i in index)
+
+        # ghost-cell parents with the children's offsets inside them
+        ghost = blocks[:, axis] * size + (-1 if side < 0 else size)
+        ghost = ghost % level.grid.shape[axis]
+        fine = cells(size, ghost, 1)
+        padded = size + 2
+        slot, i, j, k = home([i // RATIO for i in fine])
+        face.parent_slot = slot
+        face.parent_cell = (i * padded + j) * padded + k
+        face.strides = (padded * padded, padded, 1)
+        face.offsets = [(i % RATIO - 0.5) * 0.5 for i in fine]
+
+        # covered coarse cells along the interface and the cells across it
+        edge = (blocks[:, axis] * size + (0 if side < 0 else size - 1)) // RATIO
+        inner = cells(h, edge, RATIO)
+        face.inner = home(inner)
+        outer = list(face.inner)
+        outer[axis + 1] = outer[axis + 1] + side
+        face.outer = tuple(outer)
+        across = list(inner)
+        across[axis] = (inner[axis] + side) % coarse.grid.shape[axis]
+        face.target = home(across)
+        face.fine_flux = np.zeros((m, h, h), dtype=self.dtype)
+        face.coarse_flux = np.zeros((m, h, h), dtype=self.dtype)
+
+    def _make_integrator(self, index: int) -> RK4Integrator:
+        level = self.levels[index]
+        equations = self.equations[index]
+
+        def rhs(state: State, out: State) -> State:
+            weight = RK4_WEIGHTS[level.stage] * level.dt
+            level.stage += 1
+            equations.rhs(state, level.config, out)
+            if index > 0:
+                self._register(level, state, weight, fine=True)
+            if index + 1 < len(self.levels):
+                self._register(self.levels[index + 1], state, weight, fine=False)
+            return out
+
+        def boundary(state: State):
+            fraction = RK4_GHOST_TIMES[level.calls]
+            level.calls += 1
+            self._fill(index, state, level.theta0 + level.span * fraction)
+
+        return RK4Integrator(rhs, boundary, level.state)
+
+    # ----------------------------------------------------------- transfer
+
+    def _prolong(self, level: Level, coarse: Level, selected: np.ndarray):
+        """Conservatively fill the `selected` blocks of `level` from `coarse`"""
+        if not selected.size:
+            return
+        h = level.block_size // RATIO
+        for origin, group, slots in level.parents:
+            chosen = np.isin(group, selected)
+            if not chosen.any():
+                continue
+            region = tuple(slice(o, o + h + 2) for o in origin)
+            for fine, parent in zip(_views(level.state), _views(coarse.state)):
+                fine[(group[chosen],) + BLOCK] = _prolong(parent[(slots[chosen],) + region])
+
+    def _restrict(self, level: Level, coarse: Level):
+        """Replace the coarse cells under `level` by the average of their children"""
+        with PROFILER.phase('restriction'):
+            h = level.block_size // RATIO
+            for fine, parent in zip(_views(level.state), _views(coarse.state)):
+                averaged = _restrict(fine[(slice(None),) + BLOCK])
+                for origin, group, slots in level.parents:
+                    region = tuple(slice(o + 1, o + 1 + h) for o in origin)
+                    parent[(slots,) + region] = averaged[group]
+
+    def _sample_initial(self, level: Level, initial_conditions: Dict[str, Any]):
+        """Overwrite the fields given as callables with their values on `level`"""
+        coordinates = level.centres()
+        for name, value in initial_conditions.items():
+            if not callable(value):
+                continue
+            sampled = np.asarray(value(*coordinates), dtype=self.dtype)
+            if name == 'velocity':
+                sampled = np.moveaxis(sampled, 0, 1)
+            getattr(level.state, name)[(Ellipsis,) + BLOCK] = sampled
+
+    # ----------------------------------------------------------- ghosts and fluxes
+
+    def _fill(self, index: int, state: State, theta: float = 1.0):
+        """Refresh the ghost faces of a level's packed `state`
+
+        Coarse-fine ghosts are taken at fraction `theta` of the coarser
+        level's current step (from its latest state when it is not stepping).
+        """
+        level = self.levels[index]
+        views = _views(state)
+        for face in level.faces:
+            for view, sign in zip(views, WALL_SIGNS):
+                if face.copy_dst.size:
+                    view[(face.copy_dst,) + face.ghost] = view[(face.copy_src,) + face.source]
+                if face.wall.size:
+                    view[(face.wall,) + face.ghost] = sign * view[(face.wall,) + face.edge]
+        if index == 0 or not any(face.coarse.size for face in level.faces):
+            return
+        coarse = self.levels[index - 1]
+        cells = (coarse.block_size + 2) ** 3
+        new = coarse.state
+        old = coarse.old if coarse.stepping else None
+        # flat (array, block stride, component offset) per field, in view order
+        sources = [('velocity', 3 * cells, c * cells) for c in range(3)]
+        sources += [(name, cells, 0) for name in State.SCALARS]
+        with PROFILER.phase('coarse_fine_ghosts'):
+            for face in level.faces:
+                if not face.coarse.size:
+                    continue
+                for view, (name, stride, offset) in zip(views, sources):
+                    flat_old = getattr(old, name).reshape(-1) if old is not None else None
+                    view[(face.coarse,) + face.ghost] = self._interpolate(
+                        face, flat_old, getattr(new, name).reshape(-1),
+                        face.parent_slot * stride + offset + face.parent_cell, theta)
+
+    @staticmethod
+    def _interpolate(face: _Face, old: Optional[np.ndarray], new: np.ndarray,
+                     index: np.ndarray, theta: float) -> np.ndarray:
+        """Limited linear value at every ghost cell of `face`, blended in time"""
+        def at(shift: int) -> np.ndarray:
+            if old is None:
+                return new.take(index + shift)
+            return (1.0 - theta) * old.take(index + shift) + theta * new.take(index + shift)
+
+        centre = at(0)
+        value = centre.copy()
+        for stride, offset in zip(face.strides, face.offsets):
+            value += _minmod(at(stride) - centre, centre - at(-stride)) * offset
+        return value
+
+    def _register(self, level: Level, state: State, weight: float, fine: bool):
+        """Accumulate time-integrated dust fluxes through `level`'s coarse-fine faces
+
+        With `fine` the fluxes come from `level`'s own stage `state`;
+        otherwise `state` is a stage of the coarser level and the coarse
+        fluxes through the same faces are accumulated.
+        """
+        with PROFILER.phase('flux_registers'):
+            diffusivity = level.config.D
+            dx = level.grid.dx if fine else level.grid.dx * RATIO
+            for face in level.faces:
+                if not face.coarse.size:
+                    continue
+                velocity = state.velocity[:, face.axis]
+                if fine:
+                    inner, outer = (face.coarse,) + face.edge, (face.coarse,) + face.ghost
+                else:
+                    inner, outer = face.inner, face.outer
+                flux = _face_flux(velocity[inner], state.concentration[inner],
+                                  velocity[outer], state.concentration[outer],
+                                  face.side, diffusivity, dx)
+                flux *= weight * dx * dx
+                if fine:
+                    m, size = flux.shape[0], flux.shape[1] // RATIO
+                    face.fine_flux += flux.reshape(m, size, RATIO, size, RATIO).sum(axis=(2, 4))
+                else:
+                    face.coarse_flux += flux
+
+    def _reflux(self, level: Level, coarse: Level):
+        """Give the uncovered coarse cells along each interface the fine flux instead"""
+        with PROFILER.phase('reflux'):
+            volume = coarse.grid.dx ** 3
+            for face in level.faces:
+                if face.coarse.size:
+                    np.add.at(coarse.state.concentration, face.target,
+                              (face.fine_flux - face.coarse_flux) / volume)
+
+    # ----------------------------------------------------------- stepping
+
+    def advance(self, dt: float):
+        """Advance the whole hierarchy by one base-level step `dt`"""
+        self._advance(0, dt, 0.0, 1.0)
+
+    def _advance(self, index: int, dt: float, theta0: float, span: float):
+        level = self.levels[index]
+        level.theta0, level.span = theta0, span
+        self._fill(index, level.state, theta0)
+        finer = self.levels[index + 1] if index + 1 < len(self.levels) else None
+        if finer is not None:
+            for (_, old), (_, array) in zip(level.old.items(), level.state.items()):
+                np.copyto(old, array)
+            for face in finer.faces:
+                face.fine_flux.fill(0.0)
+                face.coarse_flux.fill(0.0)
+        level.dt, level.stage, level.calls = dt, 0, 0
+        level.integrator.step(level.state, dt)
+        level.steps += 1
+        if finer is not None:
+            level.stepping = True
+            for substep in range(RATIO):
+                self._advance(index + 1, dt / RATIO, substep / RATIO, 1.0 / RATIO)
+            level.stepping = False
+            self._reflux(finer, level)
+            self._restrict(finer, level)
+
+    def stable_time_step(self, cfl: float = 0.5, diffusion_number: float = 0.2) -> float:
+        """Largest base step for which every subcycled level is stable"""
+        return min(stable_time_step(level.state, level.config, cfl, diffusion_number)
+                   * RATIO ** index for index, level in enumerate(self.levels))
+
+    # ----------------------------------------------------------- output
+
+    def sample(self, name: str, level: Optional[int] = None) -> np.ndarray:
+        """Interior field on the uniform grid of `level` (default the finest)
+
+        Every cell takes the finest data covering it, coarser data being
+        repeated piecewise-constantly.
+        """
+        top = len(self.levels) - 1 if level is None else level
+        extent = tuple(n * RATIO ** top for n in self.grid.shape)
+        dense = None
+        for index, current in enumerate(self.levels[:top + 1]):
+            values = getattr(current.state, name)[INTERIOR]
+            factor = RATIO ** (top - index)
+            for axis in (-3, -2, -1):
+                values = np.repeat(values, factor, axis=axis)
+            if dense is None:
+                dense = np.empty(values.shape[1:-3] + extent, dtype=values.dtype)
+            size = current.block_size * factor
+            for slot, block in enumerate(current.blocks):
+                region = tuple(slice(k * size, (k + 1) * size) for k in block)
+                dense[(Ellipsis,) + region] = values[slot]
+        return dense
+
+    def composite(self, out: State) -> State:
+        """Write the synchronized base level into a padded base-grid State"""
+        for name, array in out.items():
+            array[INTERIOR] = self.sample(name, 0)
+        out.apply_boundary(self.grid.boundary)
+        return out
+
+    def mass(self) -> float:
+        """Total dust mass; the base level holds the restricted finer data"""
+        return float(np.sum(self.levels[0].state.concentration[INTERIOR])) * self.grid.dx ** 3
+
+    @property
+    def n_cells(self) -> int:
+        return sum(level.n_cells for level in self.levels)
+
+    def summary(self) -> Dict[str, Any]:
+        """Blocks, cells and steps per level, and the saving over a uniform grid
+
+        The uniform reference resolves the whole domain at the finest level
+        present, i.e. the same front resolution.
+        """
+        uniform = self.grid.n_cells * (RATIO ** 3) ** (len(self.levels) - 1)
+        return {'levels': [{'level': level.index, 'dx': level.grid.dx,
+                            'blocks': level.n_blocks, 'cells': level.n_cells,
+                            'steps': level.steps} for level in self.levels],
+                'cells': self.n_cells,
+                'uniform_cells': uniform,
+                'cell_reduction': uniform / self.n_cells,
+                'regrids': self.regrids}
@@ -0,0 +1,463 @@
+# core/backends.py
+import importlib.util
+import itertools
+import time
+import numpy as np
+from typing import Dict, Any, Iterable, Optional, Tuple
+from . import stencils
+from .stencils import INTERIOR, PLUS, MINUS, Workspace
+from .instrumentation import PROFILER
+
+
+class Backend:
+    """Kernel implementation behind DustEquations
+
+    Every backend reads ghost-padded NumPy state fields and writes into
+    caller-provided interior-shaped NumPy arrays with the same semantics, so
+    they are interchangeable inside the integrators; `verify_backend` checks
+    that against the NumPy reference.
+    """
+
+    name = 'base'
+    requires: Tuple[str, ...] = ()
+
+    @classmethod
+    def available(cls) -> bool:
+        return all(importlib.util.find_spec(module) is not None for module in cls.requires)
+
+    def navier_stokes(self, state, config, out: np.ndarray,
+                      diffusion: bool = True, pressure: bool = True) -> np.ndarray:
+        raise NotImplementedError
+
+    def dust_transport(self, state, config, out: np.ndarray,
+                       diffusion: bool = True) -> np.ndarray:
+        raise NotImplementedError
+
+    def dust_feedback(self, state, config, out: np.ndarray,
+                      accumulate: bool = False) -> np.ndarray:
+        raise NotImplementedError
+
+    def scalar_advection(self, state, field: np.ndarray, config,
+                         out: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class NumpyBackend(Backend):
+    """Reference backend: fused in-place ufunc stencils over scratch buffers"""
+
+    name = 'numpy'
+
+    def __init__(self):
+        self.workspace = Workspace()
+
+    def _scratch(self, name: str, like: np.ndarray) -> np.ndarray:
+        return self.workspace.get(name, like.shape, like.dtype)
+
+    def navier_stokes(self, state, config, out, diffusion=True, pressure=True):
+        tmp_v = self._scratch('tmp_vector', out)
+        tmp_s = self._scratch('tmp_scalar', out[..., 0, :, :, :])
+        if diffusion:
+            with PROFILER.phase('diffusion'):
+                stencils.laplacian(state.velocity, config.dx, out, tmp_v, scale=config.nu)
+        with PROFILER.phase('advection'):
+            stencils.advection(state.velocity, state.velocity, config.dx, out, tmp_v,
+                               scale=-1.0, accumulate=diffusion)
+        if pressure:
+            with PROFILER.phase('pressure_gradient'):
+                stencils.gradient(state.pressure, config.dx, out, tmp_s,
+                                  scale=-1.0 / config.rho, accumulate=True)
+        return out
+
+    def dust_transport(self, state, config, out, diffusion=True):
+        tmp = self._scratch('tmp_scalar', out)
+        flux = self._scratch('flux', state.concentration)
+        if diffusion:
+            with PROFILER.phase('diffusion'):
+                stencils.laplacian(state.concentration, config.dx, out, tmp, scale=config.D)
+        with PROFILER.phase('advection'):
+            stencils.flux_divergence(state.velocity, state.concentration, config.dx,
+                                     out, flux, scale=-1.0, accumulate=diffusion)
+        return out
+
+    def dust_feedback(self, state, config, out, accumulate=False):
+        if not accumulate:
+            out.fill(0.0)
+        tmp = self._scratch('tmp_scalar', out[..., 0, :, :, :])
+        alpha = config.thermal_coefficient
+        beta = config.humidity_coefficient
+        if alpha:
+            stencils.gradient(state.temperature, config.dx, out, tmp,
+                              scale=alpha, accumulate=True)
+        if beta:
+            stencils.gradient(state.humidity, config.dx, out, tmp,
+                              scale=beta, accumulate=True)
+        return out
+
+    def scalar_advection(self, state, field, config, out):
+        tmp = self._scratch('tmp_scalar', out)
+        return stencils.advection(state.velocity, field, config.dx, out, tmp, scale=-1.0)
+
+
+def _blocks(array: np.ndarray, core_ndim: int) -> np.ndarray:
+    """View with all leading (ensemble) axes merged into one"""
+    return array.reshape((-1,) + array.shape[array.ndim - core_ndim:])
+
+
+class _Output:
+    """Contiguous (-1, ...) view of `out`, or a temporary copied back on exit"""
+
+    def __init__(self, out: np.ndarray, core_ndim: int):
+        self.out = out
+        self.direct = out.flags.c_contiguous
+        self.block = _blocks(out if self.direct else np.ascontiguousarray(out), core_ndim)
+
+    def __enter__(self) -> np.ndarray:
+        return self.block
+
+    def __exit__(self, *exc):
+        if not self.direct and exc[0] is None:
+            self.out[...] = self.block.reshape(self.out.shape)
+
+
+_NUMBA_KERNELS: Dict[str, Any] = {}
+
+
+def _numba_kernels() -> Dict[str, Any]:
+    """Compile (once per process) the fused per-cell loops"""
+    if _NUMBA_KERNELS:
+        return _NUMBA_KERNELS
+    from numba import njit, prange
+
+    @njit(parallel=True, cache=True)
+    def navier_stokes(v, p, out, nu, h, inv_rho, diffusion, pressure):
+        members, nx, ny, nz = out.shape[0], out.shape[2], out.shape[3], out.shape[4]
+        half, lap = 0.5 / h, nu / (h * h)
+        for mi in prange(members * nx):
+            m, i = mi // nx, mi % nx + 1
+            for j in range(1, ny + 1):
+                for k in range(1, nz + 1):
+                    u0, u1, u2 = v[m, 0, i, j, k], v[m, 1, i, j, k], v[m, 2, i, j, k]
+                    for c in range(3):
+                        f = v[m, c]
+                        value = -half * (u0 * (f[i + 1, j, k] - f[i - 1, j, k])
+                                         + u1 * (f[i, j + 1, k] - f[i, j - 1, k])
+                                         + u2 * (f[i, j, k + 1] - f[i, j, k - 1]))
+                        if diffusion:
+                            value += lap * (f[i + 1, j, k] + f[i - 1, j, k] + f[i, j + 1, k]
+                                            + f[i, j - 1, k] + f[i, j, k + 1] + f[i, j, k - 1]
+                                            - 6.0 * f[i, j, k])
+                        if pressure:
+                            if c == 0:
+                                dp = p[m, i + 1, j, k] - p[m, i - 1, j, k]
+                            elif c == 1:
+                                dp = p[m, i, j + 1, k] - p[m, i, j - 1, k]
+                            else:
+                                dp = p[m, i, j, k + 1] - p[m, i, j, k - 1]
+                            value -= half * inv_rho * dp
+                        out[m, c, i - 1, j - 1, k - 1] = value
+
+    @njit(parallel=True, cache=True)
+    def dust_transport(v, q, out, diff, h, diffusion):
+        members, nx, ny, nz = out.shape[0], out.shape[1], out.shape[2], out.shape[3]
+        half, lap = 0.5 / h, diff / (h * h)
+        for mi in prange(members * nx):
+            m, i = mi // nx, mi % nx + 1
+            for j in range(1, ny + 1):
+                for k in range(1, nz + 1):
+                    value = -half * (v[m, 0, i + 1, j, k] * q[m, i + 1, j, k]
+                                     - v[m, 0, i - 1, j, k] * q[m, i - 1, j, k]
+                                     + v[m, 1, i, j + 1, k] * q[m, i, j + 1, k]
+                                     - v[m, 1, i, j - 1, k] * q[m, i, j - 1, k]
+                                     + v[m, 2, i, j, k + 1] * q[m, i, j, k + 1]
+                                     - v[m, 2, i, j, k - 1] * q[m, i, j, k - 1])
+                    if diffusion:
+                        value += lap * (q[m, i + 1, j, k] + q[m, i - 1, j, k]
+                                        + q[m, i, j + 1, k] + q[m, i, j - 1, k]
+                                        + q[m, i, j, k + 1] + q[m, i, j, k - 1]
+                                        - 6.0 * q[m, i, j, k])
+                    out[m, i - 1, j - 1, k - 1] = value
+
+    @njit(parallel=True, cache=True)
+    def dust_feedback(t, q, out, alpha, beta, h, accumulate):
+        members, nx, ny, nz = out.shape[0], out.shape[2], out.shape[3], out.shape[4]
+        half = 0.5 / h
+        for mi in prange(members * nx):
+            m, i = mi // nx, mi % nx + 1
+            for j in range(1, ny + 1):
+                for k in range(1, nz + 1):
+                    g0 = (alpha * (t[m, i + 1, j, k] - t[m, i - 1, j, k])
+                          + beta * (q[m, i + 1, j, k] - q[m, i - 1, j, k]))
+                    g1 = (alpha * (t[m, i, j + 1, k] - t[m, i, j - 1, k])
+                          + beta * (q[m, i, j + 1, k] - q[m, i, j - 1, k]))
+                    g2 = (alpha * (t[m, i, j, k + 1] - t[m, i, j, k - 1])
+                          + beta * (q[m, i, j, k + 1] - q[m, i, j, k - 1]))
+                    if accumulate:
+                        out[m, 0, i - 1, j - 1, k - 1] += half * g0
+                        out[m, 1, i - 1, j - 1, k - 1] += half * g1
+                        out[m, 2, i - 1, j - 1, k - 1] += half * g2
+                    else:
+                        out[m, 0, i - 1, j - 1, k - 1] = half * g0
+                        out[m, 1, i - 1, j - 1, k - 1] = half * g1
+                        out[m, 2, i - 1, j - 1, k - 1] = half * g2
+
+    @njit(parallel=True, cache=True)
+    def scalar_advection(v, f, out, h):
+        members, nx, ny, nz = out.shape[0], out.shape[1], out.shape[2], out.shape[3]
+        half = 0.5 / h
+        for mi in prange(members * nx):
+            m, i = mi // nx, mi % nx + 1
+            for j in range(1, ny + 1):
+                for k in range(1, nz + 1):
+                    out[m, i - 1, j - 1, k - 1] = -half * (
+                        v[m, 0, i, j, k] * (f[m, i + 1, j, k] - f[m, i - 1, j, k])
+                        + v[m, 1, i, j, k] * (f[m, i, j + 1, k] - f[m, i, j - 1, k])
+                        + v[m, 2, i, j, k] * (f[m, i, j, k + 1] - f[m, i, j, k - 1]))
+
+    _NUMBA_KERNELS.update(navier_stokes=navier_stokes, dust_transport=dust_transport,
+                          dust_feedback=dust_feedback, scalar_advection=scalar_advection)
+    return _NUMBA_KERNELS
+
+
+class NumbaBackend(Backend):
+    """JIT-compiled fused loops, parallel over x-planes (and ensemble members)
+
+    Each term is a single pass over the grid with no temporaries; the
+    thread count follows numba's NUMBA_NUM_THREADS / set_num_threads.
+    """
+
+    name = 'numba'
+    requires = ('numba',)
+
+    def __init__(self):
+        self.kernels = _numba_kernels()
+
+    def navier_stokes(self, state, config, out, diffusion=True, pressure=True):
+        with _Output(out, 4) as block:
+            self.kernels['navier_stokes'](_blocks(state.velocity, 4), _blocks(state.pressure, 3),
+                                          block, config.nu, config.dx, 1.0 / config.rho,
+                                          diffusion, pressure)
+        return out
+
+    def dust_transport(self, state, config, out, diffusion=True):
+        with _Output(out, 3) as block:
+            self.kernels['dust_transport'](_blocks(state.velocity, 4),
+                                           _blocks(state.concentration, 3),
+                                           block, config.D, config.dx, diffusion)
+        return out
+
+    def dust_feedback(self, state, config, out, accumulate=False):
+        with _Output(out, 4) as block:
+            self.kernels['dust_feedback'](_blocks(state.temperature, 3),
+                                          _blocks(state.humidity, 3), block,
+                                          float(config.thermal_coefficient),
+                                          float(config.humidity_coefficient),
+                                          config.dx, accumulate)
+        return out
+
+    def scalar_advection(self, state, field, config, out):
+        with _Output(out, 3) as block:
+            self.kernels['scalar_advection'](_blocks(state.velocity, 4), _blocks(field, 3),
+                                             block, config.dx)
+        return out
+
+
+class TorchBackend(Backend):
+    """torch CPU tensor kernels on zero-copy views of the NumPy fields
+
+    Runs on torch's intra-op thread pool and keeps the PDE terms in the same
+    tensor space as the feedback network.
+    """
+
+    name = 'torch'
+    requires = ('torch',)
+
+    def __init__(self, threads: Optional[int] = None):
+        import torch
+        self.torch = torch
+        if threads is not None:
+            torch.set_num_threads(threads)
+
+    def _laplacian(self, f, scale, h):
+        torch = self.torch
+        total = f[PLUS[0]] + f[MINUS[0]]
+        for axis in (1, 2):
+            total += f[PLUS[axis]]
+            total += f[MINUS[axis]]
+        return torch.add(total, f[INTERIOR], alpha=-6.0).mul_(scale / (h * h))
+
+    def navier_stokes(self, state, config, out, diffusion=True, pressure=True):
+        torch, h = self.torch, config.dx
+        v, result = torch.from_numpy(state.velocity), torch.from_numpy(out)
+        total = self._laplacian(v, config.nu, h) if diffusion else torch.zeros_like(result)
+        for axis in range(3):
+            u = v[..., axis:axis + 1, 1:-1, 1:-1, 1:-1]
+            total.addcmul_(u, v[PLUS[axis]] - v[MINUS[axis]], value=-0.5 / h)
+        if pressure:
+            p = torch.from_numpy(state.pressure)
+            for axis in range(3):
+                total[..., axis, :, :, :].add_(p[PLUS[axis]] - p[MINUS[axis]],
+                                               alpha=-0.5 / (h * config.rho))
+        result.copy_(total)
+        return out
+
+    def dust_transport(self, state, config, out, diffusion=True):
+        torch, h = self.torch, config.dx
+        v, q = torch.from_numpy(state.velocity), torch.from_numpy(state.concentration)
+        result = torch.from_numpy(out)
+        total = self._laplacian(q, config.D, h) if diffusion else torch.zeros_like(result)
+        for axis in range(3):
+            flux = v[..., axis, :, :, :] * q
+            total.add_(flux[PLUS[axis]] - flux[MINUS[axis]], alpha=-0.5 / h)
+        result.copy_(total)
+        return out
+
+    def dust_feedback(self, state, config, out, accumulate=False):
+        torch, h = self.torch, config.dx
+        result = torch.from_numpy(out)
+        if not accumulate:
+            result.zero_()
+        for name, coefficient in (('temperature', config.thermal_coefficient),
+                                  ('humidity', config.humidity_coefficient)):
+            if coefficient:
+                f = torch.from_numpy(getattr(state, name))
+                for axis in range(3):
+                    result[..., axis, :, :, :].add_(f[PLUS[axis]] - f[MINUS[axis]],
+                                                    alpha=0.5 * coefficient / h)
+        return out
+
+    def scalar_advection(self, state, field, config, out):
+        torch, h = self.torch, config.dx
+        v, f = torch.from_numpy(state.velocity), torch.from_numpy(field)
+        result = torch.from_numpy(out)
+        result.zero_()
+        for axis in range(3):
+            result.addcmul_(v[..., axis, 1:-1, 1:-1, 1:-1], f[PLUS[axis]] - f[MINUS[axis]],
+                            value=-0.5 / h)
+        return out
+
+
+BACKENDS = {backend.name: backend for backend in (NumpyBackend, NumbaBackend, TorchBackend)}
+
+
+def available_backends() -> Tuple[str, ...]:
+    return tuple(name for name, backend in BACKENDS.items() if backend.available())
+
+
+def get_backend(name: str) -> Backend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}")
+    if not BACKENDS[name].available():
+        raise ValueError(f"Backend '{name}' needs {', '.join(BACKENDS[name].requires)}")
+    return BACKENDS[name]()
+
+
+def _random_state(shape: Tuple[int, int, int], members: Optional[int], boundary: str,
+                  seed: int = 0):
+    from .equations import State
+    rng = np.random.default_rng(seed)
+    lead = (members,) if members else ()
+    state = State.zeros(lead + tuple(n + 2 for n in shape))
+    for _, array in state.items():
+        array[...] = rng.standard_normal(array.shape)
+    state.apply_boundary(boundary)
+    return state
+
+
+def _evaluate(backend: Backend, state, config, case: Dict[str, Any]) -> np.ndarray:
+    from .equations import State
+    out = State.zeros(stencils.interior_shape(state.concentration.shape))
+    kernel = case['kernel']
+    if kernel == 'navier_stokes':
+        return backend.navier_stokes(state, config, out.velocity,
+                                     case['diffusion'], case['pressure'])
+    if kernel == 'dust_transport':
+        return backend.dust_transport(state, config, out.concentration, case['diffusion'])
+    if kernel == 'dust_feedback':
+        out.velocity[...] = 1.0
+        return backend.dust_feedback(state, config, out.velocity, case['accumulate'])
+    return backend.scalar_advection(state, state.temperature, config, out.temperature)
+
+
+def correctness_cases() -> Iterable[Dict[str, Any]]:
+    """The kernel x option x layout matrix every backend must reproduce"""
+    layouts = list(itertools.product((None, 2), ('periodic', 'wall')))
+    for members, boundary in layouts:
+        layout = {'members': members, 'boundary': boundary}
+        for diffusion, pressure in itertools.product((True, False), repeat=2):
+            yield dict(layout, kernel='navier_stokes', diffusion=diffusion, pressure=pressure)
+        for diffusion in (True, False):
+            yield dict(layout, kernel='dust_transport', diffusion=diffusion)
+        for accumulate in (True, False):
+            yield dict(layout, kernel='dust_feedback', accumulate=accumulate)
+        yield dict(layout, kernel='scalar_advection')
+
+
+def verify_backend(backend: Backend, config, shape: Tuple[int, int, int] = (6, 5, 4),
+                   rtol: float = 1e-10) -> Dict[str, float]:
+    """Largest relative error against NumpyBackend for every correctness case
+
+    Raises ValueError naming the first case that exceeds `rtol`.
+    """
+    reference = NumpyBackend()
+    config = config.with_overrides({'thermal_coefficient': config.thermal_coefficient or 0.3,
+                                    'humidity_coefficient': config.humidity_coefficient or -0.2})
+    errors = {}
+    for case in correctness_cases():
+        state = _random_state(shape, case['members'], case['boundary'])
+        expected = _evaluate(reference, state, config, case)
+        actual = _evaluate(backend, state, config, case)
+        error = float(np.max(np.abs(actual - expected)) / max(np.max(np.abs(expected)), 1e-300))
+        label = ','.join(f'{k}={v}' for k, v in case.items())
+        errors[label] = error
+        if not error <= rtol:
+            raise ValueError(f"Backend '{backend.name}' disagrees with numpy on {label}: "
+                             f"relative error {error:.3g}")
+    return errors
+
+
+def benchmark_backend(backend: Backend, config, shape: Tuple[int, int, int],
+                      repeats: int = 5) -> float:
+    """Best wall time of one full set of right-hand-side kernels"""
+    from .equations import State
+    state = _random_state(shape, None, config.boundary)
+    out = State.zeros(tuple(shape))
+
+    def evaluate():
+        backend.navier_stokes(state, config, out.velocity)
+        backend.dust_feedback(state, config, out.velocity, accumulate=True)
+        backend.dust_transport(state, config, out.concentration)
+        backend.scalar_advection(state, state.temperature, config, out.temperature)
+        backend.scalar_advection(state, state.humidity, config, out.humidity)
+
+    evaluate()  # warm-up, includes JIT compilation
+    best = np.inf
+    for _ in range(repeats):
+        started = time.perf_counter()
+        evaluate()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def select_backend(config, shape: Optional[Tuple[int, int, int]] = None,
+                   candidates: Optional[Iterable[str]] = None,
+                   repeats: int = 5) -> Tuple[Backend, Dict[str, float]]:
+    """Fastest verified backend on this machine for grids of `shape`
+
+    Backends that are not installed or fail verification are skipped;
+    returns the chosen backend and the timing of every candidate tried.
+    """
+    shape = tuple(shape or config.grid_shape)
+    timings = {}
+    best = None
+    for name in candidates or available_backends():
+        if not BACKENDS[name].available():
+            continue
+        backend = get_backend(name)
+        try:
+            verify_backend(backend, config)
+        except ValueError:
+            continue
+        timings[name] = benchmark_backend(backend, config, shape, repeats)
+        if best is None or timings[name] < timings[best.name]:
+            best = backend
+    return best, timings
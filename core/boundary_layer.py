@@ -0,0 +1,122 @@
+# core/boundary_layer.py
+import numpy as np
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple, Union
+from .equations import State, Grid
+from .physics import PhysicsEngine
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def stability_function(zeta: ArrayLike) -> np.ndarray:
+    """Businger-Dyer momentum correction Ψm(ζ) for ζ = z/L"""
+    zeta = np.asarray(zeta, dtype=float)
+    x = np.sqrt(np.sqrt(1 - 16 * np.minimum(zeta, 0.0)))
+    unstable = (2 * np.log((1 + x) / 2) + np.log((1 + x * x) / 2)
+                - 2 * np.arctan(x) + np.pi / 2)
+    return np.where(zeta < 0, unstable, -5 * zeta)
+
+
+@dataclass(frozen=True)
+class ProfileTable:
+    """Log-law profile factors tabulated over stability bins and heights
+
+    factor[b, k] = ln(z_k/z0) - Ψm(z_k/L_b) + Ψm(z0/L_b), so the wind at
+    height z_k is u(z_k) = (u*/κ) factor[b, k]. Bins are uniform in the
+    inverse Obukhov length 1/L; 0 is neutral, negative is unstable.
+    """
+    kappa: float
+    z: np.ndarray
+    inverse_length: np.ndarray
+    factor: np.ndarray  # (n_bins, nz)
+
+    def weights(self, inverse_length: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower bin index and linear weight for each 1/L, clamped to the table"""
+        bins = self.inverse_length
+        position = (np.asarray(inverse_length, dtype=float) - bins[0]) / (bins[1] - bins[0])
+        position = np.clip(position, 0, len(bins) - 1)
+        index = np.minimum(position.astype(np.intp), len(bins) - 2)
+        return index, position - index
+
+
+@lru_cache(maxsize=32)
+def profile_table(kappa: float, z0: float, z: Tuple[float, ...],
+                  stability_bins: Tuple[float, float, int]) -> ProfileTable:
+    """Cached ProfileTable keyed by (config, z-grid, stability bins)"""
+    heights = np.asarray(z)
+    if heights[0] <= z0:
+        raise ValueError(f"Lowest level z={heights[0]} must lie above the roughness "
+                         f"length z0={z0}")
+    inverse_length = np.linspace(*stability_bins)
+    factor = (np.log(heights / z0)[None, :]
+              - stability_function(heights[None, :] * inverse_length[:, None])
+              + stability_function(z0 * inverse_length[:, None]))
+    for array in (heights, inverse_length, factor):
+        array.setflags(write=False)
+    return ProfileTable(kappa, heights, inverse_length, factor)
+
+
+class BoundaryLayer:
+    """Surface-layer similarity applied to the bottom grid layer
+
+    The friction velocity of every surface column comes from the horizontal
+    wind in the lowest interior cell through the tabulated log-law, in one
+    array pass; it is then compared with the threshold friction velocity
+    for uplift.
+
+    Simulation does not call this module; it is a diagnostic on a State.
+    Call BoundaryLayer(config, sim.grid).uplift(sim.state, d, rho) after a
+    run, or from a hook in Simulation.step_hooks that returns False, since
+    it leaves the state unchanged.
+    """
+
+    def __init__(self, config, grid: Optional[Grid] = None,
+                 stability_bins: Tuple[float, float, int] = (-1.0, 1.0, 201),
+                 physics: Optional[PhysicsEngine] = None):
+        self.config = config
+        self.grid = grid if grid is not None else Grid.from_config(config)
+        self.stability_bins = stability_bins
+        self.physics = physics if physics is not None else PhysicsEngine(config)
+
+    @property
+    def heights(self) -> Tuple[float, ...]:
+        """Cell-centre heights of the interior z levels"""
+        return tuple((np.arange(self.grid.shape[2]) + 0.5) * self.grid.dx)
+
+    def table(self) -> ProfileTable:
+        return profile_table(self.config.kappa, self.config.z0, self.heights,
+                             tuple(self.stability_bins))
+
+    def factor(self, inverse_length: ArrayLike = 0.0, level: int = 0) -> np.ndarray:
+        """Profile factor at z level `level` for each 1/L"""
+        table = self.table()
+        index, weight = table.weights(inverse_length)
+        column = table.factor[:, level]
+        return column[index] * (1 - weight) + column[index + 1] * weight
+
+    def friction_velocity(self, state: State, inverse_length: ArrayLike = 0.0) -> np.ndarray:
+        """u* per surface column (..., nx, ny) from the lowest-layer horizontal wind"""
+        bottom = state.velocity[..., :2, 1:-1, 1:-1, 1]
+        speed = np.hypot(bottom[..., 0, :, :], bottom[..., 1, :, :])
+        return self.config.kappa * speed / self.factor(inverse_length)
+
+    def wind_profile(self, friction_velocity: ArrayLike,
+                     inverse_length: ArrayLike = 0.0) -> np.ndarray:
+        """Log-law wind speed (..., nz) at every interior level for each u*"""
+        table = self.table()
+        index, weight = table.weights(inverse_length)
+        weight = np.asarray(weight)[..., None]
+        factor = table.factor[index] * (1 - weight) + table.factor[index + 1] * weight
+        return np.asarray(friction_velocity)[..., None] / self.config.kappa * factor
+
+    def uplift(self, state: State, particle_diameter: ArrayLike,
+               particle_density: ArrayLike,
+               inverse_length: ArrayLike = 0.0) -> Dict[str, Any]:
+        """Columns where the friction velocity exceeds the uplift threshold"""
+        u_star = self.friction_velocity(state, inverse_length)
+        threshold = np.asarray(self.physics.calculate_threshold_friction_velocity(
+            particle_diameter, particle_density))
+        excess = np.maximum(u_star - threshold, 0.0)
+        return {'friction_velocity': u_star, 'threshold': threshold,
+                'excess': excess, 'uplift': excess > 0}
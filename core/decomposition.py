@@ -0,0 +1,187 @@
+# core/decomposition.py
+import multiprocessing as mp
+import sys
+import threading
+import numpy as np
+from typing import Dict, Any, List, Tuple
+from . import stencils
+from .equations import State, Grid, DustEquations
+from .integrators import RK4Integrator, StepCounter
+from .shared import SharedArrays
+from .stencils import INTERIOR
+
+# One halo plane per field: three velocity components and four scalars
+N_FIELDS = 3 + len(State.SCALARS)
+# Wall ghost sign per plane: no-slip velocity, zero-flux scalars
+WALL_SIGNS = (-1.0,) * 3 + (1.0,) * len(State.SCALARS)
+
+
+def field_views(state: State) -> List[np.ndarray]:
+    """Per-component views of a single (non-ensemble) state, in halo order"""
+    return [state.velocity[c] for c in range(3)] + [getattr(state, n) for n in State.SCALARS]
+
+
+def split_extent(n: int, parts: int) -> List[Tuple[int, int]]:
+    """Contiguous [start, stop) interior ranges splitting n cells into `parts`"""
+    sizes = [n // parts + (1 if i < n % parts else 0) for i in range(parts)]
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+class HaloExchange:
+    """Boundary callback that swaps x ghost planes with the neighbouring subdomains
+
+    Each exchange publishes the subdomain's first and last interior planes
+    into its slot of a shared halo buffer, waits on a barrier, then copies
+    the neighbours' planes into its own ghost layer. Two buffer sets are
+    used alternately so a single barrier per exchange is enough.
+    """
+
+    def __init__(self, rank: int, parts: int, boundary: str,
+                 halos: np.ndarray, barrier):
+        self.rank = rank
+        self.parts = parts
+        self.boundary = boundary
+        self.periodic = boundary == 'periodic'
+        self.halos = halos  # (2 buffer sets, parts, 2 sides, N_FIELDS, ny+2, nz+2)
+        self.barrier = barrier
+        self.exchanges = 0
+
+    def __call__(self, state: State):
+        views = field_views(state)
+        parity = self.exchanges % 2
+        self.exchanges += 1
+        outbox = self.halos[parity, self.rank]
+        for k, view in enumerate(views):
+            np.copyto(outbox[0, k], view[1])
+            np.copyto(outbox[1, k], view[-2])
+        self.barrier.wait()
+
+        first, last = self.rank == 0, self.rank == self.parts - 1
+        left = self.halos[parity, (self.rank - 1) % self.parts, 1]
+        right = self.halos[parity, (self.rank + 1) % self.parts, 0]
+        for k, view in enumerate(views):
+            if self.periodic or not first:
+                np.copyto(view[0], left[k])
+            else:
+                np.multiply(view[1], WALL_SIGNS[k], out=view[0])
+            if self.periodic or not last:
+                np.copyto(view[-1], right[k])
+            else:
+                np.multiply(view[-2], WALL_SIGNS[k], out=view[-1])
+        stencils.fill_ghosts(state.velocity, self.boundary, sign=-1.0, axes=(1, 2))
+        for name in State.SCALARS:
+            stencils.fill_ghosts(getattr(state, name), self.boundary, axes=(1, 2))
+
+
+def _subdomain_worker(rank: int, parts: int, config, extent: Tuple[int, int],
+                      descriptors, halo_barrier, output_barrier,
+                      output_steps: List[int], dt: float, backend: str = 'numpy'):
+    """Owns one x-slab: steps it with RK4 and publishes it at output steps"""
+    arrays, blocks = SharedArrays.attach(descriptors, writeable=True)
+    fields, halos = arrays['fields'], arrays['halos']
+    try:
+        lo, hi = extent
+        ny, nz = fields.shape[-2:]
+        local = State.zeros((hi - lo + 2, ny + 2, nz + 2), dtype=fields.dtype)
+        for k, view in enumerate(field_views(local)):
+            view[INTERIOR] = fields[k, lo:hi]
+        exchange = HaloExchange(rank, parts, config.boundary, halos, halo_barrier)
+        exchange(local)
+        equations = DustEquations(backend)
+        integrator = RK4Integrator(lambda s, out: equations.rhs(s, config, out),
+                                   exchange, local)
+        output_barrier.wait()  # ready: start-up is not counted as stepping time
+        step = 0
+        for target in output_steps:
+            while step < target:
+                integrator.step(local, dt)
+                step += 1
+            for k, view in enumerate(field_views(local)):
+                fields[k, lo:hi] = view[INTERIOR]
+            output_barrier.wait()  # coordinator reads the gathered fields
+            output_barrier.wait()
+    except BaseException:
+        halo_barrier.abort()
+        output_barrier.abort()
+        raise
+    finally:
+        del fields, halos, arrays
+        for block in blocks:
+            block.close()
+
+
+class DomainDecomposition:
+    """Splits a fixed-step RK4 run into x-slabs advanced by worker processes
+
+    Workers own their slab and its private ghost layer; only halo planes
+    and output snapshots travel through shared memory. The diffusion and
+    pressure solvers are global, so decomposed runs use explicit terms only.
+    Every worker evaluates the kernels with the named `backend`.
+    """
+
+    def __init__(self, config, grid: Grid, workers: int, backend: str = 'numpy'):
+        if grid.shape[0] < 2 * workers:
+            raise ValueError(f"Grid of {grid.shape[0]} x-cells is too small for "
+                             f"{workers} subdomains")
+        self.config = config
+        self.grid = grid
+        self.workers = workers
+        self.backend = backend
+        self.extents = split_extent(grid.shape[0], workers)
+
+    def run(self, state: State, duration: float, dt: float, interval: float,
+            recorder, counter: StepCounter) -> Dict[str, Any]:
+        n_steps = int(round(duration / dt))
+        stride = max(1, int(round(interval / dt)))
+        output_steps = [s for s in range(1, n_steps + 1) if s % stride == 0 or s == n_steps]
+        _, ny, nz = self.grid.shape
+        shared = SharedArrays()
+        dtype = state.concentration.dtype
+        fields = shared.allocate('fields', (N_FIELDS,) + tuple(self.grid.shape), dtype)
+        shared.allocate('halos', (2, self.workers, 2, N_FIELDS, ny + 2, nz + 2), dtype)
+        for k, view in enumerate(field_views(state)):
+            fields[k] = view[INTERIOR]
+
+        # the numba and torch thread pools do not survive a fork once used,
+        # whichever backend this run uses (the parent hangs at exit)
+        threaded = self.backend != 'numpy' or any(name in sys.modules
+                                                  for name in ('numba', 'torch'))
+        context = mp.get_context('spawn' if threaded else None)
+        halo_barrier = context.Barrier(self.workers)
+        output_barrier = context.Barrier(self.workers + 1)
+        processes = [
+            context.Process(target=_subdomain_worker,
+                            args=(rank, self.workers, self.config, extent, shared.descriptors,
+                                  halo_barrier, output_barrier, output_steps, dt,
+                                  self.backend),
+                            daemon=True)
+            for rank, extent in enumerate(self.extents)
+        ]
+        counter.stop()
+        for process in processes:
+            process.start()
+        try:
+            output_barrier.wait()
+            counter.start()
+            previous = 0
+            for step in output_steps:
+                output_barrier.wait()
+                for k, view in enumerate(field_views(state)):
+                    view[INTERIOR] = fields[k]
+                state.apply_boundary(self.grid.boundary)
+                recorder.record(step * dt, state)
+                counter.tick(step - previous)
+                previous = step
+                output_barrier.wait()
+        except threading.BrokenBarrierError:
+            raise RuntimeError("A subdomain worker failed; see its traceback above")
+        finally:
+            for process in processes:
+                process.join(timeout=5.0)
+                if process.is_alive():
+                    process.terminate()
+            del fields
+            shared.close()
+        return {'steps': n_steps, 'rejected_steps': 0, 'dt_min': dt, 'dt_max': dt,
+                'workers': self.workers}
@@ -0,0 +1,85 @@
+# core/ensemble.py
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from .equations import State
+from .stencils import INTERIOR
+
+
+def perturb_initial_conditions(initial_conditions: Dict[str, Any], members: int,
+                               grid_shape: Tuple[int, int, int],
+                               amplitudes: Dict[str, float],
+                               seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Gaussian perturbations of one set of initial conditions
+
+    Fields named in `amplitudes` get independent noise with that standard
+    deviation in every cell; concentration and humidity are clipped to stay
+    physical. Other fields are shared unchanged between members.
+    """
+    rng = np.random.default_rng(seed)
+    ensemble = []
+    for _ in range(members):
+        member = dict(initial_conditions)
+        for name, amplitude in amplitudes.items():
+            base = np.asarray(initial_conditions[name], dtype=float)
+            if name == 'velocity':
+                base = base.reshape(3, 1, 1, 1) if base.ndim == 1 else base
+                shape = (3,) + tuple(grid_shape)
+            else:
+                shape = tuple(grid_shape)
+            value = base + amplitude * rng.standard_normal(shape)
+            if name == 'concentration':
+                np.maximum(value, 0.0, out=value)
+            elif name == 'humidity':
+                np.clip(value, 0.0, 1.0, out=value)
+            member[name] = value
+        ensemble.append(member)
+    return ensemble
+
+
+class EnsembleRecorder:
+    """Ensemble mean and spread of selected fields at the output cadence
+
+    Only the statistics are kept, never the members' histories; the total
+    dust content of each member is kept as a scalar time series.
+    """
+
+    def __init__(self, template: State, output_fields: Sequence[str], n_outputs: int):
+        self.fields = tuple(output_fields)
+        self.members = template.members
+        self.times = np.full(n_outputs, np.nan)
+        self.mean = {}
+        self.spread = {}
+        self._scratch = {}
+        for name in self.fields:
+            shape = getattr(template, name)[INTERIOR].shape
+            dtype = getattr(template, name).dtype
+            self.mean[name] = np.empty((n_outputs,) + shape[1:], dtype=dtype)
+            self.spread[name] = np.empty((n_outputs,) + shape[1:], dtype=dtype)
+            self._scratch[name] = np.empty(shape, dtype=dtype)
+        self.member_mass = np.empty((n_outputs, self.members))
+        self.count = 0
+
+    def record(self, t: float, state: State):
+        if self.count >= len(self.times):
+            return
+        i = self.count
+        self.times[i] = t
+        for name in self.fields:
+            values = getattr(state, name)[INTERIOR]
+            mean, spread, tmp = self.mean[name][i], self.spread[name][i], self._scratch[name]
+            np.mean(values, axis=0, out=mean)
+            np.subtract(values, mean, out=tmp)
+            np.multiply(tmp, tmp, out=tmp)
+            np.mean(tmp, axis=0, out=spread)
+            np.sqrt(spread, out=spread)
+        np.sum(state.concentration[INTERIOR], axis=(-3, -2, -1), out=self.member_mass[i])
+        self.count += 1
+
+    def results(self) -> Dict[str, Any]:
+        n = self.count
+        return {
+            'time': self.times[:n],
+            'ensemble_mean': {name: array[:n] for name, array in self.mean.items()},
+            'ensemble_spread': {name: array[:n] for name, array in self.spread.items()},
+            'member_mass': self.member_mass[:n],
+        }
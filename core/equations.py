@@ -1,41 +1,195 @@
 # core/equations.py
 import numpy as np
-from typing import Tuple, Dict
-from dataclasses import dataclass
+from typing import Tuple, Dict, Iterator, ClassVar, Any, Optional, Sequence, Union
+from dataclasses import dataclass, fields
+from . import stencils
+from .stencils import INTERIOR
+from .backends import Backend, get_backend, select_backend
+from .instrumentation import PROFILER
+
+@dataclass
+class Grid:
+    """Uniform Cartesian grid with one ghost layer on every side"""
+    shape: Tuple[int, int, int]  # interior cells
+    dx: float
+    boundary: str = 'periodic'  # 'periodic' or 'wall'
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'Grid':
+        return cls(tuple(config.grid_shape), config.dx, config.boundary)
+
+    @property
+    def padded_shape(self) -> Tuple[int, int, int]:
+        return tuple(n + 2 for n in self.shape)
+
+    @property
+    def n_cells(self) -> int:
+        return int(np.prod(self.shape))
 
 @dataclass
 class State:
-    """State variables for the dust dynamics system"""
-    velocity: np.ndarray  # 3D velocity field
-    pressure: float
-    concentration: float
-    temperature: float
-    humidity: float
+    """Gridded state variables for the dust dynamics system
+
+    Each field is a contiguous array whose last three axes are the grid;
+    velocity carries its three components on the axis just before them.
+    Ensembles add a leading member axis to every field, which all kernels
+    broadcast over.
+    """
+    velocity: np.ndarray  # (..., 3, nx, ny, nz)
+    pressure: np.ndarray  # (..., nx, ny, nz), departure from hydrostatic
+    concentration: np.ndarray
+    temperature: np.ndarray
+    humidity: np.ndarray
+
+    SCALARS: ClassVar[Tuple[str, ...]] = ('pressure', 'concentration',
+                                          'temperature', 'humidity')
+
+    @classmethod
+    def zeros(cls, shape: Tuple[int, ...], dtype=np.float64) -> 'State':
+        """Allocate a zero state over a grid of the given (possibly padded) shape"""
+        shape = tuple(shape)
+        velocity = np.zeros(shape[:-3] + (3,) + shape[-3:], dtype=dtype)
+        return cls(velocity, *(np.zeros(shape, dtype=dtype) for _ in cls.SCALARS))
+
+    @classmethod
+    def from_initial_conditions(cls, initial_conditions: Dict[str, Any],
+                                grid: Grid, dtype=np.float64) -> 'State':
+        """Broadcast scalar or array initial conditions onto a padded grid"""
+        state = cls.zeros(grid.padded_shape, dtype=dtype)
+        state.assign(initial_conditions, grid)
+        state.apply_boundary(grid.boundary)
+        return state
+
+    @classmethod
+    def from_ensemble(cls, members: Sequence[Dict[str, Any]],
+                      grid: Grid, dtype=np.float64) -> 'State':
+        """Stack one set of initial conditions per member along a leading axis"""
+        state = cls.zeros((len(members),) + grid.padded_shape, dtype=dtype)
+        for index, initial_conditions in enumerate(members):
+            state.member(index).assign(initial_conditions, grid)
+        state.apply_boundary(grid.boundary)
+        return state
+
+    def assign(self, initial_conditions: Dict[str, Any], grid: Grid):
+        """Write scalar or interior-shaped initial values into the fields"""
+        missing = [name for name, _ in self.items() if name not in initial_conditions]
+        if missing:
+            raise ValueError(f"Initial conditions missing field(s): {', '.join(missing)}")
+        for name, array in self.items():
+            value = np.asarray(initial_conditions[name], dtype=array.dtype)
+            if name == 'velocity' and value.ndim == 1:
+                value = value.reshape(3, 1, 1, 1)
+            if value.shape[-3:] == tuple(grid.shape):
+                array[INTERIOR] = value
+            else:
+                array[...] = value
+
+    @property
+    def members(self) -> int:
+        """Size of the leading ensemble axis, 0 for a single state"""
+        return self.concentration.shape[0] if self.concentration.ndim > 3 else 0
+
+    def member(self, index: int) -> 'State':
+        """View of one ensemble member"""
+        return State(*(array[index] for _, array in self.items()))
+
+    def items(self) -> Iterator[Tuple[str, np.ndarray]]:
+        for f in fields(self):
+            yield f.name, getattr(self, f.name)
+
+    def copy(self) -> 'State':
+        return State(*(array.copy() for _, array in self.items()))
+
+    def interior(self) -> 'State':
+        """View of the state without its ghost layer"""
+        return State(*(array[INTERIOR] for _, array in self.items()))
+
+    def apply_boundary(self, boundary: str = 'periodic'):
+        """Refresh ghost cells; walls are no-slip for velocity, zero-flux otherwise"""
+        stencils.fill_ghosts(self.velocity, boundary, sign=-1.0)
+        for name in self.SCALARS:
+            stencils.fill_ghosts(getattr(self, name), boundary)
 
 class DustEquations:
-    """Core equations for dust dynamics"""
-    
-    @staticmethod
-    def navier_stokes(state: State, config: Dict) -> np.ndarray:
-        """Calculate Navier-Stokes terms"""
-        return (-1/config.rho * np.gradient(state.pressure) +
-                config.nu * np.gradient(np.gradient(state.velocity)) +
-                config.g)
-    
-    @staticmethod
-    def dust_transport(state: State, config: Dict) -> float:
-        """Calculate dust transport equation terms"""
-        return (config.D * np.gradient(np.gradient(state.concentration)) -
-                np.dot(state.velocity, np.gradient(state.concentration)))
-    
-    @staticmethod
-    def dust_feedback(state: State, config: Dict) -> np.ndarray:
-        """Calculate dust feedback force"""
-        kappa = config.coupling_coefficient
-        v_dust = state.velocity  # Simplified
-        alpha = config.thermal_coefficient
-        beta = config.humidity_coefficient
-        
-        return (kappa * (v_dust - state.velocity) +
-                alpha * np.gradient(state.temperature) +
-                beta * np.gradient(state.humidity))
+    """Core equations for dust dynamics
+
+    Every term works on ghost-padded `State` fields and writes into a
+    caller-provided interior-shaped `out` array. The kernels come from a
+    pluggable backend ('numpy', 'numba', 'torch' or a Backend instance);
+    'auto' micro-benchmarks the installed backends on the first call and
+    keeps the fastest.
+    """
+
+    def __init__(self, backend: Union[str, Backend] = 'numpy'):
+        self.backend: Optional[Backend] = None
+        self.timings: Dict[str, float] = {}
+        if isinstance(backend, Backend):
+            self.backend = backend
+        elif backend != 'auto':
+            self.backend = get_backend(backend)
+
+    def _kernels(self, state: 'State', config: Dict) -> Backend:
+        if self.backend is None:
+            shape = stencils.interior_shape(state.concentration.shape)[-3:]
+            self.backend, self.timings = select_backend(config, shape)
+        return self.backend
+
+    def navier_stokes(self, state: State, config: Dict, out: np.ndarray = None,
+                      diffusion: bool = True, pressure: bool = True) -> np.ndarray:
+        """Calculate Navier-Stokes terms
+
+        Pressure is the departure from hydrostatic balance, so gravity is
+        balanced by the background state and does not appear explicitly.
+        With `diffusion=False` the viscous term is left to an implicit solver,
+        and with `pressure=False` the pressure gradient to a projection step.
+        """
+        if out is None:
+            out = np.empty(stencils.interior_shape(state.velocity.shape),
+                           dtype=state.velocity.dtype)
+        return self._kernels(state, config).navier_stokes(state, config, out,
+                                                          diffusion, pressure)
+
+    def dust_transport(self, state: State, config: Dict,
+                       out: np.ndarray = None, diffusion: bool = True) -> np.ndarray:
+        """Calculate dust transport equation terms in conservative form"""
+        if out is None:
+            out = np.empty(stencils.interior_shape(state.concentration.shape),
+                           dtype=state.concentration.dtype)
+        return self._kernels(state, config).dust_transport(state, config, out, diffusion)
+
+    def dust_feedback(self, state: State, config: Dict,
+                      out: np.ndarray = None, accumulate: bool = False) -> np.ndarray:
+        """Calculate dust feedback force
+
+        The dust velocity is taken equal to the air velocity, so the
+        κ(vd - v) drag term vanishes and only the gradient terms remain.
+        """
+        if out is None:
+            out = np.empty(stencils.interior_shape(state.velocity.shape),
+                           dtype=state.velocity.dtype)
+        return self._kernels(state, config).dust_feedback(state, config, out, accumulate)
+
+    def scalar_advection(self, state: State, field: np.ndarray, config: Dict,
+                         out: np.ndarray) -> np.ndarray:
+        """Passive advection -(v⋅∇)f for temperature and humidity"""
+        return self._kernels(state, config).scalar_advection(state, field, config, out)
+
+    def rhs(self, state: State, config: Dict, out: State,
+            diffusion: bool = True, pressure: bool = True) -> State:
+        """Evaluate all tendencies of a padded `state` into an interior-shaped `out`
+
+        Pressure has no prognostic equation and its tendency is left at zero.
+        """
+        PROFILER.count('rhs_evaluations')
+        with PROFILER.phase('navier_stokes'):
+            self.navier_stokes(state, config, out=out.velocity,
+                               diffusion=diffusion, pressure=pressure)
+        with PROFILER.phase('dust_feedback'):
+            self.dust_feedback(state, config, out=out.velocity, accumulate=True)
+        with PROFILER.phase('dust_transport'):
+            self.dust_transport(state, config, out=out.concentration, diffusion=diffusion)
+        with PROFILER.phase('scalar_advection'):
+            self.scalar_advection(state, state.temperature, config, out.temperature)
+            self.scalar_advection(state, state.humidity, config, out.humidity)
+        out.pressure.fill(0.0)
+        return out
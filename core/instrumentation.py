@@ -0,0 +1,213 @@
+# core/instrumentation.py
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Union
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class PhaseStats:
+    """Inclusive wall time (and optionally memory) of one named phase"""
+
+    __slots__ = ('calls', 'total', 'max', 'allocated', 'peak')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.allocated = 0  # net bytes still allocated at phase exit
+        self.peak = 0  # largest transient growth above the entry level
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'calls': self.calls, 'total': self.total, 'max': self.max,
+                'mean': self.total / self.calls if self.calls else 0.0,
+                'allocated': self.allocated, 'peak': self.peak}
+
+
+class _Phase:
+    """A timed phase; `top` keeps its traced-memory peak across the
+    tracemalloc.reset_peak() calls of nested phases, which hand their
+    peaks up to the enclosing phase. Memory is only accounted when tracking
+    was already on at entry, as the profiler can be switched mid-phase."""
+
+    __slots__ = ('profiler', 'name', 'started', 'tracked', 'memory', 'top')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.tracked = self.profiler.track_allocations
+        if self.tracked:
+            current, top = tracemalloc.get_traced_memory()
+            stack = self.profiler._open_phases
+            if stack:
+                stack[-1].top = max(stack[-1].top, top)
+            tracemalloc.reset_peak()
+            self.memory = self.top = current
+            stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ended = time.perf_counter()
+        allocated = peak = 0
+        if self.tracked and self.profiler.track_allocations and tracemalloc.is_tracing():
+            current, top = tracemalloc.get_traced_memory()
+            top = max(self.top, top)
+            stack = self.profiler._open_phases
+            if self in stack:
+                stack.remove(self)
+            if stack:
+                stack[-1].top = max(stack[-1].top, top)
+            allocated, peak = current - self.memory, top - self.memory
+        self.profiler._record(self.name, self.started, ended, allocated, peak)
+        return False
+
+
+class Profiler:
+    """Run-time switchable phase timers, counters and trace events
+
+    Instrumented code wraps its phases in `with PROFILER.phase(name):` and
+    bumps counters with `PROFILER.count(name)`. While disabled `phase`
+    returns a shared no-op context and `count` returns at once, so the
+    instrumentation stays in the hot paths. Phase times are inclusive of
+    nested phases. With `track_allocations`, tracemalloc (which sees NumPy
+    buffers) attributes net and peak bytes to each phase, at a noticeable
+    cost. Up to `max_events` timeline events are kept for the Chrome trace.
+    """
+
+    def __init__(self, max_events: int = 1_000_000):
+        self.enabled = False
+        self.track_allocations = False
+        self.max_events = max_events
+        self._started_tracing = False
+        self.reset()
+
+    def reset(self):
+        self.phases: Dict[str, PhaseStats] = {}
+        self.counters: Dict[str, float] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.dropped_events = 0
+        self.origin = time.perf_counter()
+        self.wall = 0.0
+        self._enabled_at: Optional[float] = None
+        self._open_phases: List[_Phase] = []
+
+    def enable(self, track_allocations: bool = False, reset: bool = True) -> 'Profiler':
+        if reset:
+            self.reset()
+        self.track_allocations = track_allocations
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._enabled_at = time.perf_counter()
+        self.enabled = True
+        return self
+
+    def disable(self) -> 'Profiler':
+        if self.enabled:
+            self.wall += time.perf_counter() - self._enabled_at
+        self.enabled = False
+        # leave tracing running if someone else started it
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+        self.track_allocations = False
+        self._open_phases.clear()
+        return self
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def count(self, name: str, value: float = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def step(self, step: int, t: float, dt: float):
+        """Per-step counter sample on the timeline"""
+        if not self.enabled:
+            return
+        self.counters['steps'] = self.counters.get('steps', 0) + 1
+        self._event({'name': 'step', 'ph': 'C', 'ts': self._us(time.perf_counter()),
+                     'args': {'step': step, 't': t, 'dt': dt}})
+
+    def _us(self, moment: float) -> float:
+        return (moment - self.origin) * 1e6
+
+    def _event(self, event: Dict[str, Any]):
+        if len(self.events) >= self.max_events:
+            self.dropped_events += 1
+            return
+        event['pid'] = os.getpid()
+        event['tid'] = threading.get_ident()
+        self.events.append(event)
+
+    def _record(self, name: str, started: float, ended: float, allocated: int, peak: int):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        elapsed = ended - started
+        stats.calls += 1
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        stats.allocated += allocated
+        stats.peak = max(stats.peak, peak)
+        event = {'name': name, 'ph': 'X', 'ts': self._us(started), 'dur': elapsed * 1e6}
+        if self.track_allocations:
+            event['args'] = {'allocated': allocated, 'peak': peak}
+        self._event(event)
+
+    def as_dict(self) -> Dict[str, Any]:
+        wall = self.wall
+        if self.enabled:
+            wall += time.perf_counter() - self._enabled_at
+        return {'wall': wall,
+                'phases': {name: stats.as_dict() for name, stats in self.phases.items()},
+                'counters': dict(self.counters),
+                'dropped_events': self.dropped_events}
+
+    def export_json(self, path: Union[str, Path]):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def export_chrome_trace(self, path: Union[str, Path]):
+        """Timeline for chrome://tracing or Perfetto"""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+    def report(self) -> str:
+        """Phases sorted by total time, as a plain-text table"""
+        lines = [f"{'phase':<24} {'calls':>8} {'total [s]':>10} {'mean [ms]':>10} "
+                 f"{'alloc [MB]':>10}"]
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].total):
+            row = stats.as_dict()
+            lines.append(f"{name:<24} {row['calls']:>8} {row['total']:>10.4f} "
+                         f"{row['mean'] * 1e3:>10.4f} {row['allocated'] / 1e6:>10.3f}")
+        for name, value in self.counters.items():
+            lines.append(f"{name:<24} {value:>8g}")
+        return '\n'.join(lines)
+
+
+# Process-wide profiler used by the instrumented modules; DUST_PROFILE=1
+# enables it at import (DUST_PROFILE=alloc also tracks allocations)
+PROFILER = Profiler()
+if os.environ.get('DUST_PROFILE'):
+    PROFILER.enable(track_allocations=os.environ['DUST_PROFILE'] == 'alloc')
+
+
+@contextlib.contextmanager
+def profiling(track_allocations: bool = False) -> Iterator[Profiler]:
+    """Enable PROFILER for a block; the collected data stays readable afterwards"""
+    PROFILER.enable(track_allocations)
+    try:
+        yield PROFILER
+    finally:
+        PROFILER.disable()
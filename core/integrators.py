@@ -0,0 +1,244 @@
+# core/integrators.py
+import time
+import numpy as np
+from typing import Callable, List
+from .equations import State
+from .stencils import INTERIOR
+from .instrumentation import PROFILER
+
+# rhs(state, out) evaluates the tendencies of a ghost-padded state into an
+# interior-shaped State; boundary(state) refreshes the ghost layer.
+RHSFunction = Callable[[State, State], State]
+BoundaryFunction = Callable[[State], None]
+
+
+class StepCounter:
+    """Wall-clock step counter for throughput reporting"""
+
+    def __init__(self):
+        self.steps = 0
+        self.elapsed = 0.0
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self._started is not None:
+            self.elapsed += time.perf_counter() - self._started
+            self._started = None
+
+    def tick(self, n: int = 1):
+        self.steps += n
+
+    @property
+    def steps_per_second(self) -> float:
+        elapsed = self.elapsed
+        if self._started is not None:
+            elapsed += time.perf_counter() - self._started
+        return self.steps / elapsed if elapsed > 0 else 0.0
+
+
+def stage_update(out: State, base: State, increment: State, scale: float):
+    """out[interior] = base[interior] + scale * increment, without temporaries"""
+    for (_, o), (_, b), (_, k) in zip(out.items(), base.items(), increment.items()):
+        target = o[INTERIOR]
+        np.multiply(k, scale, out=target)
+        np.add(target, b[INTERIOR], out=target)
+
+
+def accumulate(out: State, increment: State, scale: float):
+    """out[interior] += scale * increment; `increment` is used as scratch"""
+    for (_, o), (_, k) in zip(out.items(), increment.items()):
+        np.multiply(k, scale, out=k)
+        target = o[INTERIOR]
+        np.add(target, k, out=target)
+
+
+class RK4Integrator:
+    """Classical fourth-order Runge-Kutta stepper
+
+    The four stage tendencies and the intermediate stage state are
+    allocated once from `template` and reused on every step.
+    """
+
+    adaptive = False
+    rejected = 0
+    dt_next = None
+
+    def __init__(self, rhs: RHSFunction, boundary: BoundaryFunction, template: State):
+        self.rhs = rhs
+        self.boundary = boundary
+        shape = template.concentration.shape
+        dtype = template.concentration.dtype
+        interior = shape[:-3] + tuple(n - 2 for n in shape[-3:])
+        self.stages: List[State] = [State.zeros(interior, dtype) for _ in range(4)]
+        self.stage_state = State.zeros(shape, dtype)
+
+    def reset(self):
+        """Nothing is cached between steps"""
+
+    def step(self, state: State, dt: float) -> float:
+        """Advance `state` in place by one step of size `dt`; returns `dt`"""
+        k1, k2, k3, k4 = self.stages
+        y = self.stage_state
+
+        self.rhs(state, k1)
+        stage_update(y, state, k1, 0.5 * dt)
+        self.boundary(y)
+        self.rhs(y, k2)
+        stage_update(y, state, k2, 0.5 * dt)
+        self.boundary(y)
+        self.rhs(y, k3)
+        stage_update(y, state, k3, dt)
+        self.boundary(y)
+        self.rhs(y, k4)
+
+        # y_{n+1} = y_n + dt/6 (k1 + 2 k2 + 2 k3 + k4)
+        for (_, a), (_, b), (_, c), (_, d) in zip(k1.items(), k2.items(),
+                                                  k3.items(), k4.items()):
+            np.add(a, d, out=a)
+            np.add(b, c, out=b)
+            np.multiply(b, 2.0, out=b)
+            np.add(a, b, out=a)
+        accumulate(state, k1, dt / 6.0)
+        self.boundary(state)
+        return dt
+
+
+def stable_time_step(state: State, config, cfl: float = 0.9,
+                     diffusion_number: float = 0.2, diffusion: bool = True) -> float:
+    """Largest explicit step allowed by the advective CFL and diffusion limits
+
+    The advective limit uses sum_i max|v_i| dt / dx <= cfl; the diffusive
+    limit uses max(nu, D) dt / dx^2 <= diffusion_number and is skipped when
+    diffusion is handled implicitly.
+    """
+    dx = config.dx
+    speed = 0.0
+    for axis in range(3):
+        component = state.velocity[..., axis, :, :, :]
+        speed += max(float(component.max()), -float(component.min()))
+    dt_adv = cfl * dx / speed if speed > 0 else np.inf
+    if not diffusion:
+        return dt_adv
+    diffusivity = max(config.nu, config.D)
+    dt_diff = diffusion_number * dx * dx / diffusivity if diffusivity > 0 else np.inf
+    return min(dt_adv, dt_diff)
+
+
+def combine(out: State, base: State, stages: List[State], weights, dt: float,
+            scratch: State):
+    """out[interior] = base[interior] + dt * sum(w * k) over non-zero weights"""
+    for name, target in out.items():
+        target = target[INTERIOR]
+        np.copyto(target, getattr(base, name)[INTERIOR])
+        tmp = getattr(scratch, name)
+        for weight, stage in zip(weights, stages):
+            if weight:
+                np.multiply(getattr(stage, name), dt * weight, out=tmp)
+                np.add(target, tmp, out=target)
+
+
+class DormandPrinceIntegrator:
+    """Embedded Dormand-Prince 5(4) stepper with error-based step acceptance
+
+    Stage buffers are allocated once; the last stage of an accepted step is
+    reused as the first stage of the next (first same as last).
+    """
+
+    adaptive = True
+
+    A = (
+        (),
+        (1 / 5,),
+        (3 / 40, 9 / 40),
+        (44 / 45, -56 / 15, 32 / 9),
+        (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+        (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+        (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+    )
+    # Difference between the fifth- and fourth-order weights
+    E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+    def __init__(self, rhs: RHSFunction, boundary: BoundaryFunction, template: State,
+                 rtol: float = 1e-3, atol: float = 1e-6,
+                 safety: float = 0.9, min_factor: float = 0.2, max_factor: float = 5.0,
+                 min_dt: float = 1e-10):
+        self.rhs = rhs
+        self.boundary = boundary
+        self.rtol = rtol
+        self.atol = atol
+        self.safety = safety
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.min_dt = min_dt
+        shape = template.concentration.shape
+        dtype = template.concentration.dtype
+        interior = shape[:-3] + tuple(n - 2 for n in shape[-3:])
+        self.stages: List[State] = [State.zeros(interior, dtype) for _ in range(7)]
+        self.error = State.zeros(interior, dtype)
+        self.scratch = State.zeros(interior, dtype)
+        self.stage_state = State.zeros(shape, dtype)
+        self.rejected = 0
+        self.dt_next = None
+        self._fsal_valid = False
+
+    def reset(self):
+        """Forget the cached first stage, e.g. after the state was modified"""
+        self._fsal_valid = False
+
+    def error_norm(self, y_new: State) -> float:
+        """RMS of the local error scaled by atol + rtol * |y_new|"""
+        total, count = 0.0, 0
+        for (name, err), (_, tmp) in zip(self.error.items(), self.scratch.items()):
+            np.abs(getattr(y_new, name)[INTERIOR], out=tmp)
+            np.multiply(tmp, self.rtol, out=tmp)
+            np.add(tmp, self.atol, out=tmp)
+            np.divide(err, tmp, out=tmp)
+            flat = tmp.reshape(-1)
+            total += float(np.dot(flat, flat))
+            count += flat.size
+        return float(np.sqrt(total / count))
+
+    def attempt(self, state: State, dt: float) -> float:
+        """Try one step of size `dt`, leaving the candidate in `stage_state`"""
+        k = self.stages
+        y = self.stage_state
+        if not self._fsal_valid:
+            self.rhs(state, k[0])
+            self._fsal_valid = True
+        for i in range(1, 7):
+            combine(y, state, k[:i], self.A[i], dt, self.scratch)
+            self.boundary(y)
+            self.rhs(y, k[i])
+        for (name, err) in self.error.items():
+            err.fill(0.0)
+            tmp = getattr(self.scratch, name)
+            for weight, stage in zip(self.E, k):
+                if weight:
+                    np.multiply(getattr(stage, name), dt * weight, out=tmp)
+                    np.add(err, tmp, out=err)
+        return self.error_norm(y)
+
+    def step(self, state: State, dt: float, max_dt: float = np.inf) -> float:
+        """Advance `state` in place, shrinking `dt` until the error is acceptable
+
+        Returns the step actually taken; `dt_next` holds the proposed next step.
+        """
+        while True:
+            err = self.attempt(state, dt)
+            if err <= 1.0:
+                break
+            factor = self.safety * err ** -0.2 if np.isfinite(err) else self.min_factor
+            dt *= max(self.min_factor, factor)
+            self.rejected += 1
+            PROFILER.count('rejected_steps')
+            if dt < self.min_dt:
+                raise RuntimeError(f"Step size underflow (dt={dt:.3e}, error={err:.3e})")
+        for (_, target), (_, source) in zip(state.items(), self.stage_state.items()):
+            np.copyto(target, source)
+        self.stages[0], self.stages[6] = self.stages[6], self.stages[0]
+        factor = self.safety * err ** -0.2 if err > 0 else self.max_factor
+        self.dt_next = min(dt * min(self.max_factor, max(self.min_factor, factor)), max_dt)
+        return dt
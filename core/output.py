@@ -0,0 +1,248 @@
+# core/output.py
+import json
+import os
+import queue
+import shutil
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Union
+from .equations import State
+from .stencils import INTERIOR
+
+MANIFEST = 'manifest.json'
+CHECKPOINT = 'checkpoint.npz'
+
+
+def _chunk_path(root: Path, name: str, chunk: int, compression: Optional[str]) -> Path:
+    suffix = '.npz' if compression else '.npy'
+    return root / name / f'{chunk:06d}{suffix}'
+
+
+def _replace_atomically(path: Path, write):
+    """Write through a temporary file so readers never see a partial file"""
+    tmp = path.with_name(path.stem + '.tmp' + path.suffix)
+    write(tmp)
+    os.replace(tmp, path)
+
+
+class StreamingWriter:
+    """Appends snapshots of selected fields to chunked on-disk arrays
+
+    Each field is a directory of chunk files holding `chunk_size` frames,
+    stored as raw .npy (memory-mappable) or zlib-compressed .npz when
+    `compression='zlib'`. `record` copies the snapshot into one of
+    `queue_size` reusable buffers and hands it to a background thread, so
+    the solver only blocks when the writer has fallen that far behind.
+    """
+
+    def __init__(self, path: Union[str, Path], template: State,
+                 output_fields: Sequence[str], chunk_size: int = 16,
+                 compression: Optional[str] = None, queue_size: int = 4,
+                 resume_frames: Optional[int] = None):
+        if compression not in (None, 'zlib'):
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.path = Path(path)
+        self.fields = tuple(output_fields)
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.shapes = {name: getattr(template, name)[INTERIOR].shape for name in self.fields}
+        self.dtype = template.concentration.dtype
+        self._chunk = {name: np.empty((chunk_size,) + shape, dtype=self.dtype)
+                       for name, shape in self.shapes.items()}
+        self._free: queue.Queue = queue.Queue()
+        for _ in range(queue_size):
+            self._free.put({name: np.empty(shape, dtype=self.dtype)
+                            for name, shape in self.shapes.items()})
+        self._pending: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.times: List[float] = []
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+        if resume_frames is None:
+            for name in self.fields:
+                shutil.rmtree(self.path / name, ignore_errors=True)
+        for name in self.fields:
+            (self.path / name).mkdir(parents=True, exist_ok=True)
+        if resume_frames is not None:
+            self._restore(resume_frames)
+
+        self._thread = threading.Thread(target=self._drain, name='result-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def count(self) -> int:
+        return len(self.times)
+
+    def _restore(self, frames: int):
+        """Reopen an existing store truncated to its first `frames` frames"""
+        with open(self.path / MANIFEST) as f:
+            manifest = json.load(f)
+        self.times = manifest['time'][:frames]
+        partial = frames % self.chunk_size
+        if partial:
+            chunk = frames // self.chunk_size
+            for name in self.fields:
+                self._chunk[name][:partial] = _load_chunk(self.path, name, chunk,
+                                                          self.compression)[:partial]
+
+    def _write_chunk(self):
+        n = self.count
+        if n == 0:
+            return
+        chunk, filled = (n - 1) // self.chunk_size, (n - 1) % self.chunk_size + 1
+        for name in self.fields:
+            data = self._chunk[name][:filled]
+            target = _chunk_path(self.path, name, chunk, self.compression)
+            if self.compression:
+                _replace_atomically(target, lambda p: np.savez_compressed(p, data=data))
+            else:
+                _replace_atomically(target, lambda p: np.save(p, data))
+
+    def _write_manifest(self):
+        manifest = {
+            'fields': {name: {'shape': list(shape), 'dtype': np.dtype(self.dtype).str}
+                       for name, shape in self.shapes.items()},
+            'chunk_size': self.chunk_size,
+            'compression': self.compression,
+            'count': self.count,
+            'time': self.times,
+        }
+        _replace_atomically(self.path / MANIFEST,
+                            lambda p: p.write_text(json.dumps(manifest)))
+
+    def _drain(self):
+        while True:
+            item = self._pending.get()
+            try:
+                if item is None:
+                    return
+                if isinstance(item, threading.Event):
+                    self._write_chunk()
+                    self._write_manifest()
+                    item.set()
+                    continue
+                t, buffers = item
+                slot = self.count % self.chunk_size
+                for name in self.fields:
+                    self._chunk[name][slot] = buffers[name]
+                self._free.put(buffers)
+                self.times.append(float(t))
+                if slot == self.chunk_size - 1:
+                    self._write_chunk()
+                    self._write_manifest()
+            except BaseException as exc:
+                self._error = exc
+                if isinstance(item, threading.Event):
+                    item.set()
+            finally:
+                self._pending.task_done()
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError(f"Result writer failed: {self._error}") from self._error
+
+    def record(self, t: float, state: State):
+        self._check()
+        buffers = self._free.get()
+        for name in self.fields:
+            np.copyto(buffers[name], getattr(state, name)[INTERIOR])
+        self._pending.put((t, buffers))
+
+    def flush(self):
+        """Block until every queued frame, including a partial chunk, is on disk"""
+        done = threading.Event()
+        self._pending.put(done)
+        done.wait()
+        self._check()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._pending.put(None)
+        self._thread.join()
+        self._closed = True
+
+    def results(self) -> Dict[str, Any]:
+        self.close()
+        return {'time': np.asarray(self.times), 'store': str(self.path)}
+
+
+def _load_chunk(root: Path, name: str, chunk: int, compression: Optional[str],
+                mmap: bool = True) -> np.ndarray:
+    path = _chunk_path(root, name, chunk, compression)
+    if compression:
+        with np.load(path) as data:
+            return data['data']
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+class ResultStore:
+    """Read-only lazy view of a StreamingWriter directory"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path / MANIFEST) as f:
+            self.manifest = json.load(f)
+        self.fields = tuple(self.manifest['fields'])
+        self.chunk_size = self.manifest['chunk_size']
+        self.compression = self.manifest['compression']
+        self.time = np.asarray(self.manifest['time'])
+
+    def __len__(self) -> int:
+        return self.manifest['count']
+
+    def frame(self, name: str, index: int) -> np.ndarray:
+        """One frame of `name`; memory-mapped when the store is uncompressed"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Frame {index} out of range for {len(self)} frames")
+        chunk, offset = divmod(index, self.chunk_size)
+        return _load_chunk(self.path, name, chunk, self.compression)[offset]
+
+    def frames(self, name: str, stride: int = 1) -> Iterator[np.ndarray]:
+        """Iterate over frames of `name`, loading one chunk at a time"""
+        n_chunks = (len(self) + self.chunk_size - 1) // self.chunk_size
+        for chunk in range(n_chunks):
+            data = _load_chunk(self.path, name, chunk, self.compression)
+            start = chunk * self.chunk_size
+            stop = min(start + self.chunk_size, len(self))
+            for index in range(start + (-start) % stride, stop, stride):
+                yield data[index - start]
+
+
+class Checkpointer:
+    """Periodic full-state checkpoints for restarting a killed run"""
+
+    def __init__(self, path: Union[str, Path], interval: Optional[float]):
+        self.path = Path(path) / CHECKPOINT
+        self.interval = interval
+        self.next_time = interval if interval else np.inf
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def due(self, t: float) -> bool:
+        return t >= self.next_time - 1e-12 * max(abs(t), 1.0)
+
+    def save(self, state: State, **progress):
+        """Atomically store the full state with scalar run progress (t, step, ...)"""
+        arrays = {name: array for name, array in state.items()}
+        _replace_atomically(self.path, lambda p: np.savez(p, **progress, **arrays))
+        t = progress['t']
+        while self.next_time <= t + 1e-12 * max(abs(t), 1.0):
+            self.next_time += self.interval
+
+    def restore(self, state: State) -> Dict[str, Any]:
+        """Load the checkpoint into `state` and return the saved progress"""
+        names = {name for name, _ in state.items()}
+        with np.load(self.path) as data:
+            for name, array in state.items():
+                np.copyto(array, data[name])
+            progress = {key: data[key].item() if data[key].ndim == 0 else data[key]
+                        for key in data.files if key not in names}
+        self.next_time = progress['t'] + self.interval if self.interval else np.inf
+        return progress
@@ -0,0 +1,303 @@
+# core/particles.py
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
+from .equations import State, Grid
+from .physics import PhysicsEngine
+from .stencils import INTERIOR
+
+
+class ParticleStore:
+    """Structure-of-arrays storage for discrete dust particles
+
+    Each property is one contiguous array with spare capacity, so adding
+    particles is amortised O(1) and per-step updates are whole-array
+    operations. The public attributes are views of the live particles.
+    """
+
+    FIELDS = ('diameter', 'density', 'mass', 'settling', 'ids')
+
+    def __init__(self, capacity: int = 1024):
+        self.count = 0
+        self.next_id = 0
+        self._position = np.empty((3, capacity))
+        self._data = {name: np.empty(capacity, dtype=np.int64 if name == 'ids' else float)
+                      for name in self.FIELDS}
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def position(self) -> np.ndarray:
+        return self._position[:, :self.count]
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name in ParticleStore.FIELDS:
+            return self.__dict__['_data'][name][:self.count]
+        raise AttributeError(name)
+
+    def _reserve(self, count: int):
+        capacity = self._position.shape[1]
+        if count <= capacity:
+            return
+        capacity = max(count, 2 * capacity)
+        position = np.empty((3, capacity))
+        position[:, :self.count] = self.position
+        self._position = position
+        for name, array in self._data.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            self._data[name] = grown
+
+    def add(self, position: np.ndarray, **properties: np.ndarray) -> np.ndarray:
+        """Append particles at `position` (3, n); returns their ids"""
+        n = position.shape[1]
+        start, stop = self.count, self.count + n
+        self._reserve(stop)
+        self._position[:, start:stop] = position
+        for name in ('diameter', 'density', 'mass', 'settling'):
+            self._data[name][start:stop] = properties[name]
+        ids = np.arange(self.next_id, self.next_id + n)
+        self._data['ids'][start:stop] = ids
+        self.count, self.next_id = stop, self.next_id + n
+        return ids
+
+    def compact(self, keep: np.ndarray):
+        """Drop the particles where `keep` is False, preserving order"""
+        n = int(np.count_nonzero(keep))
+        self._position[:, :n] = self.position[:, keep]
+        for array in self._data.values():
+            array[:n] = array[:self.count][keep]
+        self.count = n
+
+
+class CellList:
+    """Particles grouped by grid cell for neighbour queries
+
+    `order` lists particle indices sorted by flattened cell id and
+    `starts[c]:starts[c + 1]` is the slice of cell c. Each update re-sorts
+    starting from the previous order; particles move at most about one
+    cell per step, so the stable (adaptive merge) sort sees nearly sorted
+    input and runs in close to linear time.
+    """
+
+    def __init__(self, shape: Tuple[int, int, int]):
+        self.shape = tuple(shape)
+        self.n_cells = int(np.prod(self.shape))
+        self.order = np.empty(0, dtype=np.intp)
+        self.starts = np.zeros(self.n_cells + 1, dtype=np.intp)
+        self.cells = np.empty(0, dtype=np.intp)
+
+    def update(self, cells: np.ndarray):
+        """Re-index after particles moved or were appended"""
+        previous = len(self.order)
+        order = self.order
+        if previous < len(cells):
+            order = np.concatenate([order, np.arange(previous, len(cells))])
+        self.order = order[np.argsort(cells[order], kind='stable')]
+        self.cells = cells
+        np.cumsum(np.bincount(cells, minlength=self.n_cells), out=self.starts[1:])
+
+    def remove(self, keep: np.ndarray):
+        """Renumber `order` after ParticleStore.compact(keep)"""
+        renumber = np.cumsum(keep) - 1
+        self.order = renumber[self.order[keep[self.order]]]
+        self.cells = self.cells[keep]
+        np.cumsum(np.bincount(self.cells, minlength=self.n_cells), out=self.starts[1:])
+
+    def in_cell(self, cell: Tuple[int, int, int]) -> np.ndarray:
+        c = np.ravel_multi_index(cell, self.shape)
+        return self.order[self.starts[c]:self.starts[c + 1]]
+
+    def neighbours(self, cell: Tuple[int, int, int], periodic: bool = True) -> np.ndarray:
+        """Indices of particles in the 3x3x3 block of cells around `cell`"""
+        offsets = np.stack(np.meshgrid(*[np.arange(-1, 2)] * 3, indexing='ij')).reshape(3, -1)
+        block = np.asarray(cell)[:, None] + offsets
+        shape = np.asarray(self.shape)[:, None]
+        if periodic:
+            block %= shape
+        else:
+            block = block[:, np.all((block >= 0) & (block < shape), axis=0)]
+        cells = np.unique(np.ravel_multi_index(block, self.shape))
+        return np.concatenate([self.order[self.starts[c]:self.starts[c + 1]] for c in cells])
+
+
+def trilinear_weights(position: np.ndarray, dx: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Lower-corner padded indices (3, n) and fractional offsets (3, n)
+
+    Cell centres sit at (i + 0.5) dx, i.e. padded index i + 1, so any
+    position inside the domain has all eight corners within the ghost-padded
+    array.
+    """
+    scaled = position / dx + 0.5
+    base = np.floor(scaled)
+    return base.astype(np.intp), scaled - base
+
+
+def interpolate(field: np.ndarray, base: np.ndarray, frac: np.ndarray) -> np.ndarray:
+    """Trilinear interpolation of a ghost-padded field (..., X, Y, Z) to particles"""
+    i, j, k = base
+    u, v, w = frac
+    result = 0.0
+    for di, wi in ((0, 1 - u), (1, u)):
+        for dj, wj in ((0, 1 - v), (1, v)):
+            weight = wi * wj
+            result = result + weight * ((1 - w) * field[..., i + di, j + dj, k]
+                                        + w * field[..., i + di, j + dj, k + 1])
+    return result
+
+
+def scatter(values: np.ndarray, base: np.ndarray, frac: np.ndarray,
+            padded_shape: Tuple[int, int, int]) -> np.ndarray:
+    """Cloud-in-cell deposit of per-particle `values` onto a padded grid"""
+    size = int(np.prod(padded_shape))
+    total = np.zeros(size)
+    i, j, k = base
+    u, v, w = frac
+    for di, wi in ((0, 1 - u), (1, u)):
+        for dj, wj in ((0, 1 - v), (1, v)):
+            for dk, wk in ((0, 1 - w), (1, w)):
+                flat = np.ravel_multi_index((i + di, j + dj, k + dk), padded_shape)
+                total += np.bincount(flat, weights=values * wi * wj * wk, minlength=size)
+    return total.reshape(padded_shape)
+
+
+def fold_ghosts(padded: np.ndarray, boundary: str = 'periodic') -> np.ndarray:
+    """Add deposits that landed in the ghost layer back onto the interior"""
+    for axis in range(3):
+        view = np.moveaxis(padded, axis, 0)
+        if boundary == 'periodic':
+            view[-2] += view[0]
+            view[1] += view[-1]
+        else:
+            view[1] += view[0]
+            view[-2] += view[-1]
+        view[0] = 0.0
+        view[-1] = 0.0
+    return padded[INTERIOR]
+
+
+class ParticleTracker:
+    """Lagrangian dust particles advected through the gridded flow
+
+    Particles move with the trilinearly interpolated air velocity plus
+    their Stokes settling velocity (midpoint rule). Crossing the ground
+    (z = 0) removes a particle and adds its mass to the 2-D surface map
+    `deposited`, not to State.concentration; the other faces follow the
+    grid boundary (wrap or reflect). With `two_way` the particles' weight
+    is fed back as a downward momentum source on the air, so the coupling
+    is momentum-only: the gridded concentration never sees the particles,
+    and concentration() is a diagnostic. Every operation is a whole-array
+    pass, so a step costs O(particles + cells).
+    """
+
+    def __init__(self, config, grid: Optional[Grid] = None, two_way: bool = False,
+                 capacity: int = 1024):
+        self.config = config
+        self.grid = grid if grid is not None else Grid.from_config(config)
+        self.physics = PhysicsEngine(config)
+        self.two_way = two_way
+        self.store = ParticleStore(capacity)
+        self.cells = CellList(self.grid.shape)
+        self.extent = np.asarray(self.grid.shape, dtype=float)[:, None] * self.grid.dx
+        self.deposited = np.zeros(self.grid.shape[:2])
+        self.deposited_count = 0
+
+    def add_particles(self, position: np.ndarray, diameter, density,
+                      mass: Optional[np.ndarray] = None) -> np.ndarray:
+        """Release particles at `position` (3, n); mass defaults to a solid sphere"""
+        n = position.shape[1]
+        diameter = np.broadcast_to(np.asarray(diameter, dtype=float), (n,))
+        density = np.broadcast_to(np.asarray(density, dtype=float), (n,))
+        if mass is None:
+            mass = density * np.pi / 6 * diameter ** 3
+        settling = self.physics.calculate_particle_settling_velocity(diameter, density)
+        ids = self.store.add(position, diameter=diameter, density=density,
+                             mass=mass, settling=settling)
+        self.cells.update(self.cell_index())
+        return ids
+
+    def cell_index(self) -> np.ndarray:
+        """Flattened interior cell id of every particle"""
+        ijk = np.floor(self.store.position / self.grid.dx).astype(np.intp)
+        np.clip(ijk, 0, np.asarray(self.grid.shape)[:, None] - 1, out=ijk)
+        return np.ravel_multi_index(ijk, self.grid.shape)
+
+    def particle_velocity(self, state: State, position: np.ndarray) -> np.ndarray:
+        base, frac = trilinear_weights(position, self.grid.dx)
+        velocity = interpolate(state.velocity, base, frac)
+        velocity[2] -= self.store.settling
+        return velocity
+
+    def _wrap(self, position: np.ndarray) -> np.ndarray:
+        """Apply the side/top boundaries; returns the mask of deposited particles"""
+        grounded = position[2] < 0.0
+        if self.grid.boundary == 'periodic':
+            np.mod(position[:2], self.extent[:2], out=position[:2])
+            np.mod(position[2], self.extent[2], out=position[2], where=~grounded)
+        else:
+            low = position[:2] < 0.0
+            position[:2][low] *= -1.0
+            for axis in range(3):
+                high = position[axis] >= self.extent[axis]
+                position[axis][high] = np.nextafter(
+                    2 * self.extent[axis, 0] - position[axis][high], 0.0)
+        return grounded
+
+    def step(self, state: State, dt: float):
+        """Advance every particle by dt through the (ghost-filled) `state`"""
+        store = self.store
+        if store.count == 0:
+            return
+        position = store.position
+        midpoint = position + 0.5 * dt * self.particle_velocity(state, position)
+        self._wrap(midpoint)
+        np.maximum(midpoint[2], 0.0, out=midpoint[2])
+        position += dt * self.particle_velocity(state, midpoint)
+        grounded = self._wrap(position)
+
+        if np.any(grounded):
+            landed = position[:2, grounded]
+            ij = np.floor(landed / self.grid.dx).astype(np.intp)
+            np.clip(ij, 0, np.asarray(self.grid.shape[:2])[:, None] - 1, out=ij)
+            flat = np.ravel_multi_index(ij, self.grid.shape[:2])
+            self.deposited += np.bincount(flat, weights=store.mass[grounded],
+                                          minlength=self.deposited.size
+                                          ).reshape(self.deposited.shape)
+            self.deposited_count += int(np.count_nonzero(grounded))
+            keep = ~grounded
+            store.compact(keep)
+            self.cells.remove(keep)
+        if store.count:
+            self.cells.update(self.cell_index())
+        if self.two_way:
+            self.apply_feedback(state, dt)
+
+    def apply_feedback(self, state: State, dt: float):
+        """Momentum exchange: settling particles drag the air down with their weight"""
+        if self.store.count == 0:
+            return
+        base, frac = trilinear_weights(self.store.position, self.grid.dx)
+        weight = fold_ghosts(scatter(self.store.mass * self.config.g, base, frac,
+                                     self.grid.padded_shape), self.grid.boundary)
+        state.velocity[(2,) + INTERIOR[1:]] -= dt * weight / (self.config.rho * self.grid.dx ** 3)
+        state.apply_boundary(self.grid.boundary)
+
+    def concentration(self) -> np.ndarray:
+        """Particle mass per unit volume on the interior grid"""
+        base, frac = trilinear_weights(self.store.position, self.grid.dx)
+        mass = fold_ghosts(scatter(self.store.mass, base, frac, self.grid.padded_shape),
+                           self.grid.boundary)
+        return mass / self.grid.dx ** 3
+
+    def __call__(self, state: State, t: float, step: int, dt: float) -> bool:
+        """Simulation step hook; reports whether the air state was modified"""
+        self.step(state, dt)
+        return self.two_way
+
+    def results(self) -> Dict[str, Any]:
+        store = self.store
+        return {'particle_position': store.position.copy(),
+                'particle_ids': store.ids.copy(),
+                'particle_concentration': self.concentration(),
+                'deposited': self.deposited.copy(),
+                'deposited_count': self.deposited_count}
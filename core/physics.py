@@ -1,8 +1,10 @@
 # core/physics.py
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Union
 from dataclasses import dataclass
 
+ArrayLike = Union[float, np.ndarray]
+
 @dataclass
 class PhysicalConstants:
     """Physical constants for dust dynamics"""
@@ -11,31 +13,35 @@ class PhysicalConstants:
     stefan_boltzmann: float = 5.670374419e-8  # Stefan-Boltzmann constant
 
 class PhysicsEngine:
-    """Core physics calculations"""
-    
+    """Core physics calculations
+
+    Every calculation broadcasts over array arguments, so a whole grid of
+    size bins by particle densities is evaluated in one call.
+    """
+
     def __init__(self, config: Dict):
         self.config = config
         self.constants = PhysicalConstants()
-    
-    def calculate_reynolds_number(self, velocity: float, length: float) -> float:
+
+    def calculate_reynolds_number(self, velocity: ArrayLike, length: ArrayLike) -> ArrayLike:
         """Calculate Reynolds number"""
-        return (velocity * length) / self.config.nu
-    
-    def calculate_particle_settling_velocity(self, 
-                                          particle_diameter: float, 
-                                          particle_density: float) -> float:
+        return (np.asarray(velocity) * length) / self.config.nu
+
+    def calculate_particle_settling_velocity(self,
+                                          particle_diameter: ArrayLike,
+                                          particle_density: ArrayLike) -> ArrayLike:
         """Calculate particle settling velocity using Stokes law"""
         g = self.config.g
         mu = self.config.nu * self.config.rho
-        return (particle_density * g * particle_diameter**2) / (18 * mu)
-    
-    def calculate_threshold_friction_velocity(self, 
-                                           particle_diameter: float,
-                                           particle_density: float) -> float:
+        return (np.asarray(particle_density) * g * np.square(particle_diameter)) / (18 * mu)
+
+    def calculate_threshold_friction_velocity(self,
+                                           particle_diameter: ArrayLike,
+                                           particle_density: ArrayLike) -> ArrayLike:
         """Calculate threshold friction velocity for particle uplift"""
         a = 0.1  # empirical constant
         return np.sqrt(
-            (particle_density - self.config.rho) * 
-            self.config.g * particle_diameter / 
+            (np.asarray(particle_density) - self.config.rho) *
+            self.config.g * particle_diameter /
             (self.config.rho * a)
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,310 @@
+# core/pressure.py
+import itertools
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from . import stencils
+from .equations import State, Grid
+from .stencils import INTERIOR, Workspace
+from .instrumentation import PROFILER
+
+
+class _Level:
+    """Buffers of one multigrid level, allocated once and reused"""
+
+    def __init__(self, shape: Tuple[int, ...], h: float, dtype):
+        self.shape = shape  # interior shape including leading axes
+        self.h = h
+        padded = shape[:-3] + tuple(n + 2 for n in shape[-3:])
+        self.phi = np.zeros(padded, dtype=dtype)
+        self.rhs = np.zeros(shape, dtype=dtype)
+        self.scaled_rhs = np.zeros(shape, dtype=dtype)  # h^2 * rhs
+        self.residual = np.zeros(shape, dtype=dtype)
+        self.tmp = np.zeros(shape, dtype=dtype)
+        self.sublattices = self._sublattices(shape[-3:], dtype, shape[:-3])
+
+    @staticmethod
+    def _sublattices(spatial, dtype, leading):
+        """Slices and scratch for the eight parity sub-lattices, grouped by colour"""
+        colours: List[List[Dict]] = [[], []]
+        for offsets in itertools.product((0, 1), repeat=3):
+            centre = [slice(1 + o, n + 1, 2) for o, n in zip(offsets, spatial)]
+            sizes = [len(range(1 + o, n + 1, 2)) for o, n in zip(offsets, spatial)]
+            if 0 in sizes:
+                continue
+            neighbours = []
+            for axis in range(3):
+                for shift in (-1, 1):
+                    index = list(centre)
+                    s = centre[axis]
+                    index[axis] = slice(s.start + shift, s.stop + shift, 2)
+                    neighbours.append((Ellipsis, *index))
+            colours[sum(offsets) % 2].append({
+                'centre': (Ellipsis, *centre),
+                'rhs': (Ellipsis, *(slice(o, n, 2) for o, n in zip(offsets, spatial))),
+                'neighbours': neighbours,
+                'tmp': np.zeros(tuple(leading) + tuple(sizes), dtype=dtype),
+            })
+        return colours
+
+
+class MultigridPoissonSolver:
+    """Geometric multigrid V-cycle solver for the seven-point Poisson problem
+
+    Cell-centred levels are built by halving the grid while every dimension
+    stays even; red-black Gauss-Seidel smooths, restriction averages the
+    eight children and prolongation is trilinear. Grids that are not powers
+    of two stop coarsening early (100^3 at 25^3), so the coarsest level is
+    solved with conjugate gradients until its residual has dropped by
+    `coarse_tol`, which keeps the V-cycle convergence rate independent of
+    where coarsening stopped. All level buffers persist between solves.
+    Periodic and walled (zero-flux) problems are singular, so the solution
+    is returned with zero mean.
+    """
+
+    def __init__(self, grid: Grid, leading: Tuple[int, ...] = (), dtype=np.float64,
+                 tol: float = 1e-6, max_cycles: int = 20,
+                 pre_smooth: int = 2, post_smooth: int = 2, coarse_tol: float = 1e-8):
+        self.grid = grid
+        self.tol = tol
+        self.max_cycles = max_cycles
+        self.pre_smooth = pre_smooth
+        self.post_smooth = post_smooth
+        self.coarse_tol = coarse_tol
+        self.levels: List[_Level] = []
+        spatial, h = tuple(grid.shape), grid.dx
+        while True:
+            self.levels.append(_Level(tuple(leading) + spatial, h, dtype))
+            if not all(n % 2 == 0 and n >= 4 for n in spatial):
+                break
+            spatial, h = tuple(n // 2 for n in spatial), 2.0 * h
+        # Intermediate buffers for separable prolongation, per coarse level
+        self._prolong: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for fine, coarse in zip(self.levels[:-1], self.levels[1:]):
+            lead = fine.shape[:-3]
+            (nx, ny, nz), (cx, cy, cz) = fine.shape[-3:], coarse.shape[-3:]
+            self._prolong.append((
+                np.zeros(lead + (nx, cy + 2, cz + 2), dtype=dtype),
+                np.zeros(lead + (nx, ny, cz + 2), dtype=dtype),
+                np.zeros(lead + (nx, ny, nz), dtype=dtype),
+            ))
+        coarsest = self.levels[-1]
+        self._search = np.zeros_like(coarsest.phi)  # conjugate-gradient direction
+        self._product = np.zeros(coarsest.shape, dtype=dtype)
+        self.coarse_iterations = 0
+        self.last_iterations = 0
+        self.last_residual = 0.0
+        self.total_iterations = 0
+        self.solves = 0
+
+    def _fill(self, field: np.ndarray):
+        stencils.fill_ghosts(field, self.grid.boundary)
+
+    def _smooth(self, level: _Level, sweeps: int):
+        phi = level.phi
+        for _ in range(sweeps):
+            for colour in level.sublattices:
+                self._fill(phi)
+                for sub in colour:
+                    tmp = sub['tmp']
+                    nbrs = sub['neighbours']
+                    np.add(phi[nbrs[0]], phi[nbrs[1]], out=tmp)
+                    for nbr in nbrs[2:]:
+                        np.add(tmp, phi[nbr], out=tmp)
+                    np.subtract(tmp, level.scaled_rhs[sub['rhs']], out=tmp)
+                    np.multiply(tmp, 1.0 / 6.0, out=phi[sub['centre']])
+        self._fill(phi)
+
+    def _coarse_solve(self, level: _Level):
+        """Conjugate gradients on -L(phi) = -rhs, per leading member, to coarse_tol"""
+        spatial = (-3, -2, -1)
+        self._fill(level.phi)
+        residual = np.negative(self._residual(level), out=level.residual)  # -rhs - (-L)phi
+        self._remove_mean(residual)
+        search, product = self._search, self._product
+        np.copyto(search[INTERIOR], residual)
+        rr = np.sum(residual * residual, axis=spatial, keepdims=True)
+        target = self.coarse_tol ** 2 * np.max(rr)
+        for _ in range(int(np.prod(level.shape[-3:]))):
+            if np.max(rr) <= target:
+                break
+            self._fill(search)
+            stencils.laplacian(search, level.h, product, level.tmp, scale=-1.0)
+            curvature = np.sum(search[INTERIOR] * product, axis=spatial, keepdims=True)
+            alpha = np.divide(rr, curvature, out=np.zeros_like(rr), where=curvature > 0)
+            interior = level.phi[INTERIOR]
+            interior += alpha * search[INTERIOR]
+            residual -= alpha * product
+            rr_next = np.sum(residual * residual, axis=spatial, keepdims=True)
+            beta = np.divide(rr_next, rr, out=np.zeros_like(rr), where=rr > 0)
+            rr = rr_next
+            direction = search[INTERIOR]
+            direction *= beta
+            direction += residual
+            self.coarse_iterations += 1
+        self._fill(level.phi)
+
+    def _residual(self, level: _Level) -> np.ndarray:
+        """residual = rhs - L(phi); the ghost layer of phi must be current"""
+        stencils.laplacian(level.phi, level.h, level.residual, level.tmp)
+        np.subtract(level.rhs, level.residual, out=level.residual)
+        return level.residual
+
+    @staticmethod
+    def _restrict(fine: np.ndarray, coarse: np.ndarray):
+        first = True
+        for ox, oy, oz in itertools.product((0, 1), repeat=3):
+            child = fine[..., ox::2, oy::2, oz::2]
+            if first:
+                np.copyto(coarse, child)
+                first = False
+            else:
+                np.add(coarse, child, out=coarse)
+        np.multiply(coarse, 0.125, out=coarse)
+
+    @staticmethod
+    def _interpolate_axis(src: np.ndarray, dst: np.ndarray, axis: int):
+        """Linear cell-centred interpolation doubling spatial `axis` of a padded `src`"""
+        dim = src.ndim - 3 + axis
+
+        def at(array, index):
+            full = [slice(None)] * array.ndim
+            full[dim] = index
+            return tuple(full)
+
+        centre = src[at(src, slice(1, -1))]
+        for parity, neighbour in ((0, slice(0, -2)), (1, slice(2, None))):
+            target = dst[at(dst, slice(parity, None, 2))]
+            # 0.75 * centre + 0.25 * neighbour
+            np.subtract(src[at(src, neighbour)], centre, out=target)
+            np.multiply(target, 0.25, out=target)
+            np.add(target, centre, out=target)
+
+    def _prolong_add(self, index: int):
+        coarse, fine = self.levels[index + 1], self.levels[index]
+        a, b, c = self._prolong[index]
+        self._fill(coarse.phi)
+        self._interpolate_axis(coarse.phi, a, 0)
+        self._interpolate_axis(a, b, 1)
+        self._interpolate_axis(b, c, 2)
+        interior = fine.phi[INTERIOR]
+        np.add(interior, c, out=interior)
+        self._fill(fine.phi)
+
+    def _set_rhs(self, level: _Level):
+        np.multiply(level.rhs, level.h * level.h, out=level.scaled_rhs)
+
+    def _vcycle(self, index: int = 0):
+        level = self.levels[index]
+        if index == len(self.levels) - 1:
+            self._coarse_solve(level)
+            return
+        self._smooth(level, self.pre_smooth)
+        residual = self._residual(level)
+        coarse = self.levels[index + 1]
+        self._restrict(residual, coarse.rhs)
+        self._set_rhs(coarse)
+        coarse.phi.fill(0.0)
+        self._vcycle(index + 1)
+        self._prolong_add(index)
+        self._smooth(level, self.post_smooth)
+
+    @staticmethod
+    def _remove_mean(array: np.ndarray):
+        array -= array.mean(axis=(-3, -2, -1), keepdims=True)
+
+    def solve(self, rhs: np.ndarray, initial_guess: Optional[np.ndarray] = None) -> np.ndarray:
+        """Solve L(phi) = rhs on the interior; returns the padded finest phi
+
+        `initial_guess` (interior-shaped) warm-starts the iteration; without
+        it the previous solution is reused.
+        """
+        finest = self.levels[0]
+        np.copyto(finest.rhs, rhs)
+        self._remove_mean(finest.rhs)
+        self._set_rhs(finest)
+        if initial_guess is not None:
+            np.copyto(finest.phi[INTERIOR], initial_guess)
+        self._fill(finest.phi)
+
+        norm_rhs = float(np.sqrt(np.vdot(finest.rhs, finest.rhs)))
+        cycles = 0
+        residual = self._residual(finest)
+        residual_norm = float(np.sqrt(np.vdot(residual, residual)))
+        while residual_norm > self.tol * max(norm_rhs, 1e-30) and cycles < self.max_cycles:
+            self._vcycle()
+            cycles += 1
+            residual = self._residual(finest)
+            residual_norm = float(np.sqrt(np.vdot(residual, residual)))
+        self._remove_mean(finest.phi[INTERIOR])
+        self._fill(finest.phi)
+
+        self.last_iterations = cycles
+        self.last_residual = residual_norm / norm_rhs if norm_rhs > 0 else 0.0
+        self.total_iterations += cycles
+        self.solves += 1
+        return finest.phi
+
+
+class PressureProjection:
+    """Chorin projection of the velocity onto its discretely divergence-free part
+
+    Solves ∇²p = (ρ/dt) ∇⋅v* with multigrid, then sets v = v* - (dt/ρ)∇p.
+    The compact Poisson operator with centred divergence and gradient makes
+    this an approximate projection, the usual choice on collocated grids.
+    The domain-mean pressure is kept as the background level.
+    """
+
+    def __init__(self, grid: Grid, config, template: State,
+                 tol: float = 1e-6, max_cycles: int = 20):
+        self.grid = grid
+        self.config = config
+        shape = template.concentration[INTERIOR].shape
+        dtype = template.concentration.dtype
+        self.solver = MultigridPoissonSolver(grid, shape[:-3], dtype, tol, max_cycles)
+        self.workspace = Workspace()
+
+    def project(self, state: State, dt: float):
+        rho, dx = self.config.rho, self.config.dx
+        pressure = state.pressure[INTERIOR]
+        div = self.workspace.get('divergence', pressure.shape, pressure.dtype)
+        tmp = self.workspace.get('tmp', pressure.shape, pressure.dtype)
+        stencils.divergence(state.velocity, dx, div, tmp, scale=rho / dt)
+
+        background = pressure.mean(axis=(-3, -2, -1), keepdims=True)
+        np.subtract(pressure, background, out=tmp)
+        phi = self.solver.solve(div, initial_guess=tmp)
+
+        stencils.gradient(phi, dx, state.velocity[INTERIOR], tmp,
+                          scale=-dt / rho, accumulate=True)
+        np.add(phi[INTERIOR], background, out=pressure)
+        state.apply_boundary(self.grid.boundary)
+
+
+class ProjectedIntegrator:
+    """Wraps an integrator so that every accepted step ends with a projection"""
+
+    def __init__(self, inner, projection: PressureProjection):
+        self.inner = inner
+        self.projection = projection
+
+    @property
+    def adaptive(self) -> bool:
+        return self.inner.adaptive
+
+    @property
+    def rejected(self) -> int:
+        return self.inner.rejected
+
+    @property
+    def dt_next(self):
+        return self.inner.dt_next
+
+    def reset(self):
+        self.inner.reset()
+
+    def step(self, state: State, dt: float, **kwargs) -> float:
+        taken = self.inner.step(state, dt, **kwargs)
+        with PROFILER.phase('pressure_projection'):
+            self.projection.project(state, taken)
+        self.inner.reset()
+        return taken
@@ -0,0 +1,53 @@
+# core/shared.py
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+
+class SharedArrays:
+    """NumPy arrays handed to worker processes through shared memory"""
+
+    def __init__(self):
+        self.descriptors: Dict[str, Tuple[str, Tuple[int, ...], str]] = {}
+        self._blocks: List[shared_memory.SharedMemory] = []
+
+    def publish(self, key: str, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        self._blocks.append(block)
+        self.descriptors[key] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        """Release and unlink every block; publisher-side views must be dropped first"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+    def allocate(self, key: str, shape: Tuple[int, ...], dtype=np.float64) -> np.ndarray:
+        """Create a zeroed shared array and return the publisher's view of it"""
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        block = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        array = np.ndarray(shape, dtype, buffer=block.buf)
+        array.fill(0)
+        self._blocks.append(block)
+        self.descriptors[key] = (block.name, tuple(shape), dtype.str)
+        return array
+
+    @staticmethod
+    def attach(descriptors: Dict[str, Tuple[str, Tuple[int, ...], str]],
+               writeable: bool = False):
+        """Map published arrays without copying; returns (arrays, blocks)"""
+        arrays, blocks = {}, []
+        for key, (name, shape, dtype) in descriptors.items():
+            try:
+                block = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:  # Python < 3.13
+                block = shared_memory.SharedMemory(name=name)
+            array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = writeable
+            arrays[key] = array
+            blocks.append(block)
+        return arrays, blocks
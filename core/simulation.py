@@ -0,0 +1,420 @@
+# core/simulation.py
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Sequence, Union
+from .equations import State, Grid, DustEquations
+from .integrators import (RK4Integrator, DormandPrinceIntegrator, StepCounter,
+                          stable_time_step)
+from .diffusion import OperatorSplitIntegrator, make_diffusion_solver
+from .pressure import PressureProjection, ProjectedIntegrator
+from .ensemble import EnsembleRecorder
+from .decomposition import DomainDecomposition
+from .output import StreamingWriter, Checkpointer
+from .monitoring import InvariantMonitor
+from .amr import AMRHierarchy, Refinement
+from .instrumentation import PROFILER
+from .stencils import INTERIOR
+
+DEFAULT_OUTPUT_FIELDS = ('velocity', 'pressure', 'concentration',
+                         'temperature', 'humidity')
+
+# Called after every accepted step as hook(state, t, step, dt); a hook that
+# modifies the state returns True so the integrator drops cached stages
+StepHook = Callable[[State, float, int, float], Optional[bool]]
+
+
+@dataclass
+class StepControl:
+    """Time-step selection for Simulation.run
+
+    mode is 'fixed' (constant dt), 'cfl' (RK4 at the stability-limited dt
+    recomputed every step) or 'dopri' (Dormand-Prince with error control,
+    capped by the same stability limit). diffusion is 'explicit' or
+    'implicit'; the latter splits the viscous and dust-diffusion terms off
+    into an FFT (periodic) or ADI (walled) solve so that only advection
+    limits the step. projection ends every step with a multigrid pressure
+    projection that enforces continuity.
+    """
+    mode: str = 'fixed'
+    diffusion: str = 'explicit'
+    projection: bool = False
+    poisson_tol: float = 1e-6
+    poisson_max_cycles: int = 20
+    cfl: float = 0.9
+    diffusion_number: float = 0.2
+    rtol: float = 1e-3
+    atol: float = 1e-6
+    max_dt: float = np.inf
+
+    @classmethod
+    def resolve(cls, value: Union[str, 'StepControl', None]) -> 'StepControl':
+        if value is None:
+            return cls()
+        if isinstance(value, str):
+            return cls(mode=value)
+        return value
+
+
+class OutputRecorder:
+    """In-memory snapshot history preallocated for a known number of outputs"""
+
+    def __init__(self, template: State, output_fields: Sequence[str], n_outputs: int):
+        self.fields = tuple(output_fields)
+        self.times = np.full(n_outputs, np.nan)
+        self.history = {
+            name: np.empty((n_outputs,) + getattr(template, name)[INTERIOR].shape,
+                           dtype=getattr(template, name).dtype)
+            for name in self.fields
+        }
+        self.count = 0
+
+    def record(self, t: float, state: State):
+        if self.count >= len(self.times):
+            return
+        self.times[self.count] = t
+        for name in self.fields:
+            self.history[name][self.count] = getattr(state, name)[INTERIOR]
+        self.count += 1
+
+    def results(self) -> Dict[str, np.ndarray]:
+        history = {name: array[:self.count] for name, array in self.history.items()}
+        return {'time': self.times[:self.count], 'history': history}
+
+
+class Simulation:
+    """Time-stepping engine behind DustModel.simulate"""
+
+    def __init__(self, config: Dict, equations: Optional[DustEquations] = None,
+                 grid: Optional[Grid] = None, dtype=np.float64):
+        self.config = config
+        self.grid = grid if grid is not None else Grid.from_config(config)
+        self.equations = equations if equations is not None else DustEquations()
+        self.dtype = dtype
+        self.counter = StepCounter()
+        self.state: Optional[State] = None
+        self.projection: Optional[PressureProjection] = None
+        self.step_hooks: List[StepHook] = []
+        self.recorder = None
+        self.checkpointer: Optional[Checkpointer] = None
+        self.monitor: Optional[InvariantMonitor] = None
+        self.hierarchy: Optional[AMRHierarchy] = None
+        self.initial_mass = 0.0
+
+    @property
+    def steps_per_second(self) -> float:
+        return self.counter.steps_per_second
+
+    @property
+    def backend_name(self) -> str:
+        """Kernel backend for equations built elsewhere ('auto' until one is chosen)"""
+        backend = self.equations.backend
+        return backend.name if backend is not None else 'auto'
+
+    def rhs(self, state: State, out: State) -> State:
+        return self.equations.rhs(state, self.config, out)
+
+    def apply_boundary(self, state: State):
+        state.apply_boundary(self.grid.boundary)
+
+    def run(self, duration: float, dt: float, initial_conditions: Dict[str, Any],
+            output_interval: Optional[float] = None,
+            output_fields: Sequence[str] = DEFAULT_OUTPUT_FIELDS,
+            step_control: Union[str, StepControl, None] = None,
+            workers: int = 1,
+            output_path: Optional[Union[str, Path]] = None,
+            chunk_size: int = 16,
+            compression: Optional[str] = None,
+            checkpoint_interval: Optional[float] = None,
+            resume: bool = False) -> Dict[str, Any]:
+        """Integrate from `initial_conditions` for `duration` seconds
+
+        Snapshots of `output_fields` are kept every `output_interval` seconds
+        (only the initial and final states when it is None). With an adaptive
+        `step_control`, `dt` is only the initial step size. `workers` > 1
+        splits the grid into x-slabs advanced by separate processes.
+
+        With an `output_path` the snapshots are streamed to chunked on-disk
+        arrays instead of being kept in memory (read them back with
+        ResultStore), and a checkpoint is written every `checkpoint_interval`
+        seconds. `resume` continues from that checkpoint when one exists.
+        """
+        state = State.from_initial_conditions(initial_conditions, self.grid, self.dtype)
+        if output_path is None:
+            if resume or checkpoint_interval:
+                raise ValueError("Checkpointing and resume require an output_path")
+            return self.execute(state, duration, dt, output_interval, step_control,
+                                lambda n: OutputRecorder(state, output_fields, n), workers)
+
+        if workers > 1 and checkpoint_interval:
+            raise ValueError("Checkpointing is not supported with domain decomposition")
+        checkpointer = Checkpointer(output_path, checkpoint_interval)
+        progress = checkpointer.restore(state) if resume and checkpointer.exists else None
+        frames = progress['frames'] if progress else None
+        return self.execute(state, duration, dt, output_interval, step_control,
+                            lambda n: StreamingWriter(output_path, state, output_fields,
+                                                      chunk_size, compression,
+                                                      resume_frames=frames),
+                            workers, checkpointer, progress)
+
+    def run_ensemble(self, duration: float, dt: float,
+                     initial_conditions: Sequence[Dict[str, Any]],
+                     output_interval: Optional[float] = None,
+                     output_fields: Sequence[str] = ('velocity', 'concentration'),
+                     step_control: Union[str, StepControl, None] = None) -> Dict[str, Any]:
+        """Advance one member per initial-conditions dict in a single vectorized run
+
+        All members share the time step; only the ensemble mean and spread of
+        `output_fields` are kept at the output cadence.
+        """
+        state = State.from_ensemble(initial_conditions, self.grid, self.dtype)
+        return self.execute(state, duration, dt, output_interval, step_control,
+                            lambda n: EnsembleRecorder(state, output_fields, n))
+
+    def run_amr(self, duration: float, dt: Optional[float],
+                initial_conditions: Dict[str, Any], refinement: Refinement,
+                output_interval: Optional[float] = None,
+                output_fields: Sequence[str] = DEFAULT_OUTPUT_FIELDS,
+                cfl: float = 0.5) -> Dict[str, Any]:
+        """Integrate on a block-structured adaptively refined grid
+
+        `dt` is the base-level step, subcycled on the finer levels; when it is
+        None the step is CFL-limited on every level and recomputed each base
+        step. Snapshots hold the synchronized base grid; the hierarchy stays
+        available as `self.hierarchy` (see AMRHierarchy.sample) and its cell
+        counts are returned under results['amr']. Initial conditions may be
+        callables of the cell-centre coordinates, sampled on every level.
+        """
+        if self.step_hooks or self.monitor is not None:
+            raise ValueError("Step hooks and invariant monitoring are not supported with AMR")
+        hierarchy = AMRHierarchy(self.config, refinement, self.grid, self.backend_name,
+                                 self.dtype)
+        hierarchy.initialize(initial_conditions)
+        self.hierarchy = hierarchy
+        state = hierarchy.composite(State.zeros(self.grid.padded_shape, self.dtype))
+        self.state = state
+        interval = output_interval if output_interval else duration
+        n_outputs = int(np.ceil(duration / interval - 1e-9)) + 1 if duration > 0 else 1
+        recorder = OutputRecorder(state, output_fields, n_outputs)
+        recorder.record(0.0, state)
+        initial_mass = float(np.sum(state.concentration[INTERIOR]))
+
+        t, steps = 0.0, 0
+        dt_min, dt_max = np.inf, 0.0
+        eps = 1e-12 * max(duration, 1.0)
+        next_output = min(interval, duration)
+        self.counter.start()
+        try:
+            while t < duration - eps:
+                with PROFILER.phase('step_control'):
+                    limit = dt if dt else hierarchy.stable_time_step(cfl)
+                taken = min(limit, next_output - t)
+                with PROFILER.phase('integrator_step'):
+                    hierarchy.advance(taken)
+                t += taken
+                steps += 1
+                dt_min, dt_max = min(dt_min, taken), max(dt_max, taken)
+                self.counter.tick()
+                PROFILER.step(steps, t, taken)
+                if steps % refinement.regrid_interval == 0 and t < duration - eps:
+                    hierarchy.regrid()
+                if t >= next_output - eps:
+                    with PROFILER.phase('output'):
+                        recorder.record(t, hierarchy.composite(state))
+                    next_output = min(next_output + interval, duration)
+        finally:
+            self.counter.stop()
+
+        results = self.snapshot(hierarchy.composite(state))
+        results.update(recorder.results())
+        results.update({'steps': steps, 'rejected_steps': 0,
+                        'dt_min': dt_min if dt_max else dt, 'dt_max': dt_max})
+        results['amr'] = hierarchy.summary()
+        results['initial_concentration'] = initial_mass
+        results['steps_per_second'] = self.steps_per_second
+        if PROFILER.enabled:
+            results['profile'] = PROFILER.as_dict()
+        return results
+
+    def execute(self, state: State, duration: float, dt: float,
+                output_interval: Optional[float],
+                step_control: Union[str, StepControl, None],
+                make_recorder, workers: int = 1,
+                checkpointer: Optional[Checkpointer] = None,
+                progress: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Step a prepared `state` and collect outputs through `make_recorder(n_outputs)`
+
+        `progress` is a restored checkpoint (t, step, dt_next, frames,
+        initial_mass) to continue from instead of t=0.
+        """
+        control = StepControl.resolve(step_control)
+        if control.diffusion not in ('explicit', 'implicit'):
+            raise ValueError(f"Unsupported diffusion treatment: {control.diffusion}")
+        self.state = state
+        interval = output_interval if output_interval else duration
+        n_outputs = int(np.ceil(duration / interval - 1e-9)) + 1 if duration > 0 else 1
+        recorder = make_recorder(n_outputs)
+        self.recorder, self.checkpointer = recorder, checkpointer
+        if progress is None:
+            initial_mass = np.sum(state.concentration[INTERIOR], axis=(-3, -2, -1))
+            recorder.record(0.0, state)
+        else:
+            initial_mass = progress['initial_mass']
+        self.initial_mass = initial_mass
+
+        if workers > 1 and (control.mode != 'fixed' or control.diffusion != 'explicit'
+                            or control.projection or state.members):
+            raise ValueError("Domain decomposition supports fixed-step explicit "
+                             "single-member runs only")
+        if workers > 1 and self.monitor is not None:
+            raise ValueError("Invariant monitoring is not supported with domain decomposition")
+        if workers > 1 and self.step_hooks:
+            raise ValueError("Step hooks are not supported with domain decomposition")
+        if self.monitor is not None:
+            self.monitor.start(state, progress['t'] if progress else 0.0,
+                               progress['step'] if progress else 0)
+
+        self.counter.start()
+        try:
+            if workers > 1:
+                stats = DomainDecomposition(self.config, self.grid, workers,
+                                            self.backend_name).run(
+                    state, duration, dt, interval, recorder, self.counter)
+            elif control.mode == 'fixed':
+                stats = self._run_fixed(state, duration, dt, interval, recorder, control,
+                                        progress)
+            elif control.mode in ('cfl', 'dopri'):
+                stats = self._run_adaptive(state, duration, dt, interval, recorder, control,
+                                           progress)
+            else:
+                raise ValueError(f"Unsupported step control mode: {control.mode}")
+        finally:
+            self.counter.stop()
+            if hasattr(recorder, 'close'):
+                recorder.close()
+
+        results = self.snapshot(state)
+        results.update(recorder.results())
+        results.update(stats)
+        if self.monitor is not None:
+            results['invariants'] = self.monitor.finish(state, duration, stats['steps'])
+        if control.projection:
+            solver = self.projection.solver
+            results['pressure_iterations'] = solver.total_iterations / max(solver.solves, 1)
+            results['pressure_residual'] = solver.last_residual
+        results['initial_concentration'] = initial_mass if state.members else float(initial_mass)
+        results['steps_per_second'] = self.steps_per_second
+        if PROFILER.enabled:
+            results['profile'] = PROFILER.as_dict()
+        return results
+
+    def make_integrator(self, state: State, control: StepControl):
+        """Build the stepper for `control` with buffers shaped like `state`"""
+        implicit = control.diffusion == 'implicit'
+        options = {'diffusion': not implicit, 'pressure': not control.projection}
+
+        def rhs(state: State, out: State) -> State:
+            return self.equations.rhs(state, self.config, out, **options)
+
+        if control.mode == 'dopri':
+            integrator = DormandPrinceIntegrator(rhs, self.apply_boundary, state,
+                                                 rtol=control.rtol, atol=control.atol)
+        else:
+            integrator = RK4Integrator(rhs, self.apply_boundary, state)
+        if implicit:
+            integrator = OperatorSplitIntegrator(integrator, make_diffusion_solver(self.grid),
+                                                 self.config, self.apply_boundary)
+        if control.projection:
+            self.projection = PressureProjection(self.grid, self.config, state,
+                                                 control.poisson_tol,
+                                                 control.poisson_max_cycles)
+            integrator = ProjectedIntegrator(integrator, self.projection)
+        return integrator
+
+    def end_step(self, state: State, t: float, step: int, dt: float, dt_next: float,
+                 integrator=None):
+        """Run the step hooks and the invariant monitor, then checkpoint if due"""
+        PROFILER.step(step, t, dt)
+        modified = False
+        for hook in self.step_hooks:
+            with PROFILER.phase(getattr(hook, '__name__', type(hook).__name__)):
+                modified |= bool(hook(state, t, step, dt))
+        if modified and integrator is not None:
+            integrator.reset()
+        if self.monitor is not None:
+            with PROFILER.phase('validation'):
+                self.monitor.check(state, t, step, dt)
+        if self.checkpointer is not None and self.checkpointer.due(t):
+            with PROFILER.phase('checkpoint'):
+                self.recorder.flush()
+                self.checkpointer.save(state, t=t, step=step, dt_next=dt_next,
+                                       frames=self.recorder.count,
+                                       initial_mass=self.initial_mass)
+
+    def _run_fixed(self, state: State, duration: float, dt: float, interval: float,
+                   recorder: OutputRecorder, control: StepControl,
+                   progress: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        integrator = self.make_integrator(state, control)
+        n_steps = int(round(duration / dt))
+        stride = max(1, int(round(interval / dt)))
+        start = progress['step'] if progress else 0
+        for step in range(start + 1, n_steps + 1):
+            with PROFILER.phase('integrator_step'):
+                integrator.step(state, dt)
+            self.counter.tick()
+            if step % stride == 0 or step == n_steps:
+                with PROFILER.phase('output'):
+                    recorder.record(step * dt, state)
+            self.end_step(state, step * dt, step, dt, dt, integrator)
+        return {'steps': n_steps, 'rejected_steps': 0, 'dt_min': dt, 'dt_max': dt}
+
+    def _run_adaptive(self, state: State, duration: float, dt: float, interval: float,
+                      recorder: OutputRecorder, control: StepControl,
+                      progress: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        integrator = self.make_integrator(state, control)
+        explicit_diffusion = control.diffusion == 'explicit'
+        t, steps, proposed = 0.0, 0, dt
+        if progress:
+            t, steps, proposed = progress['t'], progress['step'], progress['dt_next']
+        dt_min, dt_max = np.inf, 0.0
+        eps = 1e-12 * max(duration, 1.0)
+        next_output = min((np.floor(t / interval + 1e-9) + 1) * interval, duration)
+        while t < duration - eps:
+            with PROFILER.phase('step_control'):
+                limit = min(stable_time_step(state, self.config, control.cfl,
+                                             control.diffusion_number, explicit_diffusion),
+                            control.max_dt)
+            with PROFILER.phase('integrator_step'):
+                if control.mode == 'dopri':
+                    step_dt = min(proposed, limit, next_output - t)
+                    taken = integrator.step(state, step_dt, max_dt=limit)
+                    proposed = integrator.dt_next
+                else:
+                    taken = min(limit, next_output - t)
+                    integrator.step(state, taken)
+            t += taken
+            steps += 1
+            dt_min, dt_max = min(dt_min, taken), max(dt_max, taken)
+            self.counter.tick()
+            if t >= next_output - eps:
+                with PROFILER.phase('output'):
+                    recorder.record(t, state)
+                next_output = min(next_output + interval, duration)
+            self.end_step(state, t, steps, taken, proposed, integrator)
+        return {'steps': steps,
+                'rejected_steps': getattr(integrator, 'rejected', 0),
+                'dt_min': dt_min if dt_max else dt, 'dt_max': dt_max}
+
+    def snapshot(self, state: State) -> Dict[str, Any]:
+        """Final-state fields and cell-centre coordinates in the results layout"""
+        interior = state.interior()
+        axes = [(np.arange(n) + 0.5) * self.grid.dx for n in self.grid.shape]
+        x, y, z = np.meshgrid(*axes, indexing='ij')
+        velocity = interior.velocity.copy()
+        results = {'x': x, 'y': y, 'z': z, 'velocity': velocity,
+                   'v_x': velocity[..., 0, :, :, :],
+                   'v_y': velocity[..., 1, :, :, :],
+                   'v_z': velocity[..., 2, :, :, :]}
+        for name in State.SCALARS:
+            results[name] = getattr(interior, name).copy()
+        return results
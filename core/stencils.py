@@ -0,0 +1,158 @@
+# core/stencils.py
+import numpy as np
+from typing import Dict, Tuple
+
+# Fields carry one ghost layer per side on their last three axes; any
+# leading axes (vector components, ensemble members) are broadcast over.
+INTERIOR = (Ellipsis, slice(1, -1), slice(1, -1), slice(1, -1))
+
+
+def _shifted(axis: int, offset: int) -> Tuple:
+    """Interior slice shifted by `offset` cells along spatial `axis`"""
+    index = [slice(1, -1)] * 3
+    index[axis] = slice(1 + offset, offset - 1 if offset < 1 else None)
+    return (Ellipsis, *index)
+
+
+PLUS = tuple(_shifted(axis, 1) for axis in range(3))
+MINUS = tuple(_shifted(axis, -1) for axis in range(3))
+
+
+class Workspace:
+    """Named scratch buffers reused across right-hand-side evaluations"""
+
+    def __init__(self):
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.float64) -> np.ndarray:
+        """Return the scratch buffer `name`, allocating it only on first use"""
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+        return buffer
+
+    def clear(self):
+        self._buffers.clear()
+
+
+def interior_shape(padded_shape: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Shape of the interior region of a ghost-padded array"""
+    return tuple(padded_shape[:-3]) + tuple(n - 2 for n in padded_shape[-3:])
+
+
+def fill_ghosts(field: np.ndarray, boundary: str = 'periodic', sign: float = 1.0,
+                axes: Tuple[int, ...] = (0, 1, 2)):
+    """Fill the ghost layer in place for periodic or walled boundaries
+
+    For walls the ghost cell mirrors its interior neighbour times `sign`:
+    +1 gives a zero-gradient condition, -1 a zero value on the wall face.
+    Only the spatial `axes` listed are filled.
+    """
+    for axis in axes:
+        dim = field.ndim - 3 + axis
+        lo, hi = [slice(None)] * field.ndim, [slice(None)] * field.ndim
+        src_lo, src_hi = list(lo), list(hi)
+        lo[dim], hi[dim] = 0, -1
+        if boundary == 'periodic':
+            src_lo[dim], src_hi[dim] = -2, 1
+        elif boundary == 'wall':
+            src_lo[dim], src_hi[dim] = 1, -2
+        else:
+            raise ValueError(f"Unsupported boundary type: {boundary}")
+        field[tuple(lo)] = field[tuple(src_lo)]
+        field[tuple(hi)] = field[tuple(src_hi)]
+        if boundary == 'wall' and sign != 1.0:
+            field[tuple(lo)] *= sign
+            field[tuple(hi)] *= sign
+
+
+def laplacian(field: np.ndarray, dx: float, out: np.ndarray, tmp: np.ndarray,
+              scale: float = 1.0, accumulate: bool = False) -> np.ndarray:
+    """Seven-point Laplacian of `field` times `scale`, written into `out`
+
+    `out` and `tmp` have the interior shape; with `accumulate` the result
+    is added to `out` instead of overwriting it.
+    """
+    target = tmp if accumulate else out
+    np.add(field[PLUS[0]], field[MINUS[0]], out=target)
+    for axis in (1, 2):
+        np.add(target, field[PLUS[axis]], out=target)
+        np.add(target, field[MINUS[axis]], out=target)
+    coeff = scale / (dx * dx)
+    np.multiply(target, coeff, out=target)
+    if accumulate:
+        np.add(out, tmp, out=out)
+    np.multiply(field[INTERIOR], -6.0 * coeff, out=tmp)
+    np.add(out, tmp, out=out)
+    return out
+
+
+def gradient(field: np.ndarray, dx: float, out: np.ndarray, tmp: np.ndarray,
+             scale: float = 1.0, accumulate: bool = False) -> np.ndarray:
+    """Centred gradient of a scalar field into `out[..., axis, :, :, :]`"""
+    coeff = scale / (2.0 * dx)
+    for axis in range(3):
+        component = out[..., axis, :, :, :]
+        target = tmp if accumulate else component
+        np.subtract(field[PLUS[axis]], field[MINUS[axis]], out=target)
+        np.multiply(target, coeff, out=target)
+        if accumulate:
+            np.add(component, target, out=component)
+    return out
+
+
+def advection(velocity: np.ndarray, field: np.ndarray, dx: float,
+              out: np.ndarray, tmp: np.ndarray,
+              scale: float = 1.0, accumulate: bool = False) -> np.ndarray:
+    """Centred advective derivative (v·∇)f times `scale`, written into `out`
+
+    `field` may be a scalar field or the velocity itself; `tmp` must match
+    the interior shape of `field`.
+    """
+    vector = field.ndim == velocity.ndim
+    if not accumulate:
+        out.fill(0.0)
+    coeff = scale / (2.0 * dx)
+    for axis in range(3):
+        if vector:
+            v_axis = velocity[..., axis:axis + 1, 1:-1, 1:-1, 1:-1]
+        else:
+            v_axis = velocity[..., axis, 1:-1, 1:-1, 1:-1]
+        np.subtract(field[PLUS[axis]], field[MINUS[axis]], out=tmp)
+        np.multiply(tmp, v_axis, out=tmp)
+        np.multiply(tmp, coeff, out=tmp)
+        np.add(out, tmp, out=out)
+    return out
+
+
+def flux_divergence(velocity: np.ndarray, field: np.ndarray, dx: float,
+                    out: np.ndarray, flux: np.ndarray,
+                    scale: float = 1.0, accumulate: bool = False) -> np.ndarray:
+    """Conservative centred divergence ∇·(v f) times `scale`, into `out`
+
+    `flux` is a scratch buffer with the padded shape of `field`.
+    """
+    if not accumulate:
+        out.fill(0.0)
+    coeff = scale / (2.0 * dx)
+    for axis in range(3):
+        np.multiply(velocity[..., axis, :, :, :], field, out=flux)
+        np.multiply(flux, coeff, out=flux)
+        np.add(out, flux[PLUS[axis]], out=out)
+        np.subtract(out, flux[MINUS[axis]], out=out)
+    return out
+
+
+def divergence(velocity: np.ndarray, dx: float, out: np.ndarray, tmp: np.ndarray,
+               scale: float = 1.0, accumulate: bool = False) -> np.ndarray:
+    """Centred divergence of a ghost-padded vector field into `out`"""
+    if not accumulate:
+        out.fill(0.0)
+    coeff = scale / (2.0 * dx)
+    for axis in range(3):
+        component = velocity[..., axis, :, :, :]
+        np.subtract(component[PLUS[axis]], component[MINUS[axis]], out=tmp)
+        np.multiply(tmp, coeff, out=tmp)
+        np.add(out, tmp, out=out)
+    return out
@@ -0,0 +1,211 @@
+# core/sweep.py
+import csv
+import itertools
+import json
+import time
+import traceback
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+from .simulation import Simulation, StepControl
+from .shared import SharedArrays
+
+SUMMARY_FIELDS = ('final_mass', 'mass_error', 'max_speed')
+INDEX_COLUMNS = ('index', 'label', 'overrides', 'status', 'error', 'steps',
+                 'wall_time', 'steps_per_second') + SUMMARY_FIELDS
+
+
+@dataclass
+class SweepCase:
+    """One simulation of a sweep: a labelled config with its overrides"""
+    index: int
+    label: str
+    config: Any
+    overrides: Dict[str, Any] = field(default_factory=dict)
+
+
+def parameter_grid(configs: Dict[str, Any],
+                   overrides: Dict[str, Sequence[Any]]) -> List[SweepCase]:
+    """Cartesian product of override values applied to every labelled config
+
+    `configs` maps a label such as 'mars' to a BaseConfig; each case config
+    is a copy made by `with_overrides`, which rejects unknown parameters.
+    """
+    names = list(overrides)
+    cases = []
+    for label, base in configs.items():
+        for values in itertools.product(*(overrides[name] for name in names)):
+            case_overrides = dict(zip(names, values))
+            cases.append(SweepCase(len(cases), label,
+                                   base.with_overrides(case_overrides), case_overrides))
+    return cases
+
+
+class SweepStore:
+    """Index of finished sweep runs, appended to as results arrive
+
+    With a `path`, every record is appended to `index.csv` immediately and
+    the final fields of successful runs are written to `run_<index>.npz`.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path is not None else None
+        self.records: Dict[int, Dict[str, Any]] = {}
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, 'w', newline='') as f:
+                csv.writer(f).writerow(INDEX_COLUMNS)
+
+    @property
+    def index_path(self) -> Path:
+        return self.path / 'index.csv'
+
+    def field_path(self, index: int) -> Optional[Path]:
+        return self.path / f'run_{index:05d}.npz' if self.path is not None else None
+
+    def add(self, record: Dict[str, Any]):
+        self.records[record['index']] = record
+        if self.path is not None:
+            row = dict(record, overrides=json.dumps(record['overrides'], default=str))
+            with open(self.index_path, 'a', newline='') as f:
+                csv.writer(f).writerow([row.get(column, '') for column in INDEX_COLUMNS])
+
+    def failed(self) -> List[Dict[str, Any]]:
+        return [r for r in self.records.values() if r['status'] != 'ok']
+
+    def load_fields(self, index: int) -> Dict[str, np.ndarray]:
+        with np.load(self.field_path(index)) as data:
+            return dict(data)
+
+    def to_frame(self):
+        import pandas as pd
+        rows = [self.records[i] for i in sorted(self.records)]
+        return pd.DataFrame(rows, columns=INDEX_COLUMNS).set_index('index')
+
+
+# Per-worker context set once by the pool initializer
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(settings: Dict[str, Any], descriptors):
+    arrays, blocks = SharedArrays.attach(descriptors)
+    _worker.clear()
+    _worker.update(settings, shared=arrays, blocks=blocks)
+
+
+def _run_case(case: SweepCase, field_path: Optional[Path]) -> Dict[str, Any]:
+    """Run one case in a worker; failures and unphysical results become records"""
+    settings = _worker
+    record = {'index': case.index, 'label': case.label, 'overrides': case.overrides,
+              'status': 'ok', 'error': '', 'steps': 0, 'wall_time': 0.0,
+              'steps_per_second': 0.0}
+    started = time.perf_counter()
+    try:
+        initial_conditions = dict(settings['initial_conditions'])
+        initial_conditions.update(settings['shared'])
+        simulation = Simulation(case.config)
+        with np.errstate(all='ignore'):
+            results = simulation.run(settings['duration'], settings['dt'] or case.config.dt,
+                                     initial_conditions,
+                                     output_interval=settings['output_interval'],
+                                     output_fields=settings['output_fields'],
+                                     step_control=settings['step_control'])
+        final_mass = float(np.sum(results['concentration']))
+        record.update(steps=results['steps'], steps_per_second=results['steps_per_second'],
+                      final_mass=final_mass,
+                      mass_error=abs(final_mass - results['initial_concentration']),
+                      max_speed=float(np.max(np.abs(results['velocity']))))
+        if not all(np.all(np.isfinite(results[name]))
+                   for name in ('velocity', 'pressure', 'concentration')):
+            record.update(status='nan', error='Non-finite values in final state')
+        elif record['mass_error'] > settings['mass_rtol'] * abs(results['initial_concentration']):
+            # both boundaries conserve dust mass; drift means the run went unstable
+            record.update(status='diverged',
+                          error=f"Dust mass drifted from {results['initial_concentration']:.6g} "
+                                f"to {final_mass:.6g}")
+        elif field_path is not None:
+            np.savez(field_path, time=results['time'],
+                     **{name: results[name] for name in settings['store_fields']})
+    except Exception as exc:
+        record.update(status='failed', error=f"{type(exc).__name__}: {exc}",
+                      traceback=traceback.format_exc())
+    record['wall_time'] = time.perf_counter() - started
+    return record
+
+
+class SweepRunner:
+    """Runs a list of SweepCase simulations on a process pool
+
+    Array-valued initial conditions are published once through shared
+    memory instead of being pickled for every case. Records stream into the
+    SweepStore as runs finish; failed, NaN and diverged runs (final dust
+    mass off the initial mass by more than `mass_rtol`, relative) are
+    recorded and the sweep carries on.
+    """
+
+    def __init__(self, duration: float, initial_conditions: Dict[str, Any],
+                 dt: Optional[float] = None, output_interval: Optional[float] = None,
+                 step_control: Union[str, StepControl, None] = None,
+                 output_fields: Sequence[str] = ('concentration',),
+                 store_fields: Sequence[str] = ('velocity', 'concentration'),
+                 max_workers: Optional[int] = None, mass_rtol: float = 1e-6):
+        self.duration = duration
+        self.dt = dt
+        self.initial_conditions = initial_conditions
+        self.output_interval = output_interval
+        self.step_control = step_control
+        self.output_fields = tuple(output_fields)
+        self.store_fields = tuple(store_fields)
+        self.max_workers = max_workers
+        self.mass_rtol = mass_rtol
+
+    def _settings(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        scalars = {k: v for k, v in self.initial_conditions.items()
+                   if not isinstance(v, np.ndarray)}
+        arrays = {k: v for k, v in self.initial_conditions.items()
+                  if isinstance(v, np.ndarray)}
+        settings = {'duration': self.duration, 'dt': self.dt,
+                    'initial_conditions': scalars,
+                    'output_interval': self.output_interval,
+                    'output_fields': self.output_fields,
+                    'store_fields': self.store_fields,
+                    'step_control': self.step_control,
+                    'mass_rtol': self.mass_rtol}
+        return settings, arrays
+
+    def run(self, cases: Sequence[SweepCase],
+            store: Optional[SweepStore] = None) -> SweepStore:
+        """Run every case, in-process when max_workers is 0"""
+        store = store if store is not None else SweepStore()
+        settings, arrays = self._settings()
+        shared = SharedArrays()
+        try:
+            for key, array in arrays.items():
+                shared.publish(key, array)
+            if self.max_workers == 0:
+                _init_worker(settings, shared.descriptors)
+                for case in cases:
+                    store.add(_run_case(case, store.field_path(case.index)))
+                blocks = _worker.pop('blocks')
+                _worker.clear()
+                for block in blocks:
+                    block.close()
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers,
+                                         initializer=_init_worker,
+                                         initargs=(settings, shared.descriptors)) as pool:
+                    futures = {pool.submit(_run_case, case, store.field_path(case.index)): case
+                               for case in cases}
+                    for future in as_completed(futures):
+                        case = futures[future]
+                        try:
+                            store.add(future.result())
+                        except Exception as exc:  # worker died or result failed to unpickle
+                            store.add({'index': case.index, 'label': case.label,
+                                       'overrides': case.overrides, 'status': 'failed',
+                                       'error': f"{type(exc).__name__}: {exc}"})
+        finally:
+            shared.close()
+        return store
@@ -30,6 +30,34 @@ class ModelValidator:
         
         return True
     
+    @staticmethod
+    def validate_input_batch(batch: Dict[str, np.ndarray]) -> np.ndarray:
+        """Vectorized validate_input_data over columns of readings
+
+        Returns a boolean mask of the readings that satisfy the same
+        physical constraints (and are finite), instead of raising on the
+        first bad one; missing fields still raise ValueError.
+        """
+        required_fields = ['velocity', 'pressure', 'temperature', 
+                         'humidity', 'concentration']
+        
+        if not all(field in batch for field in required_fields):
+            raise ValueError(f"Missing required fields: {required_fields}")
+        
+        velocity = np.asarray(batch['velocity'], dtype=float)
+        pressure = np.asarray(batch['pressure'], dtype=float)
+        temperature = np.asarray(batch['temperature'], dtype=float)
+        humidity = np.asarray(batch['humidity'], dtype=float)
+        concentration = np.asarray(batch['concentration'], dtype=float)
+        
+        valid = np.all(np.isfinite(velocity.reshape(len(pressure), -1)), axis=1)
+        valid &= pressure > 0
+        valid &= temperature > 0
+        valid &= (humidity >= 0) & (humidity <= 1)
+        valid &= concentration >= 0
+        
+        return valid
+    
     @staticmethod
     def validate_simulation_results(results: Dict[str, Any]) -> bool:
         """Validate simulation results for physical consistency"""
@@ -0,0 +1,197 @@
+# data/columnar.py
+import hashlib
+import json
+import os
+import shutil
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+META = 'meta.json'
+TIME_COLUMN = 'timestamp'
+
+
+def source_signature(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    return {'path': str(path.resolve()), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def cache_directory(cache_dir: Path, source: Path) -> Path:
+    """One cache directory per source path; its meta records mtime and size"""
+    digest = hashlib.sha1(str(source.resolve()).encode()).hexdigest()[:12]
+    return cache_dir / f'{source.stem}-{digest}'
+
+
+class _ColumnWriter:
+    """Appends typed chunks of one column to a raw binary file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.kind: Optional[str] = None
+        self.dtype: Optional[np.dtype] = None
+        self.categories: Dict[Any, int] = {}
+        self.rows = 0
+
+    @staticmethod
+    def _kind(series: pd.Series) -> str:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return 'datetime'
+        if pd.api.types.is_bool_dtype(series):
+            return 'bool'
+        if pd.api.types.is_integer_dtype(series):
+            return 'int'
+        if pd.api.types.is_float_dtype(series):
+            return 'float'
+        return 'category'
+
+    def _promote_to_float(self):
+        """An integer column gained missing values in a later chunk"""
+        data = np.fromfile(self.path, dtype=np.int64).astype(np.float64)
+        data.tofile(self.path)
+        self.kind, self.dtype = 'float', np.dtype(np.float64)
+
+    def _promote_to_category(self):
+        """A typed column gained text (or another type) in a later chunk
+
+        The rows written so far become categories holding their values, as
+        pandas keeps them in a mixed object column.
+        """
+        written = pd.Series(np.fromfile(self.path, dtype=self.dtype))
+        self.kind, self.dtype = 'category', np.dtype(np.int32)
+        self._codes(written).tofile(self.path)
+
+    def _codes(self, series: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(series)
+        uniques = [value.item() if isinstance(value, np.generic) else value
+                   for value in uniques]
+        lookup = np.array([self.categories.setdefault(value, len(self.categories))
+                           for value in uniques] + [-1], dtype=np.int32)
+        return lookup[codes]
+
+    def append(self, series: pd.Series):
+        kind = self._kind(series)
+        if self.kind is None:
+            self.kind = kind
+            self.dtype = np.dtype({'datetime': 'datetime64[ns]', 'bool': bool, 'int': np.int64,
+                                   'float': np.float64, 'category': np.int32}[kind])
+        elif kind != self.kind:
+            if self.kind == 'int' and kind == 'float':
+                self._promote_to_float()
+            elif not (self.kind == 'float' and kind == 'int') and self.kind != 'category':
+                self._promote_to_category()
+        if self.kind == 'category':
+            values = self._codes(series)
+        elif self.kind == 'datetime':
+            values = series.to_numpy(dtype='datetime64[ns]')
+        else:
+            values = series.to_numpy(dtype=self.dtype)
+        with open(self.path, 'ab') as f:
+            np.ascontiguousarray(values, dtype=self.dtype).tofile(f)
+        self.rows += len(values)
+
+    def meta(self) -> Dict[str, Any]:
+        meta = {'kind': self.kind, 'dtype': self.dtype.str}
+        if self.kind == 'category':
+            meta['categories'] = list(self.categories)
+        return meta
+
+
+class ColumnarTable:
+    """Typed on-disk column files with a per-block timestamp index
+
+    Every column is one raw array that is memory-mapped on read. Rows are
+    grouped into fixed-size blocks whose timestamp min/max make up the
+    index, so a date-range query only touches the blocks that can match.
+    Text columns are stored as int32 category codes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path / META) as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self.block_rows = self.meta['block_rows']
+        self.columns = list(self.meta['columns'])
+        self._maps: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, source: Path, target: Path, chunks: Iterator[pd.DataFrame],
+              block_rows: int = 65536) -> 'ColumnarTable':
+        """Convert `chunks` of `source` in one streaming pass; written atomically"""
+        tmp = target.with_name(target.name + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        writers: Dict[str, _ColumnWriter] = {}
+        for chunk in chunks:
+            for name in chunk.columns:
+                if name not in writers:
+                    writers[name] = _ColumnWriter(tmp / f'{len(writers):04d}.bin')
+                writers[name].append(chunk[name])
+        rows = next(iter(writers.values())).rows if writers else 0
+        blocks = []
+        if TIME_COLUMN in writers:
+            times = np.fromfile(writers[TIME_COLUMN].path, dtype=np.int64)
+            for start in range(0, rows, block_rows):
+                block = times[start:start + block_rows]
+                valid = block[block != np.iinfo(np.int64).min]  # NaT
+                blocks.append([int(valid.min()), int(valid.max())] if len(valid) else None)
+        meta = {'source': source_signature(source), 'rows': rows, 'block_rows': block_rows,
+                'columns': {name: dict(writer.meta(), file=writer.path.name)
+                            for name, writer in writers.items()},
+                'time_index': blocks if TIME_COLUMN in writers else None}
+        (tmp / META).write_text(json.dumps(meta, default=str))
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+        return cls(target)
+
+    def is_current(self, source: Path) -> bool:
+        return self.meta['source'] == source_signature(source)
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._maps:
+            info = self.meta['columns'][name]
+            self._maps[name] = (np.memmap(self.path / info['file'], dtype=info['dtype'],
+                                          mode='r', shape=(self.rows,))
+                                if self.rows else np.empty(0, dtype=info['dtype']))
+        return self._maps[name]
+
+    def block_ranges(self, date_range: Optional[Tuple[Any, Any]] = None) -> List[Tuple[int, int]]:
+        """Row ranges of the blocks that may hold timestamps in `date_range`"""
+        ranges = [(start, min(start + self.block_rows, self.rows))
+                  for start in range(0, self.rows, self.block_rows)]
+        if date_range is None:
+            return ranges
+        if self.meta['time_index'] is None:
+            raise ValueError(f"No '{TIME_COLUMN}' column to filter by date range")
+        start, end = (pd.Timestamp(value).value for value in date_range)
+        return [rows for rows, bounds in zip(ranges, self.meta['time_index'])
+                if bounds is not None and bounds[0] <= end and bounds[1] >= start]
+
+    def read(self, start: int, stop: int,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Rows [start, stop) decoded back into their pandas dtypes"""
+        data = {}
+        for name in columns or self.columns:
+            info = self.meta['columns'][name]
+            values = np.array(self.column(name)[start:stop])
+            if info['kind'] == 'category':
+                values = pd.Categorical.from_codes(values, info['categories']).astype(object)
+            data[name] = values
+        return pd.DataFrame(data, index=pd.RangeIndex(start, stop))
+
+    def iter_blocks(self, date_range: Optional[Tuple[Any, Any]] = None,
+                    columns: Optional[Sequence[str]] = None,
+                    chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """DataFrames of at most `chunk_rows` rows, filtered to `date_range`"""
+        step = chunk_rows or self.block_rows
+        if date_range is not None and columns is not None and TIME_COLUMN not in columns:
+            columns = [TIME_COLUMN] + list(columns)
+        for first, last in self.block_ranges(date_range):
+            for start in range(first, last, step):
+                frame = self.read(start, min(start + step, last), columns)
+                if date_range is not None:
+                    start_date, end_date = pd.to_datetime(list(date_range))
+                    frame = frame[(frame[TIME_COLUMN] >= start_date) &
+                                  (frame[TIME_COLUMN] <= end_date)]
+                yield frame
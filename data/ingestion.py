@@ -0,0 +1,390 @@
+# data/ingestion.py
+import asyncio
+import contextlib
+import json
+import queue
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Dict, Any, List, Optional, Sequence, Union
+from ..core.equations import State, Grid
+from ..core.validation import ModelValidator
+
+TIME_COLUMN = 'timestamp'
+COORDINATES = ('x', 'y', 'z')
+OBSERVED_FIELDS = ('velocity', 'pressure', 'temperature', 'humidity', 'concentration')
+# Pressure is validated but not nudged by default: it has no prognostic
+# equation here, and point corrections to it act as spurious forces
+NUDGED_FIELDS = ('velocity', 'temperature', 'humidity', 'concentration')
+
+
+def parse_reading(line: Union[str, bytes]) -> Dict[str, Any]:
+    """One station reading from a JSON line
+
+    A reading carries a `timestamp`, the station position `x`, `y`, `z` in
+    metres and the OBSERVED_FIELDS, velocity as a 3-vector.
+    """
+    reading = json.loads(line)
+    if not isinstance(reading, dict) or not all(name in reading for name in COORDINATES):
+        raise ValueError("Reading needs a JSON object with x, y and z")
+    return reading
+
+
+async def tcp_lines(host: str, port: int, reconnect_delay: float = 1.0) -> AsyncIterator[str]:
+    """Lines from a station gateway socket, reconnecting when it drops"""
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(reconnect_delay)
+            continue
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                yield line.decode()
+        finally:
+            writer.close()
+        await asyncio.sleep(reconnect_delay)
+
+
+async def tail_lines(path: Union[str, Path], poll_interval: float = 0.1,
+                     from_start: bool = False) -> AsyncIterator[str]:
+    """Complete lines appended to a file, following truncation and rotation"""
+    path = Path(path)
+    while not path.exists():
+        await asyncio.sleep(poll_interval)
+    f = open(path)
+    if not from_start:
+        f.seek(0, 2)
+    partial = ''
+    try:
+        while True:
+            line = f.readline()
+            if line:
+                partial += line
+                if partial.endswith('\n'):
+                    yield partial
+                    partial = ''
+                continue
+            try:
+                rotated = path.stat().st_size < f.tell()
+            except FileNotFoundError:
+                rotated = False
+            if rotated:
+                f.close()
+                f = open(path)
+                partial = ''
+            await asyncio.sleep(poll_interval)
+    finally:
+        f.close()
+
+
+async def synthetic_readings(config, extent: Sequence[float], stations: int = 16,
+                             rate: float = 100.0, count: Optional[int] = None,
+                             invalid_fraction: float = 0.0,
+                             seed: Optional[int] = 0) -> AsyncIterator[str]:
+    """Local stand-in feed: noisy readings around the planet's base state
+
+    `rate` readings per second from `stations` fixed random positions inside
+    a domain of size `extent`; `invalid_fraction` of them carry a humidity
+    outside [0, 1] to exercise validation.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.random((stations, 3)) * np.asarray(extent)
+    sent = 0
+    while count is None or sent < count:
+        x, y, z = positions[sent % stations]
+        humidity = min(max(config.humidity_base * (1 + 0.05 * rng.standard_normal()), 0.0), 1.0)
+        if rng.random() < invalid_fraction:
+            humidity = 2.0
+        reading = {
+            TIME_COLUMN: time.time(), 'x': x, 'y': y, 'z': z,
+            'velocity': (rng.standard_normal(3) * 0.1).tolist(),
+            'pressure': config.pressure_base * (1 + 1e-4 * rng.standard_normal()),
+            'temperature': config.temperature_base + rng.standard_normal(),
+            'humidity': humidity,
+            'concentration': float(rng.lognormal(-7.0, 0.5)),
+        }
+        yield json.dumps(reading) + '\n'
+        sent += 1
+        await asyncio.sleep(1.0 / rate)
+
+
+@dataclass
+class Increment:
+    """Validated observations of one batch, averaged per grid cell"""
+    cells: np.ndarray  # (n, 3) interior cell indices
+    values: Dict[str, np.ndarray]  # velocity (n, 3), scalars (n,)
+    readings: int
+    latest: Optional[float] = None
+
+
+@dataclass
+class IngestionStats:
+    received: int = 0
+    malformed: int = 0
+    rejected: int = 0
+    outside: int = 0
+    batches: int = 0
+    enqueued: int = 0  # readings handed to the solver queue
+    dropped: int = 0  # readings lost to a full solver queue
+    applied: int = 0  # readings nudged into the state
+    reader_waits: int = 0  # times the reader waited on a full batch buffer
+    max_queue_depth: int = 0
+    latest: Optional[float] = None  # newest reading timestamp seen
+    errors: List[str] = field(default_factory=list)
+
+
+class SensorIngestion:
+    """Asyncio ingestion of station readings into a bounded solver queue
+
+    The event loop runs in a background thread: a reader task parses lines
+    from `source` into a bounded buffer (awaiting, and so pushing back on a
+    socket, when it is full), and a batcher validates up to `batch_size`
+    readings at a time, or whatever arrived within `batch_timeout`, with
+    ModelValidator and averages them per grid cell. Increments go into a
+    thread-safe queue of `queue_size` without ever waiting; when it is full
+    the oldest (or, with drop_policy='newest', the new) increment is dropped
+    and counted. The solver side only ever calls the non-blocking `drain`.
+    """
+
+    def __init__(self, source: AsyncIterable[str], grid: Grid, batch_size: int = 64,
+                 batch_timeout: float = 0.5, queue_size: int = 16,
+                 drop_policy: str = 'oldest', buffer_size: Optional[int] = None):
+        if drop_policy not in ('oldest', 'newest'):
+            raise ValueError(f"Unsupported drop policy: {drop_policy}")
+        self.source = source
+        self.grid = grid
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.drop_policy = drop_policy
+        self.buffer_size = buffer_size or 4 * batch_size
+        self.increments: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.stats = IngestionStats()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    def start(self) -> 'SensorIngestion':
+        self._thread = threading.Thread(target=self._serve, name='sensor-ingestion', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        if self.running and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __enter__(self) -> 'SensorIngestion':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self._run())
+            self._started.set()
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._started.set()
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    async def _run(self):
+        buffer: asyncio.Queue = asyncio.Queue(maxsize=self.buffer_size)
+        done = object()
+
+        async def read():
+            try:
+                async for line in self.source:
+                    self.stats.received += 1
+                    try:
+                        reading = parse_reading(line)
+                    except (ValueError, TypeError):
+                        self.stats.malformed += 1
+                        continue
+                    if buffer.full():
+                        self.stats.reader_waits += 1
+                    await buffer.put(reading)
+            except Exception as exc:  # a failing source ends ingestion, not the run
+                self.stats.errors.append(repr(exc))
+            await buffer.put(done)
+
+        reader = asyncio.get_running_loop().create_task(read())
+        try:
+            finished = False
+            while not finished:
+                batch = []
+                deadline = time.monotonic() + self.batch_timeout
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        reading = await asyncio.wait_for(buffer.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if reading is done:
+                        finished = True
+                        break
+                    batch.append(reading)
+                if batch:
+                    self._publish(self._increment(batch))
+        finally:
+            reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await reader
+
+    @staticmethod
+    def _row(reading: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The reading's fields as floats (velocity a 3-vector), None if malformed"""
+        try:
+            row = {name: float(reading[name]) for name in OBSERVED_FIELDS + COORDINATES
+                   if name != 'velocity'}
+            row['velocity'] = np.asarray(reading['velocity'], dtype=float).reshape(3)
+        except (KeyError, ValueError, TypeError):
+            return None
+        return row
+
+    def _increment(self, batch: List[Dict[str, Any]]) -> Optional[Increment]:
+        """Validate a batch and average its readings per grid cell
+
+        Malformed readings (missing fields, values that are not numbers)
+        are counted as rejected and the increment is built from the rest.
+        """
+        self.stats.batches += 1
+        rows = [self._row(reading) for reading in batch]
+        self.stats.rejected += sum(row is None for row in rows)
+        batch = [reading for reading, row in zip(batch, rows) if row is not None]
+        rows = [row for row in rows if row is not None]
+        if not rows:
+            return None
+        columns = {name: np.array([row[name] for row in rows])
+                   for name in OBSERVED_FIELDS + COORDINATES}
+        valid = ModelValidator.validate_input_batch(columns)
+        cells = np.floor(np.stack([columns[name] for name in COORDINATES], axis=1)
+                         / self.grid.dx).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < np.asarray(self.grid.shape)), axis=1)
+        self.stats.rejected += int(np.count_nonzero(~valid))
+        self.stats.outside += int(np.count_nonzero(valid & ~inside))
+        keep = valid & inside
+        if not keep.any():
+            return None
+        unique, inverse = np.unique(cells[keep], axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        counts = np.bincount(inverse, minlength=len(unique)).astype(float)
+        values = {}
+        for name in OBSERVED_FIELDS:
+            data = columns[name][keep]
+            if data.ndim == 1:
+                values[name] = np.bincount(inverse, data, len(unique)) / counts
+            else:
+                values[name] = np.stack([np.bincount(inverse, data[:, c], len(unique))
+                                         for c in range(data.shape[1])], axis=1) / counts[:, None]
+        times = [reading.get(TIME_COLUMN) for reading in batch]
+        latest = max((t for t in times if isinstance(t, (int, float))), default=None)
+        return Increment(unique, values, int(np.count_nonzero(keep)), latest)
+
+    def _publish(self, increment: Optional[Increment]):
+        if increment is None:
+            return
+        if increment.latest is not None:
+            self.stats.latest = max(self.stats.latest or increment.latest, increment.latest)
+        try:
+            self.increments.put_nowait(increment)
+        except queue.Full:
+            if self.drop_policy == 'newest':
+                self.stats.dropped += increment.readings
+                return
+            try:
+                self.stats.dropped += self.increments.get_nowait().readings
+            except queue.Empty:
+                pass
+            try:
+                self.increments.put_nowait(increment)
+            except queue.Full:
+                self.stats.dropped += increment.readings
+                return
+        self.stats.enqueued += increment.readings
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.increments.qsize())
+
+    def drain(self, max_items: Optional[int] = None) -> List[Increment]:
+        """Queued increments, without waiting"""
+        items = []
+        while max_items is None or len(items) < max_items:
+            try:
+                items.append(self.increments.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+
+class Nudging:
+    """Simulation step hook relaxing the state towards queued observations
+
+    Each observed cell moves a fraction min(1, dt / relaxation_time) of the
+    way to the observation per step (Newtonian nudging; relaxation_time=0
+    inserts the values directly). Dust mass added or removed this way is
+    reported to the InvariantMonitor of `simulation`, looked up at every
+    step so monitoring may be enabled or replaced later, or else to a
+    fixed `monitor`.
+    """
+
+    def __init__(self, ingestion: SensorIngestion, relaxation_time: float = 60.0,
+                 fields: Sequence[str] = NUDGED_FIELDS, boundary: str = 'periodic',
+                 monitor=None, max_increments: Optional[int] = None, simulation=None):
+        unknown = set(fields) - set(OBSERVED_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot nudge unobserved fields: {sorted(unknown)}")
+        self.ingestion = ingestion
+        self.relaxation_time = relaxation_time
+        self.fields = tuple(fields)
+        self.boundary = boundary
+        self._monitor = monitor
+        self.simulation = simulation
+        self.max_increments = max_increments
+
+    @property
+    def monitor(self):
+        if self.simulation is not None:
+            return self.simulation.monitor
+        return self._monitor
+
+    def __call__(self, state: State, t: float, step: int, dt: float) -> bool:
+        increments = self.ingestion.drain(self.max_increments)
+        if not increments:
+            return False
+        gain = min(1.0, dt / self.relaxation_time) if self.relaxation_time > 0 else 1.0
+        monitor = self.monitor
+        for increment in increments:
+            i, j, k = (increment.cells + 1).T
+            for name in self.fields:
+                target = getattr(state, name)
+                if name == 'velocity':
+                    current = target[..., :, i, j, k]
+                    delta = gain * (increment.values[name].T - current)
+                    target[..., :, i, j, k] = current + delta
+                else:
+                    current = target[..., i, j, k]
+                    delta = gain * (increment.values[name] - current)
+                    target[..., i, j, k] = current + delta
+                    if name == 'concentration' and monitor is not None:
+                        monitor.add_source(delta.sum(axis=-1))
+            self.ingestion.stats.applied += increment.readings
+        state.apply_boundary(self.boundary)
+        return True
@@ -1,36 +1,74 @@
 # data/loader.py
+import json
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, Iterator, Sequence
 from pathlib import Path
+from .columnar import ColumnarTable, cache_directory, META, TIME_COLUMN
 
 class DataLoader:
-    """Data loading and validation utilities"""
-    
-    def __init__(self, data_dir: str):
+    """Data loading and validation utilities
+
+    Measurement files are converted once into a typed columnar cache under
+    `cache_dir` (default `<data_dir>/.cache`); later loads memory-map it
+    and only read the row blocks a date range can match. The cache is
+    rebuilt whenever the source file's mtime or size changes.
+    """
+
+    def __init__(self, data_dir: str, cache_dir: Optional[str] = None,
+                 block_rows: int = 65536, read_chunk_rows: int = 1_000_000):
         self.data_dir = Path(data_dir)
-    
-    def load_measurement_data(self, 
-                            filename: str, 
-                            date_range: Optional[Tuple[str, str]] = None) -> pd.DataFrame:
-        """Load and validate measurement data"""
-        filepath = self.data_dir / filename
-        
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else self.data_dir / '.cache'
+        self.block_rows = block_rows
+        self.read_chunk_rows = read_chunk_rows
+
+    def _read_source(self, filepath: Path) -> Iterator[pd.DataFrame]:
+        """Parse the source file in chunks (CSV) or whole (Excel)"""
         if filepath.suffix == '.csv':
-            data = pd.read_csv(filepath, parse_dates=['timestamp'])
+            yield from pd.read_csv(filepath, parse_dates=[TIME_COLUMN],
+                                   chunksize=self.read_chunk_rows)
         elif filepath.suffix in ['.xlsx', '.xls']:
-            data = pd.read_excel(filepath, parse_dates=['timestamp'])
+            yield pd.read_excel(filepath, parse_dates=[TIME_COLUMN])
         else:
             raise ValueError(f"Unsupported file format: {filepath.suffix}")
-        
-        # Filter by date range if provided
-        if date_range:
-            start_date, end_date = pd.to_datetime(date_range)
-            data = data[(data['timestamp'] >= start_date) & 
-                       (data['timestamp'] <= end_date)]
-        
-        return data
-    
+
+    def columnar(self, filename: str) -> ColumnarTable:
+        """Columnar cache of `filename`, converting it first if missing or stale"""
+        filepath = self.data_dir / filename
+        if filepath.suffix not in ['.csv', '.xlsx', '.xls']:
+            raise ValueError(f"Unsupported file format: {filepath.suffix}")
+        target = cache_directory(self.cache_dir, filepath)
+        if (target / META).exists():
+            table = ColumnarTable(target)
+            if table.is_current(filepath):
+                return table
+        return ColumnarTable.build(filepath, target, self._read_source(filepath),
+                                   self.block_rows)
+
+    def load_measurement_data(self,
+                            filename: str,
+                            date_range: Optional[Tuple[str, str]] = None,
+                            columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Load and validate measurement data"""
+        table = self.columnar(filename)
+        frames = list(table.iter_blocks(date_range, columns))
+        if not frames:
+            return table.read(0, 0, columns)
+        data = pd.concat(frames) if len(frames) > 1 else frames[0]
+        return data.reset_index(drop=True)
+
+    def iter_measurement_data(self,
+                              filename: str,
+                              date_range: Optional[Tuple[str, str]] = None,
+                              columns: Optional[Sequence[str]] = None,
+                              chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Yield measurement data in chunks of at most `chunk_rows` rows
+
+        Only one chunk is decoded at a time, so files larger than memory can
+        be processed; the date-range filter is applied per chunk.
+        """
+        yield from self.columnar(filename).iter_blocks(date_range, columns, chunk_rows)
+
     def load_configuration(self, planet: str) -> Dict:
         """Load planet-specific configuration"""
         config_path = self.data_dir / 'configs' / f'{planet.lower()}_config.json'
@@ -1,36 +1,229 @@
 # data/preprocessor.py
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from typing import Tuple, List, Optional
+from typing import Dict, Iterable, Tuple, List, Optional, Sequence
+
+TIME_COLUMN = 'timestamp'
+WIND_COMPONENTS = ('wind_u', 'wind_v')
 
 class DataPreprocessor:
-    """Data preprocessing pipeline"""
-    
+    """Data preprocessing pipeline
+
+    Numeric columns are forward-filled, standardised and followed by derived
+    features (wind speed from `WIND_COMPONENTS`, time-of-day encoding from
+    the timestamp). The same array kernels serve the whole-DataFrame path
+    and the streaming path, which partial-fits the scaler chunk by chunk and
+    writes float32 features straight into a preallocated array or memmap.
+    """
+
     def __init__(self):
         self.scalers = {}
-    
+        self.feature_columns: List[str] = []
+        self.derived_columns: List[str] = []
+        self._last: Optional[np.ndarray] = None  # forward-fill carry between chunks
+        # NaN-aware per-column running statistics behind the feature scaler
+        self._count: Optional[np.ndarray] = None
+        self._mean: Optional[np.ndarray] = None
+        self._m2: Optional[np.ndarray] = None
+
+    @property
+    def output_columns(self) -> List[str]:
+        return self.feature_columns + self.derived_columns
+
+    def reset(self):
+        self.scalers = {}
+        self.feature_columns, self.derived_columns = [], []
+        self._last = None
+        self._count = self._mean = self._m2 = None
+
+    def _select_columns(self, data: pd.DataFrame):
+        if self.feature_columns:
+            return
+        self.feature_columns = [name for name in data.columns
+                                if name != TIME_COLUMN
+                                and pd.api.types.is_numeric_dtype(data[name])
+                                and not pd.api.types.is_bool_dtype(data[name])]
+        self.derived_columns = []
+        if all(name in self.feature_columns for name in WIND_COMPONENTS):
+            self.derived_columns.append('wind_speed')
+        if TIME_COLUMN in data.columns:
+            self.derived_columns += ['hour_sin', 'hour_cos']
+        from sklearn.preprocessing import StandardScaler
+        self.scalers['features'] = StandardScaler()
+
+    def column_statistics(self, names: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean and scale standardising each named output column
+
+        Derived columns are not standardised and get 0 and 1, so for every
+        output column raw = mean + scale * preprocessed.
+        """
+        unknown = [name for name in names if name not in self.output_columns]
+        if unknown:
+            raise ValueError(f"Not preprocessed output columns: {unknown}")
+        scaler = self.scalers['features']
+        mean, scale = np.zeros(len(names)), np.ones(len(names))
+        for k, name in enumerate(names):
+            if name in self.feature_columns:
+                index = self.feature_columns.index(name)
+                mean[k], scale[k] = scaler.mean_[index], scaler.scale_[index]
+        return mean, scale
+
+    def _values(self, data: pd.DataFrame) -> np.ndarray:
+        return data[self.feature_columns].to_numpy(dtype=np.float64)
+
     def process_file(self, filepath: str) -> Tuple[pd.DataFrame, Dict]:
         """Process input file (CSV or Excel)"""
         if filepath.endswith('.csv'):
             data = pd.read_csv(filepath)
         else:
             data = pd.read_excel(filepath)
-        
+
         return self.preprocess_data(data)
-    
+
     def preprocess_data(self, data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
         """Main preprocessing pipeline"""
-        # Handle missing values
-        data = self._handle_missing_values(data)
-        
-        # Scale features
-        scaled_data = self._scale_features(data)
-        
-        # Calculate derived features
-        derived_features = self._calculate_derived_features(data)
-        
-        # Combine all features
-        final_data = pd.concat([scaled_data, derived_features], axis=1)
-        
-        return final_data, self.scalers
\ No newline at end of file
+        self.reset()
+        self.partial_fit(data)
+        out = np.empty((len(data), len(self.output_columns)), dtype=np.float32)
+        self.transform_into(data, out)
+        final_data = pd.DataFrame(out, columns=self.output_columns, index=data.index)
+
+        return final_data, self.scalers
+
+    def partial_fit(self, chunk: pd.DataFrame):
+        """Update the scaler statistics with one chunk (missing values ignored)
+
+        Count, mean and sum of squared deviations are kept per column and
+        merged with Chan's formula, so a column that is entirely missing in
+        one chunk keeps the statistics of the others and the result does
+        not depend on how the rows are chunked.
+        """
+        self._select_columns(chunk)
+        if not len(chunk):
+            return
+        values = self._values(chunk)
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, np.nansum(values, axis=0) / np.maximum(count, 1), 0.0)
+        m2 = np.where(valid, values - mean, 0.0)
+        m2 = np.sum(m2 * m2, axis=0)
+        if self._count is None:
+            self._count, self._mean, self._m2 = count, mean, m2
+        else:
+            total = self._count + count
+            weight = np.divide(count, total, out=np.zeros_like(total), where=total > 0)
+            delta = mean - self._mean
+            self._m2 = self._m2 + m2 + delta * delta * self._count * weight
+            self._mean = self._mean + delta * weight
+            self._count = total
+        self._update_scaler()
+
+    def _update_scaler(self):
+        """Expose the running statistics through the fitted StandardScaler attributes"""
+        scaler = self.scalers['features']
+        variance = np.divide(self._m2, self._count, out=np.zeros_like(self._m2),
+                             where=self._count > 0)
+        scale = np.sqrt(variance)
+        scale[scale == 0.0] = 1.0  # constant or never-observed columns
+        scaler.n_features_in_ = len(self.feature_columns)
+        scaler.n_samples_seen_ = self._count.astype(np.int64)
+        scaler.mean_ = self._mean.copy()
+        scaler.var_ = variance
+        scaler.scale_ = scale
+
+    def transform_into(self, chunk: pd.DataFrame, out: np.ndarray) -> int:
+        """Write the preprocessed rows of `chunk` into `out[:len(chunk)]`"""
+        n, k = len(chunk), len(self.feature_columns)
+        values = self._handle_missing_values(self._values(chunk))
+        derived = out[:n, k:]
+        self._calculate_derived_features(chunk, values, derived)
+        self._scale_features(values, out[:n, :k])
+        return n
+
+    def _handle_missing_values(self, values: np.ndarray) -> np.ndarray:
+        """Forward-fill each column, continuing from the previous chunk
+
+        Gaps before a column's first observation are left as NaN and become
+        the column mean (0 after scaling).
+        """
+        if len(values) == 0:
+            return values
+        carried = self._last is not None
+        if carried:
+            values = np.vstack([self._last, values])
+        valid = ~np.isnan(values)
+        index = np.where(valid, np.arange(len(values))[:, None], 0)
+        np.maximum.accumulate(index, axis=0, out=index)
+        filled = np.take_along_axis(values, index, axis=0)
+        self._last = filled[-1:].copy()
+        return filled[1:] if carried else filled
+
+    def _scale_features(self, values: np.ndarray, out: np.ndarray):
+        scaler = self.scalers['features']
+        np.subtract(values, scaler.mean_, out=values)
+        np.divide(values, scaler.scale_, out=values)
+        np.nan_to_num(values, copy=False, nan=0.0)
+        out[...] = values
+
+    def _calculate_derived_features(self, chunk: pd.DataFrame, values: np.ndarray,
+                                    out: np.ndarray):
+        column = 0
+        if 'wind_speed' in self.derived_columns:
+            u, v = (self.feature_columns.index(name) for name in WIND_COMPONENTS)
+            out[:, column] = np.nan_to_num(np.hypot(values[:, u], values[:, v]))
+            column += 1
+        if 'hour_sin' in self.derived_columns:
+            times = pd.to_datetime(chunk[TIME_COLUMN]).to_numpy(dtype='datetime64[ns]')
+            seconds = (times - times.astype('datetime64[D]')).astype(np.int64) / 1e9
+            angle = 2 * np.pi * seconds / 86400.0
+            out[:, column] = np.sin(angle)
+            out[:, column + 1] = np.cos(angle)
+
+    def fit_stream(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """First pass over a chunked source: accumulate scaler statistics"""
+        self.reset()
+        rows = 0
+        for chunk in chunks:
+            self.partial_fit(chunk)
+            rows += len(chunk)
+        return rows
+
+    def transform_stream(self, chunks: Iterable[pd.DataFrame], n_rows: int,
+                         out: Optional[np.ndarray] = None, path: Optional[str] = None,
+                         update: bool = False) -> np.ndarray:
+        """Preprocess `chunks` into a preallocated (n_rows, features) float32 array
+
+        `out` may be supplied; otherwise it is allocated in memory, or as a
+        .npy memmap at `path`. With `update`, each chunk first updates the
+        scaler (online mode for continuous input, no separate fit pass).
+        Returns the filled rows.
+        """
+        self._last = None
+        position = 0
+        for chunk in chunks:
+            if update or not self.feature_columns:
+                self.partial_fit(chunk)
+            if out is None:
+                shape = (n_rows, len(self.output_columns))
+                out = (np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+                       if path is not None else np.empty(shape, dtype=np.float32))
+            if position + len(chunk) > len(out):
+                raise ValueError(f"Output holds {len(out)} rows; stream has more")
+            position += self.transform_into(chunk, out[position:])
+        if out is None:
+            return np.empty((0, len(self.output_columns)), dtype=np.float32)
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out[:position]
+
+    def preprocess_loader(self, loader, filename: str, path: Optional[str] = None,
+                          chunk_rows: Optional[int] = None) -> np.ndarray:
+        """Two-pass streaming preprocessing of a DataLoader source
+
+        Scaling matches preprocess_data on the whole file while only one
+        chunk is held in memory at a time.
+        """
+        rows = self.fit_stream(loader.iter_measurement_data(filename, chunk_rows=chunk_rows))
+        return self.transform_stream(loader.iter_measurement_data(filename, chunk_rows=chunk_rows),
+                                     rows, path=path)
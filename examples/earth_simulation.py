@@ -1,7 +1,10 @@
 # examples/earth_simulation.py
+import tempfile
+from pathlib import Path
 from dust_dynamics.config import EarthConfig
 from dust_dynamics.models import DustModel
 from dust_dynamics.utils import DustVisualizer
+from dust_dynamics.examples.synthetic_data import TARGET_COLUMNS, write_measurements
 
 def run_earth_simulation():
     """Example simulation for Earth conditions"""
@@ -11,8 +14,11 @@ def run_earth_simulation():
     # Create model
     model = DustModel(config)
     
-    # Load and train on Earth data
-    model.train('data/earth_measurements.csv')
+    # Train on (synthetic) Earth station data to predict the dust drag force
+    data_path = write_measurements(Path(tempfile.mkdtemp()) / 'earth_measurements.csv',
+                                   config)
+    model.target_columns = TARGET_COLUMNS
+    model.train(str(data_path))
     
     # Run simulation
     results = model.simulate(
@@ -1,15 +1,21 @@
 # examples/mars_simulation.py
+import tempfile
+from pathlib import Path
 from dust_dynamics.config import MarsConfig
 from dust_dynamics.models import DustModel
 from dust_dynamics.utils import DustVisualizer
+from dust_dynamics.examples.synthetic_data import TARGET_COLUMNS, write_measurements
 
 def run_mars_simulation():
     """Example simulation for Mars conditions"""
     config = MarsConfig()
     model = DustModel(config)
     
-    # Load Mars atmospheric data
-    model.train('data/mars_measurements.csv')
+    # Train on (synthetic) Mars station data to predict the dust drag force
+    data_path = write_measurements(Path(tempfile.mkdtemp()) / 'mars_measurements.csv',
+                                   config)
+    model.target_columns = TARGET_COLUMNS
+    model.train(str(data_path))
     
     # Run simulation
     results = model.simulate(
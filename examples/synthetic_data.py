@@ -0,0 +1,35 @@
+# examples/synthetic_data.py
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Union
+
+TARGET_COLUMNS = ['force_x', 'force_y', 'force_z']
+
+
+def write_measurements(path: Union[str, Path], config, n_rows: int = 5000,
+                       seed: int = 0) -> Path:
+    """Synthetic station measurements around the planet's base state
+
+    Besides wind, pressure, temperature, humidity and dust concentration,
+    each row carries the dust drag force on the air (TARGET_COLUMNS),
+    proportional to the concentration and opposing the wind, for the
+    examples to train on.
+    """
+    rng = np.random.default_rng(seed)
+    wind = rng.normal(0.0, 5.0, (n_rows, 3)) * [1.0, 1.0, 0.1]
+    concentration = rng.uniform(0.0, 2e-3, n_rows)
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n_rows, freq='min'),
+        'wind_u': wind[:, 0], 'wind_v': wind[:, 1], 'wind_w': wind[:, 2],
+        'pressure': config.pressure_base * (1 + rng.normal(0.0, 0.01, n_rows)),
+        'temperature': config.temperature_base + rng.normal(0.0, 5.0, n_rows),
+        'humidity': config.humidity_base * rng.uniform(0.5, 1.5, n_rows),
+        'concentration': concentration,
+    })
+    drag = -50.0 * concentration[:, None] * wind
+    for name, component in zip(TARGET_COLUMNS, drag.T):
+        data[name] = component + rng.normal(0.0, 1e-4, n_rows)
+    path = Path(path)
+    data.to_csv(path, index=False)
+    return path
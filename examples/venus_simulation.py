@@ -1,15 +1,21 @@
 # examples/venus_simulation.py
+import tempfile
+from pathlib import Path
 from dust_dynamics.config import VenusConfig
 from dust_dynamics.models import DustModel
 from dust_dynamics.utils import DustVisualizer
+from dust_dynamics.examples.synthetic_data import TARGET_COLUMNS, write_measurements
 
 def run_venus_simulation():
     """Example simulation for Venus conditions"""
     config = VenusConfig()
     model = DustModel(config)
     
-    # Load Venus atmospheric data
-    model.train('data/venus_measurements.csv')
+    # Train on (synthetic) Venus station data to predict the dust drag force
+    data_path = write_measurements(Path(tempfile.mkdtemp()) / 'venus_measurements.csv',
+                                   config)
+    model.target_columns = TARGET_COLUMNS
+    model.train(str(data_path))
     
     # Run simulation
     results = model.simulate(
@@ -1,45 +1,267 @@
 # models/dust_model.py
-import torch
-import torch.nn as nn
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional, Sequence, Union, TYPE_CHECKING
 from ..core.equations import DustEquations
-from ..data.preprocessor import DataPreprocessor
+from ..core.simulation import Simulation, StepControl, DEFAULT_OUTPUT_FIELDS
+from ..core.amr import Refinement
+from ..core.monitoring import InvariantMonitor
+from ..core.instrumentation import PROFILER, Profiler
+
+if TYPE_CHECKING:
+    from ..data.preprocessor import DataPreprocessor
+    from .trainer import TrainingHistory
+    from .inference import InferenceEngine, NeuralFeedback
+    from ..data.ingestion import SensorIngestion
 
 class DustModel:
-    """Main dust dynamics model"""
+    """Main dust dynamics model
+
+    torch, pandas and scikit-learn are imported on first use of the network
+    or the data pipeline, so simulation-only use does not load them.
+    """
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, backend: str = 'numpy'):
         self.config = config
-        self.equations = DustEquations()
-        self.preprocessor = DataPreprocessor()
-        self.setup_neural_network()
+        self.equations = DustEquations(backend)
+        self._preprocessor: Optional['DataPreprocessor'] = None
+        self.simulation = Simulation(config, equations=self.equations)
+        self.feature_columns: Optional[List[str]] = None  # default: all but targets
+        self.target_columns: Optional[List[str]] = None
+        self._nn_model = None
+
+    @property
+    def preprocessor(self) -> 'DataPreprocessor':
+        if self._preprocessor is None:
+            from ..data.preprocessor import DataPreprocessor
+            self._preprocessor = DataPreprocessor()
+        return self._preprocessor
+
+    @preprocessor.setter
+    def preprocessor(self, preprocessor: 'DataPreprocessor'):
+        self._preprocessor = preprocessor
+
+    @property
+    def nn_model(self):
+        """Feedback network, built with the default sizes on first access"""
+        if self._nn_model is None:
+            self.setup_neural_network()
+        return self._nn_model
+
+    @nn_model.setter
+    def nn_model(self, model):
+        self._nn_model = model
     
-    def setup_neural_network(self):
+    def setup_neural_network(self, input_size: int = 6, output_size: int = 3):
         """Initialize neural network for dust feedback"""
+        import torch.nn as nn
         self.nn_model = nn.Sequential(
-            nn.Linear(6, 32),
+            nn.Linear(input_size, 32),
             nn.ReLU(),
             nn.Linear(32, 16),
             nn.ReLU(),
-            nn.Linear(16, 3)
+            nn.Linear(16, output_size)
+        )
+    
+    def train(self, data_path: str, epochs: int = 100,
+              batch_size: int = 1024,
+              validation_fraction: float = 0.1,
+              patience: int = 10,
+              threads: Optional[int] = None,
+              features_path: Optional[str] = None,
+              checkpoint_path: Optional[str] = None,
+              verbose: bool = False) -> 'TrainingHistory':
+        """Train model on data
+
+        The file is preprocessed chunk by chunk into a float32 feature file
+        (`features_path`, default next to the data), which mini-batches are
+        then streamed from, so memory use does not grow with the data.
+        `target_columns` must name the preprocessed columns to predict.
+        """
+        if not self.target_columns:
+            raise ValueError("Set target_columns before training")
+        from ..data.loader import DataLoader
+        from .trainer import Trainer
+        path = Path(data_path)
+        features_path = features_path or str(path.with_suffix('.features.npy'))
+        data = self.preprocessor.preprocess_loader(DataLoader(str(path.parent)), path.name,
+                                                   path=features_path)
+        columns = self.preprocessor.output_columns
+        inputs = [columns.index(c) for c in self._input_columns()]
+        targets = [columns.index(c) for c in self.target_columns]
+        first = self.nn_model[0]
+        if first.in_features != len(inputs) or self.nn_model[-1].out_features != len(targets):
+            self.setup_neural_network(len(inputs), len(targets))
+
+        trainer = Trainer(self.nn_model, batch_size=batch_size,
+                          validation_fraction=validation_fraction, patience=patience,
+                          threads=threads, checkpoint_path=checkpoint_path,
+                          verbose=verbose)
+        return trainer.fit(data, inputs, targets, epochs)
+    
+    def _input_columns(self) -> List[str]:
+        """Network input columns: feature_columns, or every column but the targets"""
+        return self.feature_columns or [c for c in self.preprocessor.output_columns
+                                        if c not in self.target_columns]
+
+    @property
+    def trained(self) -> bool:
+        """Whether nn_model works on preprocessed (standardised) columns"""
+        return (self._preprocessor is not None and bool(self._preprocessor.feature_columns)
+                and bool(self.target_columns))
+
+    def inference_engine(self, chunk_size: int = 16384,
+                         threads: Optional[int] = None) -> 'InferenceEngine':
+        """Frozen, BatchNorm-folded copy of nn_model for batched evaluation
+
+        After train() the preprocessor's standardisation of the input and
+        target columns is folded in, so the engine maps raw values to raw
+        values.
+        """
+        from .inference import InferenceEngine
+        statistics = {}
+        if self.trained:
+            input_mean, input_scale = self.preprocessor.column_statistics(self._input_columns())
+            output_mean, output_scale = self.preprocessor.column_statistics(self.target_columns)
+            statistics = {'input_mean': input_mean, 'input_scale': input_scale,
+                          'output_mean': output_mean, 'output_scale': output_scale}
+        return InferenceEngine(self.nn_model, chunk_size=chunk_size, threads=threads,
+                               **statistics)
+
+    def enable_neural_feedback(self, chunk_size: int = 16384,
+                               threads: Optional[int] = None) -> 'NeuralFeedback':
+        """Apply the network's feedback force once per simulate() step
+
+        After train() the network inputs are the trained feature columns,
+        taken from the state by name (see STATE_FEATURES), and its three
+        target columns are the force components. The network is frozen at
+        this point; call again after retraining.
+        """
+        from .inference import NeuralFeedback, FEEDBACK_INPUTS
+        self.simulation.step_hooks = [hook for hook in self.simulation.step_hooks
+                                      if not isinstance(hook, NeuralFeedback)]
+        inputs = self._input_columns() if self.trained else FEEDBACK_INPUTS
+        feedback = NeuralFeedback(self.inference_engine(chunk_size, threads),
+                                  self.config.boundary, inputs,
+                                  getattr(self.config, 'pressure_base', 0.0))
+        self.simulation.step_hooks.append(feedback)
+        return feedback
+
+    def enable_assimilation(self, source, relaxation_time: float = 60.0,
+                            fields: Optional[Sequence[str]] = None,
+                            **options) -> 'SensorIngestion':
+        """Nudge simulate() towards live station readings from `source`
+
+        `source` is an async iterable of JSON lines (tcp_lines, tail_lines,
+        synthetic_readings). Ingestion starts at once in a background thread
+        and keeps running across simulate() calls; stop() it when done.
+        `options` go to SensorIngestion (batch_size, queue_size, ...).
+        """
+        from ..data.ingestion import SensorIngestion, Nudging, NUDGED_FIELDS
+        self.simulation.step_hooks = [hook for hook in self.simulation.step_hooks
+                                      if not isinstance(hook, Nudging)]
+        ingestion = SensorIngestion(source, self.simulation.grid, **options).start()
+        nudging = Nudging(ingestion, relaxation_time, fields or NUDGED_FIELDS,
+                          self.config.boundary, simulation=self.simulation)
+        self.simulation.step_hooks.append(nudging)
+        return ingestion
+
+    def enable_monitoring(self, stride: int = 10, **options) -> InvariantMonitor:
+        """Check finiteness, positivity and the mass budget during simulate()
+
+        A violation stops the run with InvariantViolation; the budget summary
+        is returned under results['invariants']. See InvariantMonitor for
+        `options`.
+        """
+        self.simulation.monitor = InvariantMonitor(self.config, stride, **options)
+        return self.simulation.monitor
+    
+    def profile(self, enabled: bool = True, track_allocations: bool = False) -> Profiler:
+        """Switch the phase timers, counters and trace events on or off
+
+        While enabled, simulate() results carry the summary under
+        results['profile']; export it with PROFILER.export_json or
+        export_chrome_trace. Enabling starts a fresh collection.
+        """
+        if enabled:
+            return PROFILER.enable(track_allocations)
+        return PROFILER.disable()
+
+    def simulate(self,
+                 duration: float,
+                 dt: Optional[float] = None,
+                 initial_conditions: Optional[Dict[str, Any]] = None,
+                 output_interval: Optional[float] = None,
+                 output_fields: Sequence[str] = DEFAULT_OUTPUT_FIELDS,
+                 step_control: Union[str, StepControl, None] = None,
+                 workers: int = 1,
+                 output_path: Optional[Union[str, Path]] = None,
+                 chunk_size: int = 16,
+                 compression: Optional[str] = None,
+                 checkpoint_interval: Optional[float] = None,
+                 resume: bool = False) -> Dict[str, Any]:
+        """Run the gridded dust simulation
+
+        `step_control` selects fixed RK4 steps (default), 'cfl' for RK4 at the
+        stability-limited step, or 'dopri' for embedded error control.
+        `workers` > 1 decomposes the grid across processes. An `output_path`
+        streams snapshots to disk and enables checkpoint/resume.
+        """
+        return self.simulation.run(
+            duration,
+            dt if dt is not None else self.config.dt,
+            initial_conditions,
+            output_interval=output_interval,
+            output_fields=output_fields,
+            step_control=step_control,
+            workers=workers,
+            output_path=output_path,
+            chunk_size=chunk_size,
+            compression=compression,
+            checkpoint_interval=checkpoint_interval,
+            resume=resume
         )
     
-    def train(self, data_path: str, epochs: int = 100):
-        """Train model on data"""
-        # Load and preprocess data
-        data, _ = self.preprocessor.process_file(data_path)
-        
-        # Convert to tensors
-        X = torch.tensor(data[self.feature_columns].values, dtype=torch.float32)
-        y = torch.tensor(data[self.target_columns].values, dtype=torch.float32)
-        
-        # Training loop
-        optimizer = torch.optim.Adam(self.nn_model.parameters())
-        criterion = nn.MSELoss()
-        
-        for epoch in range(epochs):
-            optimizer.zero_grad()
-            outputs = self.nn_model(X)
-            loss = criterion(outputs, y)
-            loss.backward()
-            optimizer.step()
+    def simulate_ensemble(self,
+                          duration: float,
+                          dt: Optional[float] = None,
+                          initial_conditions: Sequence[Dict[str, Any]] = (),
+                          output_interval: Optional[float] = None,
+                          output_fields: Sequence[str] = ('velocity', 'concentration'),
+                          step_control: Union[str, StepControl, None] = None) -> Dict[str, Any]:
+        """Run all ensemble members in one vectorized simulation"""
+        return self.simulation.run_ensemble(
+            duration,
+            dt if dt is not None else self.config.dt,
+            initial_conditions,
+            output_interval=output_interval,
+            output_fields=output_fields,
+            step_control=step_control
+        )
+    
+    def simulate_amr(self,
+                     duration: float,
+                     dt: Optional[float] = None,
+                     initial_conditions: Optional[Dict[str, Any]] = None,
+                     refinement: Optional[Refinement] = None,
+                     output_interval: Optional[float] = None,
+                     output_fields: Sequence[str] = DEFAULT_OUTPUT_FIELDS,
+                     cfl: float = 0.5,
+                     **criteria) -> Dict[str, Any]:
+        """Run with block-structured refinement around sharp dust fronts
+
+        Pass a Refinement, or its fields (concentration_gradient,
+        velocity_gradient, max_level, ...) as keyword arguments. Without a
+        `dt` the base step follows the CFL limit of the finest level.
+        """
+        if refinement is None:
+            refinement = Refinement(**criteria)
+        elif criteria:
+            raise ValueError("Pass either a Refinement or its fields, not both")
+        return self.simulation.run_amr(duration, dt, initial_conditions, refinement,
+                                       output_interval=output_interval,
+                                       output_fields=output_fields, cfl=cfl)
+    
+    @property
+    def steps_per_second(self) -> float:
+        """Throughput of the most recent simulate() calls"""
+        return self.simulation.steps_per_second
@@ -0,0 +1,251 @@
+# models/inference.py
+import numpy as np
+import torch
+import torch.nn as nn
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from ..core.equations import State
+from ..core.stencils import INTERIOR
+
+# Default per-cell inputs, in order, of the untrained 6 -> 3 feedback network
+FEEDBACK_INPUTS = ('v_x', 'v_y', 'v_z', 'concentration', 'temperature', 'humidity')
+
+
+def _component(axis: int) -> Callable[[State], np.ndarray]:
+    return lambda interior: interior.velocity[..., axis, :, :, :]
+
+
+# Network input columns that can be evaluated from the (interior) state, by
+# preprocessed column name; measurement names alias the state fields
+STATE_FEATURES: Dict[str, Callable[[State], np.ndarray]] = {
+    'v_x': _component(0), 'v_y': _component(1), 'v_z': _component(2),
+    'wind_u': _component(0), 'wind_v': _component(1), 'wind_w': _component(2),
+    'wind_speed': lambda interior: np.hypot(interior.velocity[..., 0, :, :, :],
+                                            interior.velocity[..., 1, :, :, :]),
+    'pressure': lambda interior: interior.pressure,
+    'concentration': lambda interior: interior.concentration,
+    'temperature': lambda interior: interior.temperature,
+    'humidity': lambda interior: interior.humidity,
+}
+
+
+def _batchnorm_affine(bn: nn.BatchNorm1d) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Eval-mode BatchNorm as y = scale * x + shift"""
+    scale = torch.rsqrt(bn.running_var + bn.eps)
+    if bn.affine:
+        scale = scale * bn.weight
+    shift = -bn.running_mean * scale
+    if bn.affine:
+        shift = shift + bn.bias
+    return scale, shift
+
+
+def fold_standardization(network: nn.Sequential,
+                         input_mean: Optional[Sequence[float]] = None,
+                         input_scale: Optional[Sequence[float]] = None,
+                         output_mean: Optional[Sequence[float]] = None,
+                         output_scale: Optional[Sequence[float]] = None) -> nn.Sequential:
+    """Fold input standardisation and output unscaling into the end Linears, in place
+
+    A network trained on (x - m) / s predicting (y - μ) / σ then maps raw
+    x to raw y: W ((x - m) / s) + b = (W / s) x + (b - W (m / s)), and
+    σ (W x + b) + μ = (σ W) x + (σ b + μ).
+    """
+    linears = [m for m in network if isinstance(m, nn.Linear)]
+    with torch.no_grad():
+        if input_mean is not None or input_scale is not None:
+            first = linears[0]
+            mean = torch.as_tensor(input_mean if input_mean is not None
+                                   else np.zeros(first.in_features), dtype=first.weight.dtype)
+            scale = torch.as_tensor(input_scale if input_scale is not None
+                                    else np.ones(first.in_features), dtype=first.weight.dtype)
+            first.weight.div_(scale[None, :])
+            first.bias.sub_(first.weight @ mean)
+        if output_mean is not None or output_scale is not None:
+            last = linears[-1]
+            if output_scale is not None:
+                scale = torch.as_tensor(output_scale, dtype=last.weight.dtype)
+                last.weight.mul_(scale[:, None])
+                last.bias.mul_(scale)
+            if output_mean is not None:
+                last.bias.add_(torch.as_tensor(output_mean, dtype=last.bias.dtype))
+    return network
+
+
+def fold_batchnorm(model: nn.Module) -> nn.Sequential:
+    """Eval-mode copy of a feed-forward network with BatchNorm folded away
+
+    Dropout is dropped (identity in eval mode). A BatchNorm directly after
+    a Linear is folded into that Linear; one after an activation, as in
+    DustFeedbackNetwork's Linear -> ReLU -> BatchNorm blocks, is folded into
+    the next Linear instead: W (s x + t) + b = (W s) x + (W t + b).
+    """
+    leaves = [m for m in model.modules() if not list(m.children())
+              and not isinstance(m, (nn.Dropout, nn.Identity))]
+    layers: List[nn.Module] = []
+    pending: Optional[Tuple[torch.Tensor, torch.Tensor]] = None
+    with torch.no_grad():
+        for leaf in leaves:
+            if isinstance(leaf, nn.Linear):
+                linear = nn.Linear(leaf.in_features, leaf.out_features)
+                linear.weight.copy_(leaf.weight)
+                linear.bias.copy_(leaf.bias if leaf.bias is not None else 0.0)
+                if pending is not None:
+                    scale, shift = pending
+                    linear.bias.add_(linear.weight @ shift)
+                    linear.weight.mul_(scale[None, :])
+                    pending = None
+                layers.append(linear)
+            elif isinstance(leaf, nn.BatchNorm1d):
+                scale, shift = _batchnorm_affine(leaf)
+                if layers and isinstance(layers[-1], nn.Linear):
+                    layers[-1].weight.mul_(scale[:, None])
+                    layers[-1].bias.mul_(scale).add_(shift)
+                elif pending is None:
+                    pending = (scale, shift)
+                else:
+                    raise ValueError("Consecutive BatchNorm layers cannot be folded")
+            else:
+                if pending is not None:
+                    raise ValueError(f"BatchNorm before {type(leaf).__name__} cannot be folded")
+                layers.append(leaf)
+    if pending is not None:
+        raise ValueError("Trailing BatchNorm has no Linear layer to fold into")
+    return nn.Sequential(*layers).eval()
+
+
+class InferenceEngine:
+    """Batched CPU inference through preallocated buffers
+
+    The network is folded (see fold_batchnorm) once. A pure Linear/ReLU
+    stack is then run as a fixed chain of addmm calls writing into per-layer
+    buffers of `chunk_size` rows, so evaluating any number of rows allocates
+    nothing; other stacks fall back to a traced, frozen TorchScript module.
+    Inputs are consumed in fixed-size chunks under torch.inference_mode.
+    For a network trained on standardised columns, pass the column means
+    and scales; they are folded into the first and last Linear layers so
+    raw values go in and come out (see fold_standardization).
+    """
+
+    def __init__(self, model: nn.Module, chunk_size: int = 16384,
+                 threads: Optional[int] = None,
+                 input_mean: Optional[Sequence[float]] = None,
+                 input_scale: Optional[Sequence[float]] = None,
+                 output_mean: Optional[Sequence[float]] = None,
+                 output_scale: Optional[Sequence[float]] = None):
+        if threads is not None:
+            torch.set_num_threads(threads)
+        self.chunk_size = chunk_size
+        self.network = fold_standardization(fold_batchnorm(model), input_mean, input_scale,
+                                            output_mean, output_scale)
+        linears = [m for m in self.network if isinstance(m, nn.Linear)]
+        self.n_inputs = linears[0].in_features
+        self.n_outputs = linears[-1].out_features
+        self.input = torch.empty(chunk_size, self.n_inputs)
+        self._input_np = self.input.numpy()
+        self.plan = self._compile_plan()
+        self.module = None
+        if self.plan is None:
+            with torch.no_grad():
+                traced = torch.jit.trace(self.network, self.input)
+            self.module = torch.jit.freeze(traced)
+
+    def _compile_plan(self):
+        """(weight^T, bias, buffer, relu) per Linear, or None if not Linear/ReLU only"""
+        plan = []
+        for layer in self.network:
+            if isinstance(layer, nn.Linear):
+                plan.append([layer.weight.detach().t().contiguous(), layer.bias.detach(),
+                             torch.empty(self.chunk_size, layer.out_features), False])
+            elif isinstance(layer, nn.ReLU) and plan and not plan[-1][3]:
+                plan[-1][3] = True
+            else:
+                return None
+        return plan
+
+    def _run(self, rows: int) -> torch.Tensor:
+        x = self.input[:rows]
+        if self.plan is None:
+            return self.module(x)
+        for weight, bias, buffer, relu in self.plan:
+            y = buffer[:rows]
+            torch.addmm(bias, x, weight, out=y)
+            if relu:
+                y.clamp_(min=0.0)
+            x = y
+        return x
+
+    def predict(self, inputs: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Evaluate (n, n_inputs) rows; returns (n, n_outputs) float32"""
+        n = len(inputs)
+        if out is None:
+            out = np.empty((n, self.n_outputs), dtype=np.float32)
+        with torch.inference_mode():
+            for start in range(0, n, self.chunk_size):
+                rows = min(self.chunk_size, n - start)
+                self._input_np[:rows] = inputs[start:start + rows]
+                out[start:start + rows] = self._run(rows).numpy()
+        return out
+
+    def predict_fields(self, fields: Sequence[np.ndarray],
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Evaluate per cell over equally shaped grid `fields` (one per input)
+
+        Cells are gathered chunk by chunk straight into the input buffer, so
+        no (cells, inputs) copy of the grid is made. Returns
+        (n_outputs,) + grid shape.
+        """
+        shape = fields[0].shape
+        n = fields[0].size
+        if out is None:
+            out = np.empty((self.n_outputs,) + shape, dtype=np.float32)
+        result = out.reshape(self.n_outputs, n)
+        with torch.inference_mode():
+            for start in range(0, n, self.chunk_size):
+                rows = min(self.chunk_size, n - start)
+                for k, values in enumerate(fields):
+                    self._input_np[:rows, k] = values.flat[start:start + rows]
+                result[:, start:start + rows] = self._run(rows).numpy().T
+        if not np.shares_memory(result, out):
+            out[...] = result.reshape(out.shape)
+        return out
+
+
+class NeuralFeedback:
+    """Simulation step hook adding the network's feedback force to the air
+
+    The force is evaluated once per step on the interior cells from the
+    named `inputs` (columns in STATE_FEATURES, in the network's order) and
+    applied as velocity += dt * Fd (operator split), rather than in every
+    Runge-Kutta stage. The engine must take and return raw values; build
+    it with the training standardisation folded in. The state carries the
+    departure from hydrostatic pressure, so `pressure_base` is added back
+    for a network trained on measured pressure.
+    """
+
+    def __init__(self, engine: InferenceEngine, boundary: str = 'periodic',
+                 inputs: Sequence[str] = FEEDBACK_INPUTS, pressure_base: float = 0.0):
+        missing = [name for name in inputs if name not in STATE_FEATURES]
+        if missing:
+            raise ValueError(f"Feedback inputs not available from the state: {missing}")
+        if engine.n_inputs != len(inputs) or engine.n_outputs != 3:
+            raise ValueError(f"Feedback network must map {len(inputs)} inputs "
+                             f"to 3 force components")
+        self.engine = engine
+        self.boundary = boundary
+        self.inputs = tuple(inputs)
+        self.pressure_base = pressure_base
+        self._force: Optional[np.ndarray] = None
+
+    def __call__(self, state: State, t: float, step: int, dt: float) -> bool:
+        interior = state.interior()
+        fields = [STATE_FEATURES[name](interior) for name in self.inputs]
+        if 'pressure' in self.inputs and self.pressure_base:
+            index = self.inputs.index('pressure')
+            fields[index] = fields[index] + self.pressure_base
+        if self._force is None or self._force.shape[1:] != fields[0].shape:
+            self._force = np.empty((3,) + fields[0].shape, dtype=np.float32)
+        force = self.engine.predict_fields(fields, self._force)
+        target = state.velocity[INTERIOR]
+        target += dt * np.moveaxis(force, 0, -4)
+        state.apply_boundary(self.boundary)
+        return True
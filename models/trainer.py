@@ -0,0 +1,222 @@
+# models/trainer.py
+import copy
+import logging
+import queue
+import threading
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchStream:
+    """Mini-batches read from a (possibly memory-mapped) feature array
+
+    Rows are read in contiguous blocks of `block_rows`, so an on-disk array
+    is scanned sequentially; shuffling permutes the block order and the rows
+    within each block. A background thread prepares up to `prefetch`
+    batches ahead of the consumer. `drop_single` skips a block's trailing
+    batch when it has only one row, which BatchNorm cannot train on.
+    """
+
+    def __init__(self, data: np.ndarray, rows: Tuple[int, int],
+                 inputs: Sequence[int], targets: Sequence[int],
+                 batch_size: int = 1024, block_rows: int = 65536,
+                 shuffle: bool = True, prefetch: int = 4, seed: Optional[int] = None,
+                 drop_single: bool = False):
+        self.data = data
+        self.start, self.stop = rows
+        self.inputs = np.asarray(inputs)
+        self.targets = np.asarray(targets)
+        self.batch_size = batch_size
+        self.block_rows = max(block_rows, batch_size)
+        self.shuffle = shuffle
+        self.drop_single = drop_single
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def _batches(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        blocks = np.arange(self.start, self.stop, self.block_rows)
+        if self.shuffle:
+            self.rng.shuffle(blocks)
+        for first in blocks:
+            block = np.asarray(self.data[first:min(first + self.block_rows, self.stop)],
+                               dtype=np.float32)
+            if self.shuffle:
+                block = block[self.rng.permutation(len(block))]
+            x = np.ascontiguousarray(block[:, self.inputs])
+            y = np.ascontiguousarray(block[:, self.targets])
+            end = len(block)
+            if self.drop_single and end % self.batch_size == 1:
+                end -= 1
+            for i in range(0, end, self.batch_size):
+                yield (torch.from_numpy(x[i:i + self.batch_size]),
+                       torch.from_numpy(y[i:i + self.batch_size]))
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        if self.prefetch <= 0:
+            yield from self._batches()
+            return
+        batches: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def offer(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for batch in self._batches():
+                    if not offer(batch):
+                        return
+                offer(done)
+            except BaseException as exc:
+                offer(exc)
+
+        thread = threading.Thread(target=produce, name='batch-prefetch', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+
+@dataclass
+class TrainingHistory:
+    """Per-epoch losses and throughput of a Trainer.fit call"""
+    train_loss: List[float] = field(default_factory=list)
+    validation_loss: List[float] = field(default_factory=list)
+    samples_per_second: List[float] = field(default_factory=list)
+    best_epoch: int = -1
+    best_loss: float = float('inf')
+    stopped_early: bool = False
+
+
+class Trainer:
+    """Mini-batch training with early stopping on a held-out split
+
+    The last `validation_fraction` of the rows is held out (the features
+    are a time series, so a tail split avoids leaking neighbouring samples).
+    Training stops after `patience` epochs without a validation improvement
+    larger than `min_delta`; the best weights are restored at the end and,
+    with a `checkpoint_path`, saved there whenever they improve.
+    """
+
+    def __init__(self, model: nn.Module, optimizer: Optional[torch.optim.Optimizer] = None,
+                 criterion: Optional[nn.Module] = None, batch_size: int = 1024,
+                 validation_fraction: float = 0.1, patience: int = 10,
+                 min_delta: float = 0.0, threads: Optional[int] = None,
+                 prefetch: int = 4, block_rows: int = 65536,
+                 checkpoint_path: Optional[str] = None, seed: Optional[int] = 0,
+                 verbose: bool = False):
+        if not 0.0 <= validation_fraction < 1.0:
+            raise ValueError("validation_fraction must be in [0, 1)")
+        self.model = model
+        self.optimizer = optimizer or torch.optim.Adam(model.parameters())
+        self.criterion = criterion or nn.MSELoss()
+        self.batch_size = batch_size
+        self.validation_fraction = validation_fraction
+        self.patience = patience
+        self.min_delta = min_delta
+        self.threads = threads
+        self.prefetch = prefetch
+        self.block_rows = block_rows
+        self.checkpoint_path = checkpoint_path
+        self.seed = seed
+        self.verbose = verbose
+
+    def _evaluate(self, stream: BatchStream) -> float:
+        self.model.eval()
+        total, count = 0.0, 0
+        with torch.no_grad():
+            for x, y in stream:
+                total += self.criterion(self.model(x), y).item() * len(x)
+                count += len(x)
+        return total / max(count, 1)
+
+    def fit(self, data: np.ndarray, inputs: Sequence[int], targets: Sequence[int],
+            epochs: int = 100) -> TrainingHistory:
+        """Train on the `inputs` -> `targets` columns of the rows of `data`
+
+        `threads` applies to this call only; torch's thread count is restored
+        afterwards.
+        """
+        previous_threads = torch.get_num_threads()
+        if self.threads is not None:
+            torch.set_num_threads(self.threads)
+        try:
+            return self._fit(data, inputs, targets, epochs)
+        finally:
+            torch.set_num_threads(previous_threads)
+
+    def _fit(self, data: np.ndarray, inputs: Sequence[int], targets: Sequence[int],
+             epochs: int) -> TrainingHistory:
+        n_rows = len(data)
+        split = n_rows - int(round(n_rows * self.validation_fraction))
+        options = dict(inputs=inputs, targets=targets, batch_size=self.batch_size,
+                       block_rows=self.block_rows, prefetch=self.prefetch)
+        train = BatchStream(data, (0, split), shuffle=True, seed=self.seed, drop_single=True,
+                            **options)
+        validation = BatchStream(data, (split, n_rows), shuffle=False, **options)
+
+        history = TrainingHistory()
+        best_state: Optional[Dict[str, torch.Tensor]] = None
+        stale = 0
+        for epoch in range(epochs):
+            self.model.train()
+            started = time.perf_counter()
+            total, count = 0.0, 0
+            for x, y in train:
+                self.optimizer.zero_grad()
+                loss = self.criterion(self.model(x), y)
+                loss.backward()
+                self.optimizer.step()
+                total += loss.item() * len(x)
+                count += len(x)
+            if count == 0:
+                raise ValueError(f"No training batches: {split} training rows "
+                                 f"(need at least 2)")
+            elapsed = time.perf_counter() - started
+            history.train_loss.append(total / max(count, 1))
+            history.samples_per_second.append(count / elapsed if elapsed > 0 else 0.0)
+            score = self._evaluate(validation) if len(validation) else history.train_loss[-1]
+            history.validation_loss.append(score)
+            logger.log(logging.INFO if self.verbose else logging.DEBUG,
+                       "epoch %d: train %.4g val %.4g (%.0f samples/s)", epoch + 1,
+                       history.train_loss[-1], score, history.samples_per_second[-1])
+
+            if score < history.best_loss - self.min_delta:
+                history.best_loss, history.best_epoch = score, epoch
+                best_state = copy.deepcopy(self.model.state_dict())
+                if self.checkpoint_path is not None:
+                    torch.save(best_state, self.checkpoint_path)
+                stale = 0
+            else:
+                stale += 1
+                if stale >= self.patience:
+                    history.stopped_early = True
+                    break
+
+        if best_state is not None:
+            self.model.load_state_dict(best_state)
+        return history
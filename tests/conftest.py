@@ -0,0 +1,12 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The repository root is the `dust_dynamics` package; expose it under that
+# name (also to subprocesses, which inherit sys.path through PYTHONPATH)
+ROOT = Path(__file__).resolve().parents[1]
+_LINK_DIR = Path(tempfile.mkdtemp(prefix='dust_dynamics_'))
+os.symlink(ROOT, _LINK_DIR / 'dust_dynamics', target_is_directory=True)
+sys.path.insert(0, str(_LINK_DIR))
@@ -0,0 +1,76 @@
+# tests/test_amr.py
+import numpy as np
+import pytest
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.core.amr import BLOCK, RATIO, AMRHierarchy, Refinement, _prolong, _restrict
+from dust_dynamics.core.equations import Grid
+
+SHAPE = (16, 16, 8)
+
+
+def _blob(x, y, z):
+    return np.exp(-((x - 5.0) ** 2 + (y - 6.0) ** 2 + (z - 4.0) ** 2) / 4.0)
+
+
+def _conditions(**overrides):
+    conditions = {'velocity': [1.0, 0.5, 0.0], 'pressure': 0.0, 'concentration': _blob,
+                  'temperature': 288.0, 'humidity': 0.01}
+    conditions.update(overrides)
+    return conditions
+
+
+def _hierarchy(boundary, diffusivity=0.05):
+    config = EarthConfig().with_overrides({'grid_shape': SHAPE, 'dx': 1.0, 'D': diffusivity})
+    refinement = Refinement(max_level=2, block_size=4, concentration_gradient=0.05,
+                            regrid_interval=2)
+    return AMRHierarchy(config, refinement, Grid(SHAPE, 1.0, boundary))
+
+
+# a uniform drift is only steady with periodic boundaries; between walls the
+# blob spreads by diffusion instead, which still moves the fine blocks
+@pytest.mark.parametrize('boundary,velocity,diffusivity', [
+    ('periodic', [1.0, 0.5, 0.0], 0.05), ('wall', [0.0, 0.0, 0.0], 0.2)])
+def test_mass_conserved_across_regrids(boundary, velocity, diffusivity):
+    hierarchy = _hierarchy(boundary, diffusivity)
+    hierarchy.initialize(_conditions(velocity=velocity))
+    assert len(hierarchy.levels) == 3
+    initial = hierarchy.mass()
+    dt = hierarchy.stable_time_step()
+    layouts = set()
+    for step in range(1, 13):
+        hierarchy.advance(dt)
+        if step % hierarchy.refinement.regrid_interval == 0:
+            hierarchy.regrid()
+            layouts.add(tuple(map(tuple, hierarchy.levels[-1].blocks)))
+    assert len(layouts) > 1  # the fine blocks followed the blob
+    assert abs(hierarchy.mass() - initial) <= 1e-12 * initial
+
+
+def test_prolong_restrict_round_trip():
+    rng = np.random.default_rng(0)
+    h = 3
+    region = rng.standard_normal((5,) + (h + 2,) * 3)
+    fine = _prolong(region)
+    assert fine.shape == (5,) + (RATIO * h,) * 3
+    np.testing.assert_allclose(_restrict(fine), region[(slice(None),) + BLOCK],
+                               rtol=0, atol=1e-14)
+
+
+def test_regrid_prolongation_averages_to_parent():
+    hierarchy = _hierarchy('periodic')
+    hierarchy.initialize(_conditions(concentration=np.pad(np.ones((4, 4, 4)), 6)[:, :, 4:12]))
+    coarse, fine = hierarchy.levels[:2]
+    before = coarse.state.concentration.copy()
+    hierarchy._prolong(fine, coarse, np.arange(fine.n_blocks))
+    hierarchy._restrict(fine, coarse)
+    np.testing.assert_allclose(coarse.state.concentration[(slice(None),) + BLOCK],
+                               before[(slice(None),) + BLOCK], rtol=0, atol=1e-14)
+
+
+def test_initialize_reports_missing_fields():
+    hierarchy = _hierarchy('periodic')
+    conditions = _conditions()
+    del conditions['pressure']
+    with pytest.raises(ValueError, match='pressure'):
+        hierarchy.initialize(conditions)
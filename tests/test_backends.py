@@ -0,0 +1,35 @@
+# tests/test_backends.py
+import numpy as np
+import pytest
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.core.backends import (BACKENDS, NumpyBackend, _evaluate, _random_state,
+                                         correctness_cases, get_backend)
+
+CASES = list(correctness_cases())
+
+
+def _label(case):
+    return ','.join(f'{k}={v}' for k, v in case.items())
+
+
+@pytest.fixture(scope='module')
+def config():
+    return EarthConfig().with_overrides({'thermal_coefficient': 0.3,
+                                         'humidity_coefficient': -0.2})
+
+
+@pytest.fixture(scope='module', params=[name for name in BACKENDS if name != 'numpy'])
+def backend(request):
+    if not BACKENDS[request.param].available():
+        pytest.skip(f"{request.param} backend needs {', '.join(BACKENDS[request.param].requires)}")
+    return get_backend(request.param)
+
+
+@pytest.mark.parametrize('case', CASES, ids=[_label(case) for case in CASES])
+def test_backend_matches_numpy(backend, config, case):
+    state = _random_state((6, 5, 4), case['members'], case['boundary'])
+    expected = _evaluate(NumpyBackend(), state, config, case)
+    actual = _evaluate(backend, state, config, case)
+    scale = max(np.max(np.abs(expected)), 1e-300)
+    assert np.max(np.abs(actual - expected)) / scale <= 1e-10
@@ -0,0 +1,59 @@
+# tests/test_boundary_layer.py
+import numpy as np
+import pytest
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.core.boundary_layer import BoundaryLayer, stability_function
+from dust_dynamics.core.equations import Grid, State
+
+SHAPE = (4, 3, 5)
+DX = 2.0
+
+
+def test_stability_function_matches_businger_dyer():
+    assert stability_function(0.0) == 0.0
+    np.testing.assert_allclose(stability_function([0.1, 0.8]), [-0.5, -4.0])
+    # ζ = -0.5 gives x = (1 - 16ζ)^(1/4) = √3 in the Paulson form
+    root3 = np.sqrt(3.0)
+    expected = 2 * np.log((1 + root3) / 2) + np.log(2.0) - 2 * np.pi / 3 + np.pi / 2
+    np.testing.assert_allclose(stability_function(-0.5), expected, rtol=1e-14)
+
+
+@pytest.fixture
+def layer():
+    config = EarthConfig().with_overrides({'grid_shape': SHAPE, 'dx': DX})
+    return BoundaryLayer(config, Grid(SHAPE, DX, 'periodic'))
+
+
+def _state(wind):
+    return State.from_initial_conditions({'velocity': wind, 'pressure': 0.0,
+                                          'concentration': 0.0, 'temperature': 288.0,
+                                          'humidity': 0.0}, Grid(SHAPE, DX, 'periodic'))
+
+
+# bin centres of the default (-1, 1, 201) table: neutral, unstable, stable
+@pytest.mark.parametrize('inverse_length', [0.0, -0.5, 0.3])
+def test_friction_velocity_matches_log_law(layer, inverse_length):
+    config = layer.config
+    z1 = 0.5 * DX
+    factor = (np.log(z1 / config.z0) - stability_function(z1 * inverse_length)
+              + stability_function(config.z0 * inverse_length))
+    u_star = layer.friction_velocity(_state([3.0, 4.0, 0.0]), inverse_length)
+    assert u_star.shape == SHAPE[:2]
+    np.testing.assert_allclose(u_star, config.kappa * 5.0 / factor, rtol=1e-12)
+    profile = layer.wind_profile(u_star[0, 0], inverse_length)
+    np.testing.assert_allclose(profile[0], 5.0, rtol=1e-12)
+
+
+def test_uplift_against_threshold(layer):
+    config = layer.config
+    wind = np.zeros((3,) + SHAPE)
+    wind[0, :2] = 12.0  # strong wind over the first two rows
+    diameter, density = 1e-6, 2650.0
+    result = layer.uplift(_state(wind), diameter, density)
+    threshold = np.sqrt((density - config.rho) * config.g * diameter / (config.rho * 0.1))
+    np.testing.assert_allclose(result['threshold'], threshold)
+    u_star = config.kappa * 12.0 / np.log(0.5 * DX / config.z0)
+    assert u_star > threshold
+    np.testing.assert_allclose(result['excess'][:2], u_star - threshold, rtol=1e-12)
+    assert result['uplift'][:2].all() and not result['uplift'][2:].any()
@@ -0,0 +1,36 @@
+# tests/test_decomposition.py
+import numpy as np
+import pytest
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.core.backends import available_backends
+from dust_dynamics.models.dust_model import DustModel
+
+
+def _model(backend: str = 'numpy') -> DustModel:
+    config = EarthConfig().with_overrides({'grid_shape': (8, 5, 4), 'dx': 1.0, 'dt': 0.005})
+    return DustModel(config, backend=backend)
+
+
+def _initial_conditions():
+    rng = np.random.default_rng(3)
+    return {'velocity': 0.05 * rng.standard_normal((3, 8, 5, 4)), 'pressure': 0.0,
+            'concentration': 0.5 + 0.1 * rng.random((8, 5, 4)),
+            'temperature': 288.0, 'humidity': 0.01}
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_decomposed_run_matches_serial(backend):
+    initial_conditions = _initial_conditions()
+    serial = _model(backend).simulate(0.05, initial_conditions=initial_conditions)
+    decomposed = _model(backend).simulate(0.05, initial_conditions=initial_conditions,
+                                          workers=2)
+    for name in ('velocity', 'concentration', 'temperature'):
+        np.testing.assert_allclose(decomposed[name], serial[name], rtol=1e-6, atol=1e-9)
+
+
+def test_decomposition_rejects_step_hooks():
+    model = _model()
+    model.simulation.step_hooks.append(lambda state, t, step, dt: False)
+    with pytest.raises(ValueError, match="Step hooks"):
+        model.simulate(0.01, initial_conditions=_initial_conditions(), workers=2)
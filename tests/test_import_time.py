@@ -0,0 +1,14 @@
+# tests/test_import_time.py
+import pytest
+
+from dust_dynamics.benchmarks.import_time import BUDGETS, measure_import
+
+# Only which heavy modules an import pulls in is tested here; wall-clock
+# budgets are machine-dependent and live in benchmarks/import_time.py.
+
+
+@pytest.mark.parametrize('module', list(BUDGETS))
+def test_import_loads_no_unexpected_heavy_modules(module):
+    _, allowed = BUDGETS[module]
+    loaded = measure_import(module, repeat=1)['loaded']
+    assert not set(loaded) - set(allowed), f"{module} loaded {loaded}"
@@ -0,0 +1,73 @@
+# tests/test_inference.py
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.core.equations import State
+from dust_dynamics.models.dust_model import DustModel
+from dust_dynamics.models.inference import InferenceEngine
+
+FEATURES = ['wind_u', 'wind_v', 'pressure', 'concentration', 'temperature',
+            'humidity', 'wind_speed']
+TARGETS = ['force_x', 'force_y', 'force_z']
+
+
+def test_engine_folds_standardisation():
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Linear(4, 8), nn.BatchNorm1d(8), nn.ReLU(), nn.Linear(8, 3)).eval()
+    rng = np.random.default_rng(0)
+    input_mean, input_scale = rng.normal(size=4) * 100, rng.uniform(0.5, 20, 4)
+    output_mean, output_scale = rng.normal(size=3), rng.uniform(0.1, 5, 3)
+    engine = InferenceEngine(model, input_mean=input_mean, input_scale=input_scale,
+                             output_mean=output_mean, output_scale=output_scale)
+    raw = input_mean + input_scale * rng.normal(size=(50, 4))
+    with torch.no_grad():
+        scaled = model(torch.as_tensor((raw - input_mean) / input_scale, dtype=torch.float32))
+    expected = output_mean + output_scale * scaled.numpy()
+    np.testing.assert_allclose(engine.predict(raw), expected, rtol=1e-4, atol=1e-4)
+
+
+def _write_training_data(path):
+    rng = np.random.default_rng(1)
+    n = 400
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'wind_u': rng.normal(3.0, 2.0, n), 'wind_v': rng.normal(-1.0, 2.0, n),
+        'pressure': rng.normal(101325.0, 300.0, n), 'concentration': rng.uniform(0, 1e-3, n),
+        'temperature': rng.normal(288.0, 5.0, n), 'humidity': rng.uniform(0.0, 0.02, n),
+    })
+    for k, name in enumerate(TARGETS):
+        data[name] = 1e-3 * (k + 1) * data['wind_u'] + rng.normal(0, 1e-4, n)
+    data.to_csv(path, index=False)
+
+
+def test_feedback_after_training_on_extra_features(tmp_path):
+    _write_training_data(tmp_path / 'station.csv')
+    config = EarthConfig().with_overrides({'grid_shape': (6, 5, 4), 'dx': 1.0, 'dt': 0.005})
+    model = DustModel(config)
+    model.feature_columns = FEATURES
+    model.target_columns = TARGETS
+    model.train(str(tmp_path / 'station.csv'), epochs=2, batch_size=64)
+    feedback = model.enable_neural_feedback()
+    assert feedback.inputs == tuple(FEATURES)
+
+    state = State.from_initial_conditions({
+        'velocity': [2.0, -1.0, 0.0], 'pressure': 50.0, 'concentration': 5e-4,
+        'temperature': 290.0, 'humidity': 0.01}, model.simulation.grid, model.simulation.dtype)
+    before = state.velocity.copy()
+    feedback(state, 0.0, 0, 0.1)
+
+    raw = np.array([[2.0, -1.0, config.pressure_base + 50.0, 5e-4, 290.0, 0.01,
+                     np.hypot(2.0, -1.0)]])
+    input_mean, input_scale = model.preprocessor.column_statistics(FEATURES)
+    output_mean, output_scale = model.preprocessor.column_statistics(TARGETS)
+    model.nn_model.eval()
+    with torch.no_grad():
+        scaled = model.nn_model(torch.as_tensor((raw - input_mean) / input_scale,
+                                                dtype=torch.float32)).numpy()
+    force = output_mean + output_scale * scaled[0]
+    delta = (state.velocity - before)[..., 1:-1, 1:-1, 1:-1]
+    for axis in range(3):
+        np.testing.assert_allclose(delta[axis], 0.1 * force[axis], rtol=1e-3, atol=1e-7)
@@ -0,0 +1,61 @@
+# tests/test_ingestion.py
+import numpy as np
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.data.ingestion import Increment, IngestionStats, Nudging, SensorIngestion
+from dust_dynamics.models.dust_model import DustModel
+
+
+class _QueuedIncrements:
+    """Stand-in for SensorIngestion serving a fixed list of increments once"""
+
+    def __init__(self, increments):
+        self.increments = list(increments)
+        self.stats = IngestionStats()
+
+    def drain(self, max_items=None):
+        increments, self.increments = self.increments, []
+        return increments
+
+
+def _model() -> DustModel:
+    config = EarthConfig().with_overrides({'grid_shape': (6, 5, 4), 'dx': 1.0, 'dt': 0.005})
+    return DustModel(config)
+
+
+def _initial_conditions():
+    return {'velocity': [0.01, 0.0, 0.0], 'pressure': 0.0, 'concentration': 0.5,
+            'temperature': 288.0, 'humidity': 0.01}
+
+
+def test_nudging_reports_to_monitor_enabled_afterwards():
+    model = _model()
+    increment = Increment(cells=np.array([[1, 2, 3], [4, 0, 1]]),
+                          values={'concentration': np.array([0.9, 0.7])}, readings=2)
+    nudging = Nudging(_QueuedIncrements([increment]), relaxation_time=0.0,
+                      fields=('concentration',), simulation=model.simulation)
+    model.simulation.step_hooks.append(nudging)
+    model.enable_monitoring(stride=1)
+    model.enable_monitoring(stride=1)  # replacing the monitor is picked up too
+
+    results = model.simulate(0.02, initial_conditions=_initial_conditions())
+
+    assert nudging.ingestion.stats.applied == 2
+    assert results['invariants']['sources'] > 0.5
+    assert results['invariants']['max_mass_error'] < 1e-9
+
+
+def test_malformed_readings_do_not_reject_the_batch():
+    model = _model()
+    ingestion = SensorIngestion(iter(()), model.simulation.grid)
+    good = [{'timestamp': float(n), 'x': 2.5, 'y': 1.5, 'z': 0.5, 'velocity': [1.0, 0.0, 0.0],
+             'pressure': 101325.0, 'temperature': 288.0, 'humidity': 0.01,
+             'concentration': 0.1 * n} for n in range(10)]
+    missing = dict(good[0])
+    del missing['humidity']
+    garbled = dict(good[0], temperature='warm')
+    increment = ingestion._increment(good + [missing, garbled])
+    assert ingestion.stats.rejected == 2
+    assert increment.readings == 10
+    np.testing.assert_allclose(increment.values['concentration'], [0.45])
+
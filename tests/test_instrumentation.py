@@ -0,0 +1,65 @@
+# tests/test_instrumentation.py
+import tracemalloc
+
+import numpy as np
+
+from dust_dynamics.core.instrumentation import Profiler
+
+
+def test_nested_phase_keeps_outer_peak():
+    profiler = Profiler().enable(track_allocations=True)
+    with profiler.phase('outer'):
+        transient = np.ones(4_000_000)  # 32 MB, freed before the inner phase
+        del transient
+        with profiler.phase('inner'):
+            small = np.ones(1000)
+        del small
+    profiler.disable()
+    phases = profiler.as_dict()['phases']
+    assert phases['outer']['peak'] >= 32_000_000
+    assert phases['inner']['peak'] < 1_000_000
+
+
+def test_peak_of_nested_phase_reaches_outer():
+    profiler = Profiler().enable(track_allocations=True)
+    with profiler.phase('outer'):
+        with profiler.phase('inner'):
+            transient = np.ones(4_000_000)
+            del transient
+        with profiler.phase('sibling'):
+            pass
+    profiler.disable()
+    phases = profiler.as_dict()['phases']
+    assert phases['inner']['peak'] >= 32_000_000
+    assert phases['outer']['peak'] >= phases['inner']['peak']
+
+
+def test_disable_leaves_foreign_tracing_running():
+    tracemalloc.start()
+    try:
+        Profiler().enable(track_allocations=True).disable()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    Profiler().enable(track_allocations=True).disable()
+    assert not tracemalloc.is_tracing()
+
+
+def test_switching_tracking_inside_open_phase():
+    profiler = Profiler().enable()
+    with profiler.phase('outer'):
+        profiler.enable(track_allocations=True, reset=False)
+        with profiler.phase('inner'):
+            transient = np.ones(1000)
+            del transient
+    profiler.disable()
+    phases = profiler.as_dict()['phases']
+    assert phases['outer']['calls'] == 1 and phases['outer']['peak'] == 0
+    assert phases['inner']['peak'] > 0
+
+    profiler = Profiler().enable(track_allocations=True)
+    with profiler.phase('outer'):
+        profiler.disable()
+        profiler.enable(reset=False)
+    assert profiler.as_dict()['phases']['outer']['calls'] == 1
+    profiler.disable()
@@ -0,0 +1,27 @@
+# tests/test_loader.py
+import numpy as np
+import pandas as pd
+
+from dust_dynamics.data.loader import DataLoader
+
+
+def test_column_turning_to_text_mid_file_loads(tmp_path):
+    n = 100
+    pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'site': [float(i % 7) if i % 9 else np.nan for i in range(60)]
+                + [f'station-{i % 3}' for i in range(60, n)],
+        'count': list(range(60)) + [f'n{i}' for i in range(60, n)],
+        'pressure': np.linspace(1e5, 1.01e5, n),
+    }).to_csv(tmp_path / 'mixed.csv', index=False)
+    data = DataLoader(str(tmp_path), read_chunk_rows=25).load_measurement_data('mixed.csv')
+    # what pandas itself yields for the same chunks: numbers early, text later
+    expected = pd.concat(pd.read_csv(tmp_path / 'mixed.csv', parse_dates=['timestamp'],
+                                     chunksize=25), ignore_index=True)
+    assert len(data) == n
+    pd.testing.assert_series_equal(data['pressure'], expected['pressure'])
+    pd.testing.assert_series_equal(data['timestamp'], expected['timestamp'], check_dtype=False)
+    for name in ('site', 'count'):
+        for actual, wanted in zip(data[name], expected[name]):
+            assert actual == wanted or (pd.isna(actual) and pd.isna(wanted)), name
+    assert data['site'].iloc[-1] == 'station-0'
@@ -0,0 +1,45 @@
+# tests/test_monitoring.py
+import numpy as np
+import pytest
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.core.equations import State
+from dust_dynamics.core.monitoring import InvariantMonitor, InvariantViolation
+from dust_dynamics.models.dust_model import DustModel
+
+SHAPE = (8, 12, 6)
+
+
+def _conditions():
+    concentration = np.zeros(SHAPE)
+    concentration[:, 4:8, 2:4] = 1.0
+    return {'velocity': [1.0, 0.0, 0.0], 'pressure': 0.0, 'concentration': concentration,
+            'temperature': 288.0, 'humidity': 0.01}
+
+
+def _config(boundary='periodic'):
+    return EarthConfig().with_overrides({'grid_shape': SHAPE, 'dx': 1.0, 'dt': 0.05,
+                                         'boundary': boundary})
+
+
+@pytest.mark.parametrize('boundary', ['periodic', 'wall'])
+def test_plume_keeps_mass_budget_every_step(boundary):
+    model = DustModel(_config(boundary))
+    model.enable_monitoring(stride=1)
+    results = model.simulate(0.5, initial_conditions=_conditions())
+    assert results['invariants']['checks'] == 11
+    assert results['invariants']['max_mass_error'] < 1e-10
+
+
+@pytest.mark.parametrize('low, fails', [(-1e-12, False), (-1e-3, True)])
+def test_positivity_tolerance_scales_with_field_maximum(low, fails):
+    config = _config()
+    conditions = _conditions()
+    conditions['concentration'][0, 0, 0] = low
+    state = State.from_initial_conditions(conditions, DustModel(config).simulation.grid)
+    monitor = InvariantMonitor(config)
+    if fails:
+        with pytest.raises(InvariantViolation, match='Negative value'):
+            monitor.start(state)
+    else:
+        monitor.start(state)
@@ -0,0 +1,96 @@
+# tests/test_particles.py
+import numpy as np
+import pytest
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.core.equations import Grid, State
+from dust_dynamics.core.particles import (CellList, ParticleTracker, fold_ghosts, interpolate,
+                                          scatter, trilinear_weights)
+from dust_dynamics.core.stencils import INTERIOR
+
+SHAPE = (6, 5, 4)
+DX = 0.5
+
+
+def _positions(n, seed=0):
+    extent = np.asarray(SHAPE, dtype=float)[:, None] * DX
+    return np.random.default_rng(seed).uniform(0.0, 1.0, (3, n)) * extent
+
+
+def test_cell_list_groups_and_renumbers():
+    rng = np.random.default_rng(0)
+    cells = CellList(SHAPE)
+    ids = rng.integers(0, cells.n_cells, 200)
+    cells.update(ids)
+    for c in (0, 7, cells.n_cells - 1):
+        cell = np.unravel_index(c, SHAPE)
+        assert sorted(cells.in_cell(cell)) == list(np.flatnonzero(ids == c))
+
+    keep = rng.uniform(size=200) > 0.3
+    cells.remove(keep)
+    kept = ids[keep]
+    for c in range(cells.n_cells):
+        cell = np.unravel_index(c, SHAPE)
+        assert sorted(cells.in_cell(cell)) == list(np.flatnonzero(kept == c))
+
+    ijk = np.stack(np.unravel_index(kept, SHAPE))
+    shape = np.asarray(SHAPE)[:, None]
+    for periodic in (False, True):
+        distance = np.abs(ijk)
+        if periodic:
+            distance = np.minimum(distance, shape - distance)
+        expected = np.flatnonzero(np.all(distance <= 1, axis=0))
+        assert sorted(cells.neighbours((0, 0, 0), periodic)) == list(expected)
+
+
+def test_interpolation_is_exact_for_linear_fields():
+    padded = tuple(n + 2 for n in SHAPE)
+    centres = np.meshgrid(*[(np.arange(n) - 0.5) * DX for n in padded], indexing='ij')
+    gradient, offset = np.array([0.3, -1.2, 2.5]), 4.0
+    field = offset + sum(g * x for g, x in zip(gradient, centres))
+    position = _positions(500)
+    base, frac = trilinear_weights(position, DX)
+    np.testing.assert_allclose(interpolate(field, base, frac), offset + gradient @ position,
+                               rtol=1e-12)
+
+
+@pytest.mark.parametrize('boundary', ['periodic', 'wall'])
+def test_scatter_conserves_mass_and_momentum(boundary):
+    rng = np.random.default_rng(1)
+    position = _positions(300)
+    mass = rng.uniform(0.5, 2.0, 300)
+    velocity = rng.standard_normal(300)
+    base, frac = trilinear_weights(position, DX)
+    padded = tuple(n + 2 for n in SHAPE)
+    deposited = scatter(mass, base, frac, padded)
+    assert np.isclose(deposited.sum(), mass.sum())
+    folded = fold_ghosts(deposited, boundary)
+    assert folded.shape == SHAPE
+    assert np.isclose(folded.sum(), mass.sum(), rtol=1e-13)
+    assert not deposited[0].any() and not deposited[-1].any()
+    momentum = fold_ghosts(scatter(mass * velocity, base, frac, padded), boundary)
+    assert np.isclose(momentum.sum(), (mass * velocity).sum(), rtol=1e-12)
+
+
+def test_fold_ghosts_wraps_or_reflects():
+    padded = np.zeros(tuple(n + 2 for n in SHAPE))
+    padded[0, 2, 2] = 1.0  # below the first x cell
+    periodic = fold_ghosts(padded.copy(), 'periodic')
+    assert periodic[-1, 1, 1] == 1.0 and periodic.sum() == 1.0
+    wall = fold_ghosts(padded.copy(), 'wall')
+    assert wall[0, 1, 1] == 1.0 and wall.sum() == 1.0
+
+
+def test_two_way_feedback_is_weight_of_particles():
+    config = EarthConfig().with_overrides({'grid_shape': SHAPE, 'dx': DX})
+    grid = Grid(SHAPE, DX, 'periodic')
+    tracker = ParticleTracker(config, grid, two_way=True)
+    tracker.add_particles(_positions(50), diameter=1e-5, density=2500.0,
+                          mass=np.full(50, 1e-3))
+    state = State.from_initial_conditions({'velocity': [0.0, 0.0, 0.0], 'pressure': 0.0,
+                                           'concentration': 0.0, 'temperature': 288.0,
+                                           'humidity': 0.0}, grid)
+    tracker.apply_feedback(state, 0.1)
+    momentum = state.velocity[(2,) + INTERIOR[1:]].sum() * config.rho * DX ** 3
+    assert np.isclose(momentum, -0.1 * config.g * 50 * 1e-3)
+    assert not state.concentration[INTERIOR].any()
@@ -0,0 +1,51 @@
+# tests/test_preprocessor.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from dust_dynamics.data.preprocessor import DataPreprocessor
+
+
+def _chunks(frame: pd.DataFrame, size: int):
+    return [frame.iloc[start:start + size] for start in range(0, len(frame), size)]
+
+
+@pytest.fixture
+def gappy_frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=300, freq='min'),
+        'a': rng.normal(5.0, 2.0, 300),
+        'b': rng.normal(-1.0, 0.5, 300),
+        'wind_u': rng.normal(0.0, 3.0, 300),
+        'wind_v': rng.normal(1.0, 3.0, 300),
+    })
+    frame.loc[100:199, 'b'] = np.nan  # one whole chunk missing
+    frame.loc[rng.choice(300, 30, replace=False), 'a'] = np.nan
+    frame.loc[:4, 'wind_u'] = np.nan  # leading gap
+    return frame
+
+
+@pytest.mark.parametrize('chunk_rows', [100, 37, 300])
+def test_streamed_output_matches_whole_frame(gappy_frame, chunk_rows):
+    expected, _ = DataPreprocessor().preprocess_data(gappy_frame)
+
+    streamed = DataPreprocessor()
+    rows = streamed.fit_stream(_chunks(gappy_frame, chunk_rows))
+    out = streamed.transform_stream(_chunks(gappy_frame, chunk_rows), rows)
+
+    assert streamed.output_columns == list(expected.columns)
+    np.testing.assert_allclose(out, expected.to_numpy(), rtol=1e-5, atol=1e-5)
+
+
+def test_statistics_ignore_missing_values(gappy_frame):
+    preprocessor = DataPreprocessor()
+    preprocessor.fit_stream(_chunks(gappy_frame, 100))
+    scaler = preprocessor.scalers['features']
+    for column in ('a', 'b', 'wind_u'):
+        index = preprocessor.feature_columns.index(column)
+        observed = gappy_frame[column].dropna()
+        assert scaler.n_samples_seen_[index] == len(observed)
+        assert scaler.mean_[index] == pytest.approx(observed.mean())
+        assert scaler.scale_[index] == pytest.approx(observed.std(ddof=0))
+    assert np.all(np.isfinite(scaler.scale_))
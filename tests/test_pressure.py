@@ -0,0 +1,25 @@
+# tests/test_pressure.py
+import numpy as np
+import pytest
+
+from dust_dynamics.core import stencils
+from dust_dynamics.core.equations import Grid
+from dust_dynamics.core.pressure import MultigridPoissonSolver
+
+
+@pytest.mark.parametrize('boundary', ['periodic', 'wall'])
+@pytest.mark.parametrize('shape', [(40, 24, 20), (37, 30, 22)])
+def test_multigrid_converges_on_non_power_of_two_grid(shape, boundary):
+    grid = Grid(shape, 1.0 / shape[0], boundary)
+    rhs = np.random.default_rng(0).standard_normal((2,) + shape)
+    solver = MultigridPoissonSolver(grid, leading=(2,), tol=1e-8, max_cycles=12)
+    assert solver.levels[-1].shape[-3:] != (2, 2, 2)
+
+    phi = solver.solve(rhs)
+    assert solver.last_iterations <= 10
+    assert solver.last_residual <= 1e-8
+
+    stencils.fill_ghosts(phi, boundary)
+    applied = stencils.laplacian(phi, grid.dx, np.empty_like(rhs), np.empty_like(rhs))
+    expected = rhs - rhs.mean(axis=(-3, -2, -1), keepdims=True)
+    assert np.max(np.abs(applied - expected)) <= 1e-6 * np.max(np.abs(expected))
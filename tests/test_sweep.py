@@ -0,0 +1,33 @@
+# tests/test_sweep.py
+import numpy as np
+import pytest
+
+from dust_dynamics.config.earth_config import EarthConfig
+from dust_dynamics.config.mars_config import MarsConfig
+from dust_dynamics.core.sweep import SweepRunner, parameter_grid
+
+
+def test_with_overrides_keeps_class_and_planet_attributes():
+    base = MarsConfig()
+    config = base.with_overrides({'D': 0.5, 'pressure_base': 650})
+    assert type(config) is MarsConfig
+    assert (config.D, config.pressure_base, config.temperature_base) == (0.5, 650, 210)
+    assert (base.D, base.pressure_base) == (0.35, 600)
+
+
+def test_with_overrides_rejects_unknown_parameters():
+    with pytest.raises(ValueError, match='Dd'):
+        EarthConfig().with_overrides({'Dd': 1.0})
+
+
+def test_mass_drift_marks_run_diverged():
+    base = EarthConfig().with_overrides({'grid_shape': (6, 5, 4), 'dx': 1.0})
+    cases = parameter_grid({'earth': base}, {'D': [0.1, 100.0]})
+    rng = np.random.default_rng(0)
+    runner = SweepRunner(1.0, {'velocity': [0.0, 0.0, 0.0], 'pressure': 0.0,
+                               'concentration': 0.5 + 0.1 * rng.random((6, 5, 4)),
+                               'temperature': 288.0, 'humidity': 0.01},
+                         dt=0.05, max_workers=0)
+    records = runner.run(cases).records
+    assert records[0]['status'] == 'ok'
+    assert records[1]['status'] == 'diverged'
@@ -0,0 +1,47 @@
+# tests/test_trainer.py
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+
+from dust_dynamics.models.trainer import BatchStream, Trainer
+
+
+def _model():
+    torch.manual_seed(0)
+    return nn.Sequential(nn.Linear(3, 8), nn.BatchNorm1d(8), nn.ReLU(), nn.Linear(8, 1))
+
+
+def _data(n_rows):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(n_rows, 3))
+    return np.column_stack([x, x @ [1.0, -2.0, 0.5]]).astype(np.float32)
+
+
+def test_fewer_rows_than_batch_size_still_trains():
+    model = _model()
+    before = [p.detach().clone() for p in model.parameters()]
+    history = Trainer(model, batch_size=1024, prefetch=0).fit(_data(1000), [0, 1, 2], [3],
+                                                              epochs=2)
+    assert history.train_loss[0] > 0
+    assert any(not torch.equal(a, b) for a, b in zip(before, model.parameters()))
+
+
+def test_single_row_trailing_batch_is_dropped():
+    stream = BatchStream(_data(9), (0, 9), [0, 1, 2], [3], batch_size=4, shuffle=False,
+                         prefetch=0, drop_single=True)
+    assert [len(x) for x, _ in stream] == [4, 4]
+    stream = BatchStream(_data(10), (0, 10), [0, 1, 2], [3], batch_size=4, shuffle=False,
+                         prefetch=0, drop_single=True)
+    assert [len(x) for x, _ in stream] == [4, 4, 2]
+
+
+def test_no_training_batches_raises():
+    with pytest.raises(ValueError, match='No training batches'):
+        Trainer(_model(), validation_fraction=0.0, prefetch=0).fit(_data(1), [0, 1, 2], [3])
+
+
+def test_thread_count_is_restored():
+    threads = torch.get_num_threads()
+    Trainer(_model(), threads=threads + 1, prefetch=0).fit(_data(64), [0, 1, 2], [3], epochs=1)
+    assert torch.get_num_threads() == threads
@@ -1,41 +1,119 @@
 # utils/metrics.py
 import numpy as np
-from typing import Dict, List
-from sklearn.metrics import mean_squared_error, r2_score
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+@dataclass
+class _RunningStats:
+    """Mergeable sums for one variable (Chan/Welford update of the truth variance)"""
+    count: int = 0
+    truth_mean: float = 0.0
+    truth_m2: float = 0.0  # sum of squared deviations of the truth
+    squared_error: float = 0.0
+    error: float = 0.0  # sum of prediction - truth
+    prediction_sum: float = 0.0
+    truth_sum: float = 0.0
+
+    def merge(self, other: '_RunningStats'):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.truth_mean - self.truth_mean
+        self.truth_m2 += other.truth_m2 + delta * delta * self.count * other.count / total
+        self.truth_mean += delta * other.count / total
+        self.count = total
+        self.squared_error += other.squared_error
+        self.error += other.error
+        self.prediction_sum += other.prediction_sum
+        self.truth_sum += other.truth_sum
+
+    @classmethod
+    def of(cls, prediction: np.ndarray, truth: np.ndarray) -> '_RunningStats':
+        prediction = np.asarray(prediction, dtype=np.float64)
+        truth = np.asarray(truth, dtype=np.float64)
+        if prediction.shape != truth.shape:
+            raise ValueError(f"Shape mismatch: {prediction.shape} vs {truth.shape}")
+        if truth.size == 0:
+            return cls()
+        residual = prediction - truth
+        mean = float(truth.mean())
+        deviation = truth - mean
+        return cls(truth.size, mean, float(np.vdot(deviation, deviation)),
+                   float(np.vdot(residual, residual)), float(residual.sum()),
+                   float(prediction.sum()), float(truth.sum()))
+
+class StreamingMetrics:
+    """Accumulates ModelMetrics chunk by chunk in constant memory
+
+    Feed it predictions and ground truth per time chunk or per subdomain
+    with `update`; accumulators built by parallel workers combine with
+    `merge`. R² is computed over all values of a field, which matches
+    sklearn's r2_score for 1-D data.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, _RunningStats] = {}
+
+    def update(self, predictions: Dict[str, np.ndarray],
+               ground_truth: Dict[str, np.ndarray]) -> 'StreamingMetrics':
+        for var in predictions.keys():
+            chunk = _RunningStats.of(predictions[var], ground_truth[var])
+            self.stats.setdefault(var, _RunningStats()).merge(chunk)
+        return self
+
+    def merge(self, other: 'StreamingMetrics') -> 'StreamingMetrics':
+        for var, stats in other.stats.items():
+            self.stats.setdefault(var, _RunningStats()).merge(stats)
+        return self
+
+    def update_from_stores(self, predictions, ground_truth,
+                           fields: Optional[Sequence[str]] = None) -> 'StreamingMetrics':
+        """Score two on-disk ResultStores frame by frame"""
+        for name in fields or predictions.fields:
+            for predicted, truth in zip(predictions.frames(name), ground_truth.frames(name)):
+                self.update({name: predicted}, {name: truth})
+        return self
+
+    def metrics(self, include_bias: bool = False) -> Dict[str, float]:
+        metrics = {}
+        for var, stats in self.stats.items():
+            metrics[f'{var}_rmse'] = np.sqrt(stats.squared_error / stats.count)
+            metrics[f'{var}_r2'] = (1.0 - stats.squared_error / stats.truth_m2
+                                    if stats.truth_m2 > 0 else
+                                    (1.0 if stats.squared_error == 0 else 0.0))
+            if include_bias:
+                metrics[f'{var}_bias'] = stats.error / stats.count
+
+        if 'concentration' in self.stats:
+            stats = self.stats['concentration']
+            metrics['mass_conservation_error'] = np.abs(
+                stats.prediction_sum - stats.truth_sum
+            ) / stats.truth_sum
+
+        return metrics
 
 class ModelMetrics:
     """Evaluation metrics for dust dynamics model"""
-    
+
     @staticmethod
     def calculate_metrics(predictions: Dict[str, np.ndarray],
-                        ground_truth: Dict[str, np.ndarray]) -> Dict[str, float]:
-        """Calculate model performance metrics"""
-        metrics = {}
-        
-        # Calculate RMSE for each variable
-        for var in predictions.keys():
-            metrics[f'{var}_rmse'] = np.sqrt(
-                mean_squared_error(ground_truth[var], predictions[var])
-            )
-            metrics[f'{var}_r2'] = r2_score(
-                ground_truth[var], predictions[var]
-            )
-        
-        # Calculate conservation metrics
-        metrics['mass_conservation_error'] = np.abs(
-            np.sum(predictions['concentration']) - 
-            np.sum(ground_truth['concentration'])
-        ) / np.sum(ground_truth['concentration'])
-        
-        return metrics
-    
+                        ground_truth: Dict[str, np.ndarray],
+                        include_bias: bool = False) -> Dict[str, float]:
+        """Calculate model performance metrics
+
+        RMSE and R² for each variable (plus the mean error with
+        `include_bias`) and the relative dust-mass conservation error, via
+        the same accumulator that StreamingMetrics uses for chunked data.
+        """
+        return StreamingMetrics().update(predictions, ground_truth).metrics(include_bias)
+
     @staticmethod
     def generate_report(metrics: Dict[str, float]) -> str:
         """Generate human-readable performance report"""
         report = "Model Performance Report\n"
         report += "=" * 30 + "\n\n"
-        
+
         for metric, value in metrics.items():
             report += f"{metric}: {value:.4f}\n"
-        
-        return report
\ No newline at end of file
+
+        return report
@@ -1,36 +1,270 @@
 # utils/visualization.py
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-from typing import Dict
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+import numpy as np
+
+COORDINATES = ('x', 'y', 'z')
+POINT_FIELDS = ('v_x', 'v_y', 'v_z', 'concentration', 'temperature', 'humidity', 'pressure')
+
+
+def _field(results: Dict, name: str) -> Optional[np.ndarray]:
+    """Grid array `name` of a results dict or frame, velocity components included"""
+    if name in results:
+        return results[name]
+    if name in POINT_FIELDS[:3] and 'velocity' in results:
+        return results['velocity'][POINT_FIELDS.index(name)]
+    return None
+
+
+def grid_shape(results: Dict) -> Tuple[int, int, int]:
+    for name in COORDINATES + POINT_FIELDS:
+        array = _field(results, name)
+        if array is not None:
+            return tuple(np.shape(array)[-3:])
+    raise ValueError("Results hold no gridded field")
+
+
+def stride_for_budget(shape: Tuple[int, ...], budget: int) -> int:
+    """Smallest common stride whose sub-grid of `shape` has at most `budget` points"""
+    stride = max(1, int(np.ceil((np.prod(shape) / max(budget, 1)) ** (1.0 / 3.0))))
+    while np.prod([-(-n // stride) for n in shape]) > budget:
+        stride += 1
+    return stride
+
+
+def weighted_sample(weights: np.ndarray, budget: int, seed: Optional[int] = 0) -> np.ndarray:
+    """Sorted flat indices of `budget` points drawn without replacement ∝ weights
+
+    Efraimidis-Spirakis keys log(u)/w ranked with a partial sort, which is
+    linear in the number of points.
+    """
+    weights = np.abs(np.ravel(weights)).astype(np.float64)
+    if budget >= weights.size:
+        return np.arange(weights.size)
+    weights += np.finfo(np.float64).tiny
+    u = np.random.default_rng(seed).random(weights.size)
+    keys = np.log(u) / weights
+    return np.sort(np.argpartition(keys, -budget)[-budget:])
+
+
+def decimate(results: Dict, budget: Optional[int] = 4096, method: str = 'stride',
+             weight: str = 'velocity', seed: Optional[int] = 0) -> Dict[str, np.ndarray]:
+    """Flat point arrays of at most `budget` grid points for plotting
+
+    `method` is 'stride' (a regular sub-grid, read as strided views) or
+    'magnitude' (random points weighted by |velocity| or by the field named
+    by `weight`, which keeps the active regions). Coordinates come from the
+    results' x/y/z, or from the frame's `dx` for frames read from a
+    ResultStore. Only the selected points are ever copied.
+    """
+    shape = grid_shape(results)
+    n = int(np.prod(shape))
+    budget = n if budget is None else budget
+    if method == 'stride' or budget >= n:
+        s = stride_for_budget(shape, budget) if budget < n else 1
+        index = (Ellipsis, slice(None, None, s), slice(None, None, s), slice(None, None, s))
+        take = lambda array: np.asarray(array[index]).ravel()
+        selected = np.arange(n).reshape(shape)[index[1:]].ravel()
+    elif method == 'magnitude':
+        if weight == 'velocity':
+            values = np.sqrt(sum(np.square(_field(results, name)) for name in POINT_FIELDS[:3]))
+        else:
+            values = _field(results, weight)
+        selected = weighted_sample(values, budget, seed)
+        take = lambda array: np.asarray(array).reshape(-1)[selected]
+    else:
+        raise ValueError(f"Unsupported decimation method: {method}")
+
+    points = {}
+    for name in POINT_FIELDS:
+        array = _field(results, name)
+        if array is not None:
+            points[name] = take(array)
+    if all(name in results for name in COORDINATES):
+        for name in COORDINATES:
+            points[name] = take(results[name])
+    else:
+        cells = np.unravel_index(selected, shape)
+        for name, cell in zip(COORDINATES, cells):
+            points[name] = (cell + 0.5) * results['dx']
+    return points
+
+
+def frame_results(store, index: int, dx: float) -> Dict[str, Any]:
+    """Lazy results-layout view of one frame of a ResultStore"""
+    frame = {name: store.frame(name, index) for name in store.fields}
+    frame['dx'] = dx
+    frame['time'] = float(store.time[index])
+    return frame
+
+
+def _quiver_figure(points: Dict[str, np.ndarray], interactive: bool = True):
+    import matplotlib
+    if not interactive:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(12, 8))
+    ax = fig.add_subplot(111, projection='3d')
+    ax.quiver(points['x'], points['y'], points['z'],
+              points['v_x'], points['v_y'], points['v_z'])
+    return fig, plt
+
+
+def _scatter_figure(points: Dict[str, np.ndarray]):
+    import plotly.graph_objects as go
+    return go.Figure(data=[go.Scatter3d(
+        x=points['x'],
+        y=points['y'],
+        z=points['z'],
+        mode='markers',
+        marker=dict(
+            size=points['concentration'] * 50,
+            color=points['temperature'],
+            colorscale='Viridis',
+        )
+    )])
+
+
+def _render_frame(points: Dict[str, np.ndarray], path: str, kind: str) -> str:
+    """Worker-side rendering of one decimated frame to `path`"""
+    if kind == 'quiver':
+        fig, plt = _quiver_figure(points, interactive=False)
+        fig.savefig(path)
+        plt.close(fig)
+    else:
+        _scatter_figure(points).write_html(path)
+    return path
+
+
+def _render_stored_frame(store_path: str, index: int, dx: float, budget: int, method: str,
+                         path: str, kind: str) -> str:
+    """Worker-side read, decimation and rendering of one on-disk frame"""
+    from ..core.output import ResultStore
+    frame = frame_results(ResultStore(store_path), index, dx)
+    weight = 'velocity' if kind == 'quiver' else 'concentration'
+    return _render_frame(decimate(frame, budget, method, weight), path, kind)
+
+
+class FrameExporter:
+    """Renders animation frames to files in a pool of worker processes
+
+    Frames are decimated in the caller, so only `budget` points per frame
+    cross the process boundary (or, for ResultStore frames, only the path
+    and index). Submitting never waits: once `max_pending` frames are queued
+    further frames are dropped and counted in `dropped`, and rendering
+    failures are collected in `errors` rather than raised. Also usable as a
+    Simulation step hook that exports every `every` steps.
+    """
+
+    def __init__(self, directory: Union[str, Path], kind: str = 'quiver',
+                 budget: int = 4096, method: str = 'stride', workers: int = 2,
+                 max_pending: int = 8, every: int = 1, dx: Optional[float] = None):
+        if kind not in ('quiver', 'scatter'):
+            raise ValueError(f"Unsupported frame kind: {kind}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.kind = kind
+        self.budget = budget
+        self.method = method
+        self.max_pending = max_pending
+        self.every = every
+        self.dx = dx
+        self.pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        self.pending: List[Future] = []
+        self.written: List[str] = []
+        self.errors: List[BaseException] = []
+        self.dropped = 0
+        self.frames = 0
+
+    @property
+    def suffix(self) -> str:
+        return '.png' if self.kind == 'quiver' else '.html'
+
+    def _collect(self):
+        still = []
+        for future in self.pending:
+            if future.done():
+                error = future.exception()
+                if error is None:
+                    self.written.append(future.result())
+                else:
+                    self.errors.append(error)
+            else:
+                still.append(future)
+        self.pending = still
+
+    def _submit(self, function, *args) -> Optional[Future]:
+        self._collect()
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return None
+        path = str(self.directory / f"frame_{self.frames:06d}{self.suffix}")
+        self.frames += 1
+        future = self.pool.submit(function, *args, path, self.kind)
+        self.pending.append(future)
+        return future
+
+    def submit(self, results: Dict) -> Optional[Future]:
+        """Queue one results dict (or frame_results view); None if it was dropped"""
+        weight = 'velocity' if self.kind == 'quiver' else 'concentration'
+        return self._submit(_render_frame, decimate(results, self.budget, self.method, weight))
+
+    def submit_store(self, store_path: Union[str, Path], dx: float,
+                     stride: int = 1) -> int:
+        """Queue frames of an on-disk ResultStore; workers read them lazily"""
+        from ..core.output import ResultStore
+        queued = 0
+        for index in range(0, len(ResultStore(store_path)), stride):
+            queued += self._submit(_render_stored_frame, str(store_path), index, dx,
+                                   self.budget, self.method) is not None
+        return queued
+
+    def __call__(self, state, t: float, step: int, dt: float) -> bool:
+        if step % self.every == 0:
+            if self.dx is None:
+                raise ValueError("FrameExporter needs dx to export simulation states")
+            interior = state.interior()
+            frame = {name: getattr(interior, name) for name in ('velocity', 'concentration',
+                                                                'temperature')}
+            frame['dx'] = self.dx
+            self.submit(frame)
+        return False
+
+    def close(self, wait: bool = True) -> List[str]:
+        """Shut the pool down; returns the files written"""
+        self.pool.shutdown(wait=wait, cancel_futures=not wait)
+        if wait:
+            self._collect()
+        return self.written
+
 
 class DustVisualizer:
-    """Visualization tools for dust dynamics"""
-    
+    """Visualization tools for dust dynamics
+
+    Plots are built from at most `budget` decimated points (see decimate);
+    `budget=None` plots every grid point.
+    """
+
     @staticmethod
-    def plot_velocity_field(results: Dict):
+    def plot_velocity_field(results: Dict, budget: Optional[int] = 4096,
+                            method: str = 'stride'):
         """Plot 3D velocity field"""
-        fig = plt.figure(figsize=(12, 8))
-        ax = fig.add_subplot(111, projection='3d')
-        
-        # Plot velocity vectors
-        ax.quiver(results['x'], results['y'], results['z'],
-                 results['v_x'], results['v_y'], results['v_z'])
-        
+        points = decimate(results, budget, method, 'velocity')
+        fig, plt = _quiver_figure(points)
+
         plt.show()
-    
+
     @staticmethod
-    def create_interactive_plot(results: Dict):
+    def create_interactive_plot(results: Dict, budget: Optional[int] = 20000,
+                                method: str = 'magnitude'):
         """Create interactive plotly visualization"""
-        fig = go.Figure(data=[go.Scatter3d(
-            x=results['x'],
-            y=results['y'],
-            z=results['z'],
-            mode='markers',
-            marker=dict(
-                size=results['concentration'] * 50,
-                color=results['temperature'],
-                colorscale='Viridis',
-            )
-        )])
-        
+        fig = _scatter_figure(decimate(results, budget, method, 'concentration'))
+
         fig.show()
+
+    @staticmethod
+    def load_frame(store, index: int, dx: float) -> Dict[str, Any]:
+        """Frame `index` of a ResultStore, read lazily, for the plotting methods"""
+        return frame_results(store, index, dx)